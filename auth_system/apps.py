@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AuthSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_system'
+
+    def ready(self):
+        # Фоновая очистка черного списка запускается точками входа
+        # core/wsgi.py и core/asgi.py, а не здесь: ready() выполняется и в
+        # migrate, и в тестах, и в обоих процессах автоперезагрузки runserver.
+        from . import signals  # noqa: F401
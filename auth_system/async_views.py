@@ -0,0 +1,180 @@
+"""
+Асинхронные представления для развертывания под ASGI.
+
+AsyncAPIView выполняет аутентификацию и проверку разрешений в цикле событий:
+классы, реализующие aauthenticate/ahas_permission, вызываются напрямую
+через асинхронный ORM, без перехода в пул потоков. Семантика RBAC та же,
+что и у синхронных представлений, поскольку используется та же логика
+JWTAuthentication и HasPermission.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .authentication import TokenUser, aresolve_user
+from .conditional import conditional_response
+from .models import User
+from .permissions import HasPermission, IsAuthenticatedOr401
+from .serializers import UserProfileSerializer
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView с асинхронным циклом обработки запроса. Обработчики методов
+    (get, post, ...) должны быть корутинами.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """
+        Асинхронный вариант APIView.initial.
+        """
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """
+        Аутентифицирует запрос, используя aauthenticate там, где он есть.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(
+                        request
+                    )
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        """
+        Проверяет разрешения, используя ahas_permission там, где он есть.
+        """
+        for permission in self.get_permissions():
+            if hasattr(permission, "ahas_permission"):
+                allowed = await permission.ahas_permission(request, self)
+            else:
+                allowed = permission.has_permission(request, self)
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+
+# --- Async Mock Business Application Views ---
+
+
+class AsyncProductListView(AsyncAPIView):
+    """GET /products/ - Асинхронный вариант ProductListView."""
+
+    permission_classes = [IsAuthenticatedOr401, HasPermission]
+    business_object_code = "products"
+    required_action = "read_all"
+
+    async def get(self, request: HttpRequest) -> Response:
+        data = [{"id": 1, "name": "Laptop"}, {"id": 2, "name": "Mouse"}]
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AsyncOrderListView(AsyncAPIView):
+    """GET /orders/ - Асинхронный вариант OrderListView."""
+
+    permission_classes = [IsAuthenticatedOr401, HasPermission]
+    business_object_code = "orders"
+    required_action = "read_all"
+
+    async def get(self, request: HttpRequest) -> Response:
+        data = [
+            {"id": 101, "item": "Keyboard", "owner_id": 2},
+            {"id": 102, "item": "Monitor", "owner_id": 3},
+        ]
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AsyncProfileView(AsyncAPIView):
+    """
+    GET /auth/profile/      – Получить профиль текущего пользователя.
+    PUT /auth/profile/      – Обновить профиль текущего пользователя (имя/фамилия).
+    PATCH /auth/profile/    – Частично обновить профиль текущего пользователя.
+    """
+
+    permission_classes = [IsAuthenticatedOr401]
+
+    async def get(self, request: HttpRequest) -> Response:
+        """
+        Быстрый путь чтения и ETag, как в ProfileView.retrieve.
+        """
+        fields = UserProfileSerializer.Meta.fields
+        user = request.user
+        if isinstance(user, TokenUser):
+            data = await User.objects.values(*fields).aget(pk=user.pk)
+        else:
+            data = {name: getattr(user, name) for name in fields}
+        return conditional_response(request, data)
+
+    async def put(self, request: HttpRequest) -> Response:
+        return await self.update(request, partial=False)
+
+    async def patch(self, request: HttpRequest) -> Response:
+        return await self.update(request, partial=True)
+
+    async def update(self, request, partial: bool) -> Response:
+        user = await aresolve_user(request.user)
+        serializer = UserProfileSerializer(user, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        for field, value in serializer.validated_data.items():
+            setattr(user, field, value)
+        if serializer.validated_data:
+            await user.asave(update_fields=list(serializer.validated_data))
+        return Response(serializer.data)
@@ -1,23 +1,132 @@
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
-from .models import BlacklistedToken, User
+
+from .blacklist import revoked_tokens
+from .context import RequestContext
+from .instrumentation import stage
+from .models import User
+from .token_cache import decoded_tokens
 from . import utils
 
 
+class TokenUser:
+    """
+    Легковесный принципал, построенный из утверждений токена без запроса к БД.
+    Полная модель пользователя загружается только при обращении к атрибутам,
+    которых нет в токене.
+    """
+
+    __slots__ = ("id", "role_id", "role_name", "is_superuser", "_user")
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, payload: dict):
+        self.id = payload["user_id"]
+        self.role_id = payload.get("role_id")
+        self.role_name = payload.get("role")
+        self.is_superuser = bool(payload.get("is_superuser", False))
+        self._user = None
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def get_user(self) -> User:
+        """
+        Загружает и кэширует полную модель пользователя.
+        """
+        if self._user is None:
+            self._user = User.objects.get(pk=self.id)
+        return self._user
+
+    async def aget_user(self) -> User:
+        """
+        Асинхронный вариант get_user.
+        """
+        if self._user is None:
+            self._user = await User.objects.aget(pk=self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def __str__(self):
+        return f"TokenUser {self.id}"
+
+
+def resolve_user(user) -> User:
+    """
+    Возвращает полную модель пользователя для принципала запроса.
+    """
+    if isinstance(user, TokenUser):
+        return user.get_user()
+    return user
+
+
+async def aresolve_user(user) -> User:
+    """
+    Асинхронный вариант resolve_user.
+    """
+    if isinstance(user, TokenUser):
+        return await user.aget_user()
+    return user
+
+
 class JWTAuthentication(BaseAuthentication):
     keyword = "Bearer"
 
-    def authenticate(self, request):
+    def authenticate_header(self, request) -> str:
+        return f'{self.keyword} realm="api"'
+
+    def get_raw_token(self, request) -> str | None:
+        """
+        Извлекает токен из заголовка Authorization.
+        """
         auth = request.headers.get("Authorization")
         if not auth or not auth.startswith(f"{self.keyword} "):
             return None
+        return auth.split()[1]
 
-        token = auth.split()[1]
-        payload = utils.decode_jwt(token)
-        if not payload:
+    def authenticate(self, request):
+        token = self.get_raw_token(request)
+        if not token:
             return None
 
-        if BlacklistedToken.objects.filter(jti=payload.get("jti")).exists():
+        context = RequestContext()
+        with stage("authenticate"):
+            result = self.authenticate_token(token, context)
+        if result is None:
             return None
+        context.user = result[0]
+        request.auth_context = context
+        return (result[0], token)
+
+    def authenticate_token(self, token: str, context: RequestContext | None = None):
+        """
+        Проверяет токен и возвращает пару (пользователь, полезная нагрузка)
+        или None, если токен недействителен, отозван или пользователь неактивен.
+        Поколение RBAC, прочитанное при проверке, сохраняется в context.
+        """
+        context = context or RequestContext()
+        payload = self.decode(token)
+        if not payload:
+            return None
+
+        revocation_jti = utils.user_revocation_jti(payload["user_id"])
+        with stage("blacklist"):
+            if revoked_tokens.is_revoked(payload.get("jti")):
+                return None
+            if revoked_tokens.is_revoked(revocation_jti, payload.get("exp")):
+                return None
+
+        if getattr(settings, "JWT_CLAIMS_ONLY_AUTH", False):
+            principal = self.authenticate_claims(payload, context)
+            if principal is not None:
+                return (principal, payload)
 
         try:
             user = User.objects.get(id=payload["user_id"])
@@ -26,4 +135,84 @@ class JWTAuthentication(BaseAuthentication):
 
         if not user.is_active:
             return None
+        return (user, payload)
+
+    async def aauthenticate(self, request):
+        """
+        Асинхронный вариант authenticate на основе асинхронного ORM.
+        """
+        token = self.get_raw_token(request)
+        if not token:
+            return None
+
+        payload = self.decode(token)
+        if not payload:
+            return None
+
+        revocation_jti = utils.user_revocation_jti(payload["user_id"])
+        with stage("blacklist"):
+            if await revoked_tokens.ais_revoked(payload.get("jti")):
+                return None
+            if await revoked_tokens.ais_revoked(revocation_jti, payload.get("exp")):
+                return None
+
+        context = RequestContext()
+        if getattr(settings, "JWT_CLAIMS_ONLY_AUTH", False):
+            principal = await self.aauthenticate_claims(payload, context)
+            if principal is not None:
+                context.user = principal
+                request.auth_context = context
+                return (principal, token)
+
+        try:
+            user = await User.objects.aget(id=payload["user_id"])
+        except User.DoesNotExist:
+            return None
+
+        if not user.is_active:
+            return None
+        context.user = user
+        request.auth_context = context
         return (user, token)
+
+    def decode(self, token: str) -> dict | None:
+        """
+        Декодирует токен, используя кэш уже проверенных полезных нагрузок.
+        """
+        with stage("jwt_decode"):
+            payload = decoded_tokens.get(token, utils.verification_key)
+            if payload is None:
+                decoded = utils.decode_jwt_with_key(token)
+                if decoded is None:
+                    return None
+                payload, verified_with = decoded
+                decoded_tokens.put(token, payload, verified_with)
+        return payload
+
+    def authenticate_claims(
+        self, payload: dict, context: RequestContext | None = None
+    ) -> TokenUser | None:
+        """
+        Строит принципала из утверждений токена. Возвращает None, если токену
+        нельзя доверять без загрузки пользователя: в нем нет нужных утверждений
+        или поколение RBAC изменилось после его выпуска (например, сменилась роль).
+        """
+        if "role_id" not in payload or "rbac_generation" not in payload:
+            return None
+        context = context or RequestContext()
+        if payload["rbac_generation"] != context.generation():
+            return None
+        return TokenUser(payload)
+
+    async def aauthenticate_claims(
+        self, payload: dict, context: RequestContext | None = None
+    ) -> TokenUser | None:
+        """
+        Асинхронный вариант authenticate_claims.
+        """
+        if "role_id" not in payload or "rbac_generation" not in payload:
+            return None
+        context = context or RequestContext()
+        if payload["rbac_generation"] != await context.ageneration():
+            return None
+        return TokenUser(payload)
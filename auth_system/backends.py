@@ -1,4 +1,6 @@
 from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
 from .models import User
 
 
@@ -15,8 +17,18 @@ class EmailBackend(ModelBackend):
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
+            # Хэширование, как и для существующего пользователя, чтобы время
+            # ответа не выдавало, зарегистрирован ли адрес.
+            hashing.make_password(password)
             return None
 
-        if user.check_password(password) and self.user_can_authenticate(user):
+        valid, new_encoded = hashing.check_password(password, user.password)
+        if not valid:
+            return None
+        if new_encoded:
+            # Хэш пересчитан с текущими параметрами хэшера.
+            user.password = new_encoded
+            user.save(update_fields=["password"])
+        if self.user_can_authenticate(user):
             return user
         return None
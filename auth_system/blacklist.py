@@ -0,0 +1,277 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import partitioning
+from .models import BlacklistedToken, RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevokedTokenSet:
+    """
+    Локальное для процесса множество неистекших отозванных JTI.
+
+    Отвечает "точно не отозван" без обращения к БД. Только при попадании
+    в множество наличие записи подтверждается запросом к таблице
+    черного списка. Записи, добавленные другими процессами, подгружаются
+    инкрементально не чаще раза в JWT_BLACKLIST_SYNC_SECONDS секунд.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, float] = {}
+        self._high_water = 0
+        self._safe_high_water = 0
+        self._synced_at: float | None = None
+        self._reloaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """
+        Добавляет JTI, отозванный в текущем процессе.
+        """
+        self._entries[jti] = expires_at.timestamp()
+
+    def discard(self, jti: str) -> None:
+        """
+        Удаляет JTI, отзыв которого снят в текущем процессе.
+        """
+        self._entries.pop(jti, None)
+
+    def might_contain(self, jti: str) -> bool:
+        """
+        Возвращает False, только если токен точно не отозван.
+        """
+        self.sync()
+        return jti in self._entries
+
+    def is_revoked(self, jti: str | None, exp: float | None = None) -> bool:
+        """
+        Проверяет, отозван ли токен; обращается к БД только при возможном попадании.
+        Если передан exp, запись отзывает лишь токены, истекающие не позже нее:
+        так служебная запись пользователя отзывает токены, выпущенные до нее.
+        generate_jwt пишет exp с долями секунды, поэтому токен, выпущенный
+        сразу после отзыва, отличается от выпущенного перед ним.
+        """
+        if not jti or not self.might_contain(jti):
+            return False
+        if exp is not None and exp > self._entries.get(jti, exp):
+            return False
+        return self._lookup(jti, exp).exists()
+
+    async def ais_revoked(
+        self, jti: str | None, exp: float | None = None
+    ) -> bool:
+        """
+        Асинхронный вариант is_revoked. Синхронизация с БД, когда она нужна,
+        выполняется в потоке; проверка попадания использует асинхронный ORM.
+        """
+        if not jti:
+            return False
+        if self.sync_due():
+            await sync_to_async(self.sync)()
+        if jti not in self._entries:
+            return False
+        if exp is not None and exp > self._entries.get(jti, exp):
+            return False
+        return await self._lookup(jti, exp).aexists()
+
+    def _lookup(self, jti: str, exp: float | None):
+        records = BlacklistedToken.objects.filter(
+            jti=jti, expires_at__gt=timezone.now()
+        )
+        if exp is not None:
+            records = records.filter(
+                expires_at__gte=datetime.fromtimestamp(exp, dt_timezone.utc)
+            )
+        return records
+
+    def sync_due(self) -> bool:
+        """
+        Проверяет, пора ли подгрузить записи, добавленные другими процессами.
+        """
+        if self._synced_at is None:
+            return True
+        interval = float(getattr(settings, "JWT_BLACKLIST_SYNC_SECONDS", 1.0))
+        return time.monotonic() - self._synced_at >= interval
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Подгружает записи, добавленные другими процессами, и удаляет истекшие.
+        """
+        if not force and not self.sync_due():
+            return
+        now = time.monotonic()
+        if not self._lock.acquire(blocking=force or self._synced_at is None):
+            return
+        try:
+            lifetime = int(settings.JWT_LIFETIME_SECONDS)
+            if self._reloaded_at is None or now - self._reloaded_at >= lifetime:
+                self._reload()
+                self._reloaded_at = now
+            else:
+                self._load_since(self._safe_high_water)
+            self._synced_at = now
+        finally:
+            self._lock.release()
+
+    def _reload(self) -> None:
+        """
+        Полностью перечитывает неистекшие записи черного списка.
+        """
+        self._load_since(0, entries={})
+
+    def _load_since(self, last_id: int, entries: dict | None = None) -> None:
+        """
+        Читает записи с id больше last_id. Окно предыдущей синхронизации
+        перечитывается повторно, чтобы не пропустить строки из транзакций,
+        зафиксированных не в порядке выдачи id.
+        """
+        current = timezone.now()
+        rows = (
+            BlacklistedToken.objects.filter(id__gt=last_id, expires_at__gt=current)
+            .order_by("id")
+            .values_list("id", "jti", "expires_at")
+        )
+        if entries is None:
+            entries = self._entries
+            high_water = self._high_water
+        else:
+            high_water = 0
+        for row_id, jti, expires_at in rows:
+            entries[jti] = expires_at.timestamp()
+            high_water = max(high_water, row_id)
+
+        cutoff = current.timestamp()
+        for jti in [jti for jti, exp in entries.items() if exp <= cutoff]:
+            entries.pop(jti, None)
+
+        self._entries = entries
+        self._safe_high_water = min(self._high_water, high_water)
+        self._high_water = high_water
+
+    def clear(self) -> None:
+        """
+        Сбрасывает состояние; следующая проверка заново загрузит черный список.
+        """
+        with self._lock:
+            self._entries = {}
+            self._high_water = 0
+            self._safe_high_water = 0
+            self._synced_at = None
+            self._reloaded_at = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+revoked_tokens = RevokedTokenSet()
+
+
+def prune_expired(
+    batch_size: int = 1000,
+    sleep: float = 0.0,
+    now: datetime | None = None,
+    model=BlacklistedToken,
+) -> tuple[int, float]:
+    """
+    Удаляет истекшие записи черного списка (или другой модели с полем
+    expires_at) пакетами по batch_size строк, продвигаясь по id, чтобы
+    не удерживать долгие блокировки.
+    Возвращает количество удаленных строк и затраченное время в секундах.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer.")
+    started = time.monotonic()
+    cutoff = now or timezone.now()
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(
+            model.objects.filter(id__gt=last_id, expires_at__lte=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        count, _ = model.objects.filter(id__in=ids).delete()
+        deleted += count
+        last_id = ids[-1]
+        if len(ids) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return deleted, time.monotonic() - started
+
+
+class BlacklistPruner(threading.Thread):
+    """
+    Фоновый поток, периодически удаляющий истекшие записи черного списка.
+    """
+
+    def __init__(self, interval: float, batch_size: int = 1000, sleep: float = 0.0):
+        super().__init__(name="blacklist-pruner", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.sleep = sleep
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                dropped = partitioning.drop_expired_if_enabled()
+                if dropped:
+                    logger.info("Dropped expired blacklist partitions: %s", dropped)
+                deleted, elapsed = prune_expired(self.batch_size, self.sleep)
+                logger.info(
+                    "Pruned %d expired blacklisted tokens in %.3fs", deleted, elapsed
+                )
+                deleted, elapsed = prune_expired(
+                    self.batch_size, self.sleep, model=RefreshToken
+                )
+                logger.info(
+                    "Pruned %d expired refresh tokens in %.3fs", deleted, elapsed
+                )
+            except Exception:
+                logger.exception("Blacklist pruning failed")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_pruner: BlacklistPruner | None = None
+
+
+def start_pruner() -> BlacklistPruner | None:
+    """
+    Запускает фоновую очистку, если задан JWT_BLACKLIST_PRUNE_INTERVAL.
+    Вызывается из точек входа WSGI/ASGI; повторный вызов в том же процессе
+    возвращает уже запущенный поток.
+    """
+    global _pruner
+    interval = float(getattr(settings, "JWT_BLACKLIST_PRUNE_INTERVAL", 0))
+    if interval <= 0:
+        return None
+    if _pruner is not None and _pruner.is_alive():
+        return _pruner
+    batch_size = int(getattr(settings, "JWT_BLACKLIST_PRUNE_BATCH_SIZE", 1000))
+    if batch_size <= 0:
+        raise ImproperlyConfigured(
+            "JWT_BLACKLIST_PRUNE_BATCH_SIZE must be a positive integer."
+        )
+    _pruner = BlacklistPruner(
+        interval,
+        batch_size=batch_size,
+        sleep=float(getattr(settings, "JWT_BLACKLIST_PRUNE_SLEEP", 0.0)),
+    )
+    _pruner.start()
+    return _pruner
@@ -0,0 +1,101 @@
+"""
+Условные запросы (ETag / If-None-Match).
+
+ETag вычисляется из дешевых признаков версии данных — поколения RBAC,
+содержимого уже загруженной строки — до выборки и сериализации, поэтому
+ответ 304 не выполняет запросов к данным и не строит тело ответа.
+"""
+
+import hashlib
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from .context import get_context
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Строгий ETag из частей, определяющих представление ресурса.
+    """
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    """
+    Проверяет If-None-Match (слабое сравнение, как требует RFC 9110).
+    "*" совпадением не считается: для GET он означает "ресурс существует",
+    а 304 отдается до выборки, когда существование еще не проверено.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+
+def not_modified(etag: str, **headers) -> Response:
+    return Response(
+        status=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, **headers},
+    )
+
+
+def conditional_response(request, data: dict) -> Response:
+    """
+    Ответ с ETag, вычисленным из уже загруженных данных, или 304 без тела.
+    """
+    etag = make_etag(request.accepted_media_type, *data.values())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(data, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+class GenerationETagMixin:
+    """
+    Условные GET-запросы к спискам и объектам RBAC. Любое изменение ролей,
+    бизнес-объектов и разрешений увеличивает поколение RBAC, поэтому ETag
+    строится из поколения и полного URL (курсор, ?fields=, ?page_size=).
+    При совпадении If-None-Match ответ 304 возвращается после проверки прав,
+    но до выборки из БД.
+
+    Для сравнения поколение читается из БД. Ответ 200 без If-None-Match
+    помечается уже известным поколением (см. RequestContext.known_generation),
+    чтобы не тратить на ETag запрос, например, для суперпользователя, которому
+    не нужна матрица. Такое поколение может только отставать, поэтому
+    устаревший ETag приведет к лишнему ответу 200, но не к ошибочному 304.
+    """
+
+    def get_etag(self, request, generation: int) -> str:
+        return make_etag(
+            generation, request.get_full_path(), request.accepted_media_type
+        )
+
+    def conditional(self, request, handler, *args, **kwargs) -> Response:
+        context = get_context(request)
+        etag = None
+        if request.headers.get("If-None-Match"):
+            etag = self.get_etag(request, context.generation())
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            if etag is None:
+                etag = self.get_etag(request, context.known_generation())
+            response["ETag"] = etag
+            response["Cache-Control"] = CACHE_CONTROL
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Права на роли, бизнес-объекты и разрешения не зависят от владельца
+        # строки, поэтому проверка прав на объект не требует его выборки.
+        # ETag объекта выдается только с ответом 200, а удаление меняет
+        # поколение, поэтому совпавший ETag означает, что объект существует.
+        self.check_object_permissions(request, {})
+        return self.conditional(request, super().retrieve, *args, **kwargs)
@@ -1,8 +1,13 @@
+from contextlib import contextmanager
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
-from . import utils
+from . import rbac, utils
+from .throttling import login_limiter
 
 User = get_user_model()
 
@@ -22,6 +27,47 @@ def django_db_setup(django_db_setup, django_db_blocker):
         call_command("seed_data")
 
 
+@pytest.fixture(autouse=True)
+def reset_permission_matrix():
+    """Сбросить матрицу разрешений, устаревшую после отката транзакции теста."""
+    rbac.invalidate_matrix()
+    yield
+    rbac.invalidate_matrix()
+
+
+@pytest.fixture(autouse=True)
+def reset_login_limiter():
+    """Сбросить ограничитель попыток входа, общий для всех тестов процесса."""
+    login_limiter.reset()
+    yield
+    login_limiter.reset()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверка бюджета SQL-запросов: with query_budget(3, "GET /roles/"): ...
+    Если блок выполнил больше запросов, тест падает со списком выполненного SQL.
+    """
+
+    @contextmanager
+    def check(max_queries: int, label: str = "block"):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = context.captured_queries
+        if len(executed) > max_queries:
+            sql = "\n".join(
+                f"  {index}. {query['sql']}"
+                for index, query in enumerate(executed, start=1)
+            )
+            pytest.fail(
+                f"{label}: {len(executed)} queries, budget {max_queries}:\n{sql}",
+                pytrace=False,
+            )
+
+    return check
+
+
 @pytest.fixture
 def admin_user(db):
     """Фикстура для пользователя-администратора, созданного начальными данными."""
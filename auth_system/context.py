@@ -0,0 +1,80 @@
+"""
+Контекст авторизации, живущий в пределах одного запроса.
+
+JWTAuthentication прикрепляет контекст к запросу (request.auth_context).
+Поколение RBAC, матрица разрешений и маски по бизнес-объектам
+вычисляются при первом обращении и далее берутся из контекста, поэтому
+повторные проверки в одном запросе — has_permission, has_object_permission
+по каждому объекту списка, фильтрация queryset — не выполняют запросов.
+"""
+
+from . import rbac
+
+
+class RequestContext:
+    __slots__ = ("user", "_generation", "_matrix", "_masks")
+
+    def __init__(self, user=None):
+        self.user = user
+        self._generation: int | None = None
+        self._matrix: rbac.PermissionMatrix | None = None
+        self._masks: dict[str, int | None] = {}
+
+    def generation(self) -> int:
+        if self._generation is None:
+            self._generation = rbac.current_generation()
+        return self._generation
+
+    async def ageneration(self) -> int:
+        if self._generation is None:
+            self._generation = await rbac.acurrent_generation()
+        return self._generation
+
+    def known_generation(self) -> int:
+        """
+        Поколение, уже прочитанное в запросе, иначе поколение матрицы процесса.
+        Не выполняет запроса, если одно из них известно, но может отставать
+        от поколения в БД.
+        """
+        if self._generation is not None:
+            return self._generation
+        generation = rbac.cached_generation()
+        return self.generation() if generation is None else generation
+
+    def matrix(self) -> rbac.PermissionMatrix:
+        if self._matrix is None:
+            self._matrix = rbac.get_matrix(self.generation())
+        return self._matrix
+
+    async def amatrix(self) -> rbac.PermissionMatrix:
+        if self._matrix is None:
+            self._matrix = await rbac.aget_matrix(await self.ageneration())
+        return self._matrix
+
+    def get_mask(self, code: str) -> int | None:
+        """
+        Возвращает маску роли пользователя для бизнес-объекта.
+        """
+        if code not in self._masks:
+            role_id = getattr(self.user, "role_id", None)
+            self._masks[code] = self.matrix().get_mask(role_id, code)
+        return self._masks[code]
+
+    async def aget_mask(self, code: str) -> int | None:
+        if code not in self._masks:
+            matrix = await self.amatrix()
+            role_id = getattr(self.user, "role_id", None)
+            self._masks[code] = matrix.get_mask(role_id, code)
+        return self._masks[code]
+
+
+def get_context(request) -> RequestContext:
+    """
+    Возвращает контекст запроса, создавая его для запросов, которые
+    не прошли через JWTAuthentication.
+    """
+    context = getattr(request, "auth_context", None)
+    if context is None:
+        context = RequestContext(getattr(request, "user", None))
+        request.auth_context = context
+    return context
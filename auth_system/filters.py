@@ -0,0 +1,65 @@
+from rest_framework.filters import BaseFilterBackend
+
+from . import rbac
+from .context import get_context
+from .pagination import KeysetPagination
+from .permissions import HasPermission
+
+
+class OwnershipFilterBackend(BaseFilterBackend):
+    """
+    Превращает права роли на бизнес-объект в фильтр queryset:
+    право *_all не ограничивает выборку, право *_own оставляет только
+    объекты пользователя (owner_id = user.id), иначе выборка пуста.
+    Проверка владения выполняется в SQL, а не построчно после выборки.
+
+    Представление должно задавать business_object_code и, при
+    необходимости, owner_field — имя поля владельца (по умолчанию owner_id).
+    """
+
+    ACTION_MAP = {
+        "list": "read_own",
+        "retrieve": "read_own",
+        "update": "update_own",
+        "partial_update": "update_own",
+        "destroy": "delete_own",
+    }
+
+    def get_action(self, view) -> str | None:
+        return self.ACTION_MAP.get(getattr(view, "action", None))
+
+    def filter_queryset(self, request, queryset, view):
+        action = self.get_action(view)
+        if action is None:
+            return queryset
+
+        user = request.user
+        if getattr(user, "is_superuser", False):
+            return queryset
+
+        perm_mask = get_context(request).get_mask(
+            getattr(view, "business_object_code", None)
+        )
+        if perm_mask is None:
+            return queryset.none()
+
+        all_action = HasPermission.ALL_ACTION_MAP[action]
+        if rbac.has_flag(perm_mask, all_action):
+            return queryset
+        if rbac.has_flag(perm_mask, action):
+            owner_field = getattr(view, "owner_field", "owner_id")
+            return queryset.filter(**{owner_field: user.id})
+        return queryset.none()
+
+
+class OwnedQuerysetMixin:
+    """
+    Примесь для ViewSet'ов над моделями-наследниками OwnedModel.
+    Список доступен при праве read_own и фильтруется по владельцу,
+    страницы выдаются курсорной пагинацией по индексу (owner, id).
+    """
+
+    ownership_aware = True
+    owner_field = "owner_id"
+    filter_backends = [OwnershipFilterBackend]
+    pagination_class = KeysetPagination
@@ -0,0 +1,110 @@
+"""
+Хэшеры паролей со стоимостью, задаваемой в настройках.
+
+Имена алгоритмов совпадают со стандартными хэшерами Django, поэтому уже
+сохраненные хэши продолжают проверяться. Если стоимость в настройках
+изменилась или выбран другой хэшер (PASSWORD_HASHER), хэш пароля
+пересчитывается с новыми параметрами при следующем успешном входе.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 с числом итераций PASSWORD_PBKDF2_ITERATIONS.
+    """
+
+    @property
+    def iterations(self) -> int:
+        return int(
+            getattr(
+                settings,
+                "PASSWORD_PBKDF2_ITERATIONS",
+                PBKDF2PasswordHasher.iterations,
+            )
+        )
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt с параметрами PASSWORD_SCRYPT_WORK_FACTOR (N),
+    PASSWORD_SCRYPT_BLOCK_SIZE (r) и PASSWORD_SCRYPT_PARALLELISM (p).
+    """
+
+    @property
+    def work_factor(self) -> int:
+        return int(
+            getattr(
+                settings,
+                "PASSWORD_SCRYPT_WORK_FACTOR",
+                ScryptPasswordHasher.work_factor,
+            )
+        )
+
+    @property
+    def block_size(self) -> int:
+        return int(
+            getattr(
+                settings, "PASSWORD_SCRYPT_BLOCK_SIZE", ScryptPasswordHasher.block_size
+            )
+        )
+
+    @property
+    def parallelism(self) -> int:
+        return int(
+            getattr(
+                settings,
+                "PASSWORD_SCRYPT_PARALLELISM",
+                ScryptPasswordHasher.parallelism,
+            )
+        )
+
+    @property
+    def maxmem(self) -> int:
+        # По умолчанию OpenSSL ограничивает scrypt 32 МиБ; при большем N
+        # лимит поднимается до необходимого объема с запасом, чтобы
+        # проверялись и хэши, созданные с прежними параметрами.
+        required = 256 * self.work_factor * self.block_size * self.parallelism
+        return max(required, 64 * 1024 * 1024)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id с параметрами PASSWORD_ARGON2_TIME_COST,
+    PASSWORD_ARGON2_MEMORY_COST (КиБ) и PASSWORD_ARGON2_PARALLELISM.
+    Требует пакет argon2-cffi.
+    """
+
+    @property
+    def time_cost(self) -> int:
+        return int(
+            getattr(
+                settings, "PASSWORD_ARGON2_TIME_COST", Argon2PasswordHasher.time_cost
+            )
+        )
+
+    @property
+    def memory_cost(self) -> int:
+        return int(
+            getattr(
+                settings,
+                "PASSWORD_ARGON2_MEMORY_COST",
+                Argon2PasswordHasher.memory_cost,
+            )
+        )
+
+    @property
+    def parallelism(self) -> int:
+        return int(
+            getattr(
+                settings,
+                "PASSWORD_ARGON2_PARALLELISM",
+                Argon2PasswordHasher.parallelism,
+            )
+        )
@@ -0,0 +1,137 @@
+"""
+Вынесение хэширования паролей в ограниченный пул процессов.
+
+Проверка и вычисление хэшей паролей нагружают процессор и блокируют
+рабочий процесс. Если задан PASSWORD_HASHING_WORKERS, хэширование для
+входа и регистрации выполняется в отдельном пуле процессов, а число
+ожидающих задач ограничено PASSWORD_HASHING_QUEUE_LIMIT: при переполнении
+запрос сразу получает 503 с Retry-After, не занимая рабочий процесс.
+При PASSWORD_HASHING_WORKERS = 0 хэширование выполняется в текущем потоке.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import exceptions, status
+
+from .instrumentation import stage
+
+
+class HashingUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Password hashing is overloaded, please retry later."
+    default_code = "hashing_unavailable"
+
+    def __init__(self, detail=None, code=None, wait: int = 1):
+        super().__init__(detail, code)
+        # Обработчик исключений DRF превращает wait в заголовок Retry-After.
+        self.wait = wait
+
+
+def _check_password(password: str, encoded: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль. Возвращает признак совпадения и новый хэш, если
+    хэш нужно пересчитать с текущими параметрами хэшера.
+    """
+    updated = []
+    valid = hashers.check_password(
+        password, encoded, setter=lambda raw: updated.append(hashers.make_password(raw))
+    )
+    return valid, (updated[0] if updated else None)
+
+
+def _init_worker() -> None:
+    django.setup()
+
+
+class HashingService:
+    """
+    Пул процессов для хэширования с ограничением числа задач в работе
+    и в очереди.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, timeout: float):
+        self.config = (workers, queue_limit, timeout)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # Процесс приложения многопоточный, поэтому рабочие процессы
+            # запускаются заново, а не через fork.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingUnavailable()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingUnavailable()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service: HashingService | None = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> HashingService | None:
+    """
+    Возвращает пул хэширования процесса или None, если он выключен.
+    Пул пересоздается при изменении его настроек.
+    """
+    global _service
+    workers = int(getattr(settings, "PASSWORD_HASHING_WORKERS", 0))
+    if workers <= 0:
+        return None
+    config = (
+        workers,
+        int(getattr(settings, "PASSWORD_HASHING_QUEUE_LIMIT", 16)),
+        float(getattr(settings, "PASSWORD_HASHING_TIMEOUT", 10.0)),
+    )
+
+    service = _service
+    if service is None or service.config != config:
+        with _service_lock:
+            if _service is None or _service.config != config:
+                if _service is not None:
+                    _service.shutdown()
+                _service = HashingService(*config)
+            service = _service
+    return service
+
+
+def check_password(password: str, encoded: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль в пуле хэширования (если он включен).
+    """
+    service = get_service()
+    with stage("password_hash"):
+        if service is None:
+            return _check_password(password, encoded)
+        return service.run(_check_password, password, encoded)
+
+
+def make_password(password: str) -> str:
+    """
+    Вычисляет хэш пароля в пуле хэширования (если он включен).
+    """
+    service = get_service()
+    with stage("password_hash"):
+        if service is None:
+            return hashers.make_password(password)
+        return service.run(hashers.make_password, password)
@@ -0,0 +1,299 @@
+"""
+Инструментирование запросов: число и время SQL-запросов и этапов
+аутентификации по каждому эндпоинту.
+
+InstrumentationMiddleware подключает к соединениям с БД execute_wrapper,
+считающий запросы и их время, и открывает для запроса объект RequestMetrics
+в contextvar. Горячий путь (декодирование JWT, проверка черного списка,
+разрешение прав) отмечает свои этапы через stage(name); вне
+инструментированного запроса stage() ничего не делает. Middleware
+поддерживает и синхронную, и асинхронную цепочку, поэтому Django не
+адаптирует ради него асинхронные представления.
+
+Накопленные значения отдаются в текстовом формате Prometheus
+(METRICS_ENABLED, эндпоинт /api/auth/metrics/) и, при SERVER_TIMING_HEADER,
+в заголовке Server-Timing каждого ответа.
+"""
+
+import threading
+from contextlib import ExitStack, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .throttling import login_limiter
+from .token_cache import decoded_tokens
+
+_current: ContextVar["RequestMetrics | None"] = ContextVar(
+    "auth_request_metrics", default=None
+)
+_null_stage = nullcontext()
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса. Экземпляр служит и execute_wrapper'ом для
+    соединений с БД.
+    """
+
+    __slots__ = ("queries", "query_time", "stages")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.stages: dict[str, float] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += perf_counter() - start
+
+    def add_stage(self, name: str, elapsed: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def server_timing(self, total: float) -> str:
+        """
+        Значение заголовка Server-Timing (длительности в миллисекундах).
+        """
+        parts = [
+            f'db;dur={self.query_time * 1000:.3f};desc="{self.queries} queries"'
+        ]
+        parts.extend(
+            f"{name};dur={elapsed * 1000:.3f}" for name, elapsed in self.stages.items()
+        )
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: RequestMetrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.metrics.add_stage(self.name, perf_counter() - self.start)
+
+
+def stage(name: str):
+    """
+    Контекстный менеджер, добавляющий время блока к этапу name текущего
+    запроса. Вне инструментированного запроса не делает ничего.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return _null_stage
+    return _Stage(metrics, name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Накопленные метрики процесса по эндпоинтам.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # (endpoint, method, status) -> [число запросов, суммарное время]
+            self._requests: dict[tuple, list] = {}
+            # endpoint -> [число SQL-запросов, суммарное время SQL]
+            self._queries: dict[str, list] = {}
+            # (endpoint, stage) -> [число запросов с этапом, суммарное время]
+            self._stages: dict[tuple, list] = {}
+
+    def observe(
+        self,
+        endpoint: str,
+        method: str,
+        status: int,
+        duration: float,
+        metrics: RequestMetrics,
+    ) -> None:
+        with self._lock:
+            entry = self._requests.setdefault((endpoint, method, str(status)), [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+            entry = self._queries.setdefault(endpoint, [0, 0.0])
+            entry[0] += metrics.queries
+            entry[1] += metrics.query_time
+            for name, elapsed in metrics.stages.items():
+                entry = self._stages.setdefault((endpoint, name), [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def render(self, extra: dict[str, dict] | None = None) -> str:
+        """
+        Возвращает метрики в текстовом формате Prometheus. extra — словарь
+        {префикс: {имя счетчика: значение}} для счетчиков других компонентов.
+        """
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape(str(val))}"' for key, val in labels.items()
+                )
+                label_text = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}{suffix}{label_text} {value}")
+
+        with self._lock:
+            requests = sorted(self._requests.items())
+            queries = sorted(self._queries.items())
+            stages = sorted(self._stages.items())
+
+        samples = []
+        for (endpoint, method, status), (count, total) in requests:
+            labels = {"endpoint": endpoint, "method": method, "status": status}
+            samples.append(("_count", labels, count))
+            samples.append(("_sum", labels, f"{total:.6f}"))
+        family(
+            "auth_request_duration_seconds",
+            "summary",
+            "Request latency by endpoint.",
+            samples,
+        )
+        family(
+            "auth_db_queries_total",
+            "counter",
+            "SQL queries executed by endpoint.",
+            [("", {"endpoint": endpoint}, count) for endpoint, (count, _) in queries],
+        )
+        family(
+            "auth_db_query_duration_seconds_total",
+            "counter",
+            "Time spent in SQL queries by endpoint.",
+            [
+                ("", {"endpoint": endpoint}, f"{total:.6f}")
+                for endpoint, (_, total) in queries
+            ],
+        )
+        samples = []
+        for (endpoint, name), (count, total) in stages:
+            labels = {"endpoint": endpoint, "stage": name}
+            samples.append(("_count", labels, count))
+            samples.append(("_sum", labels, f"{total:.6f}"))
+        family(
+            "auth_stage_duration_seconds",
+            "summary",
+            "Time spent in authentication stages by endpoint.",
+            samples,
+        )
+
+        for prefix, counters in (extra or {}).items():
+            for key, value in sorted(counters.items()):
+                name = f"{prefix}_{key}"
+                family(name, "gauge", f"{prefix} {key}.", [("", {}, value)])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def render_metrics() -> str:
+    """
+    Метрики процесса, включая счетчики ограничителя попыток входа и кэша
+    проверенных токенов.
+    """
+    return registry.render(
+        {
+            "auth_login_throttle": login_limiter.stats(),
+            "auth_token_cache": decoded_tokens.stats(),
+        }
+    )
+
+
+def is_enabled() -> bool:
+    return bool(
+        getattr(settings, "METRICS_ENABLED", False)
+        or getattr(settings, "SERVER_TIMING_HEADER", False)
+    )
+
+
+def _wrap_connections(metrics: RequestMetrics) -> ExitStack:
+    """
+    Подключает metrics к соединениям с БД текущего потока.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+    return stack
+
+
+class InstrumentationMiddleware:
+    """
+    Считает SQL-запросы, время запроса и этапов аутентификации по эндпоинтам.
+    Эндпоинтом считается имя маршрута (resolver_match.view_name).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not is_enabled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = perf_counter()
+        try:
+            with _wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, perf_counter() - start, metrics)
+
+    async def __acall__(self, request):
+        if not is_enabled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = perf_counter()
+        try:
+            # Асинхронный ORM выполняет запросы в потоке sync_to_async,
+            # поэтому execute_wrapper подключается к соединениям этого потока.
+            stack = await sync_to_async(_wrap_connections)(metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, perf_counter() - start, metrics)
+
+    def finish(self, request, response, duration: float, metrics: RequestMetrics):
+        match = getattr(request, "resolver_match", None)
+        endpoint = match.view_name if match else "unmatched"
+        registry.observe(
+            endpoint, request.method, response.status_code, duration, metrics
+        )
+        if getattr(settings, "SERVER_TIMING_HEADER", False):
+            response["Server-Timing"] = metrics.server_timing(duration)
+        return response
@@ -0,0 +1,183 @@
+"""
+Ключи для асимметричной подписи JWT (RS256, EdDSA и др.).
+
+Ключи хранятся в файле формата JWKS (JWT_JWKS_FILE). Каждый ключ
+разбирается один раз при загрузке файла, после чего для проверки подписи
+используется уже готовый объект ключа. Файл перечитывается только при
+изменении его mtime, что позволяет ротировать ключи без перезапуска:
+новый ключ добавляется в файл и назначается подписывающим через
+JWT_SIGNING_KEY_ID, а прежний остается в файле для проверки токенов,
+выпущенных до ротации, пока они не истекут.
+
+Если после успешной загрузки файл оказывается недописанным или
+некорректным (например, во время ротации), ошибка записывается в журнал,
+а проверка продолжает использовать прежний набор ключей.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# Параметры JWK, которые нельзя публиковать.
+PRIVATE_JWK_MEMBERS = {"d", "p", "q", "dp", "dq", "qi", "oth", "k"}
+
+# Как часто (в секундах) проверять mtime файла ключей.
+RELOAD_CHECK_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class ParsedKey:
+    kid: str
+    algorithm: str
+    verify_key: Any
+    signing_key: Any | None
+    public_jwk: dict
+
+
+def _default_algorithm(data: dict) -> str:
+    if data.get("kty") == "OKP":
+        return "EdDSA"
+    if data.get("kty") == "EC":
+        return "ES256"
+    return "RS256"
+
+
+def _parse_jwk(data: dict) -> ParsedKey:
+    algorithm = data.get("alg") or _default_algorithm(data)
+    try:
+        key = jwt.PyJWK(data, algorithm).key
+    except jwt.PyJWTError as exc:
+        raise ImproperlyConfigured(f"Invalid key in JWT_JWKS_FILE: {exc}") from exc
+
+    has_private = "d" in data
+    public_jwk = {
+        name: value for name, value in data.items() if name not in PRIVATE_JWK_MEMBERS
+    }
+    public_jwk["alg"] = algorithm
+    return ParsedKey(
+        kid=data["kid"],
+        algorithm=algorithm,
+        verify_key=key.public_key() if has_private else key,
+        signing_key=key if has_private else None,
+        public_jwk=public_jwk,
+    )
+
+
+class KeySet:
+    """
+    Кэш разобранных ключей из JWKS-файла, индексированный по kid.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: dict[str, ParsedKey] = {}
+        self._mtime: float | None = None
+        self._failed_mtime: float | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as exc:
+                if self._mtime is None:
+                    raise ImproperlyConfigured(
+                        f"Cannot read JWT_JWKS_FILE: {exc}"
+                    ) from exc
+                return
+            if mtime in (self._mtime, self._failed_mtime):
+                return
+            try:
+                keys = self._load()
+            except (OSError, ValueError, ImproperlyConfigured) as exc:
+                if self._mtime is None:
+                    raise ImproperlyConfigured(
+                        f"Cannot load JWT_JWKS_FILE: {exc}"
+                    ) from exc
+                # Файл перечитывается снова, как только изменится его mtime.
+                self._failed_mtime = mtime
+                logger.error(
+                    "Keeping previous JWKS, cannot reload %s: %s", self.path, exc
+                )
+                return
+            self._keys = keys
+            self._mtime = mtime
+            self._failed_mtime = None
+
+    def _load(self) -> dict[str, ParsedKey]:
+        with open(self.path, encoding="utf-8") as fh:
+            document = json.load(fh)
+        if not isinstance(document, dict) or not isinstance(
+            document.get("keys", []), list
+        ):
+            raise ImproperlyConfigured("JWT_JWKS_FILE must contain a JWKS object.")
+        keys = {}
+        for data in document.get("keys", []):
+            if not isinstance(data, dict):
+                raise ImproperlyConfigured("JWT_JWKS_FILE contains an invalid key.")
+            if data.get("kty") == "oct" or "kid" not in data:
+                continue
+            parsed = _parse_jwk(data)
+            keys[parsed.kid] = parsed
+        return keys
+
+    def get(self, kid: str | None) -> ParsedKey | None:
+        """
+        Возвращает разобранный ключ по kid или None, если ключ неизвестен.
+        """
+        if not kid:
+            return None
+        self._refresh()
+        return self._keys.get(kid)
+
+    def signing_key(self, kid: str) -> ParsedKey:
+        """
+        Возвращает подписывающий ключ; он должен содержать приватную часть.
+        """
+        parsed = self.get(kid)
+        if parsed is None or parsed.signing_key is None:
+            raise ImproperlyConfigured(
+                f"JWT_SIGNING_KEY_ID {kid!r} is not a private key in JWT_JWKS_FILE."
+            )
+        return parsed
+
+    def public_jwks(self) -> dict:
+        """
+        Возвращает публичную часть набора ключей для проверки токенов
+        сторонними сервисами.
+        """
+        self._refresh()
+        return {"keys": [parsed.public_jwk for parsed in self._keys.values()]}
+
+
+_keysets: dict[str, KeySet] = {}
+
+
+def get_keyset() -> KeySet:
+    """
+    Возвращает набор ключей процесса для файла из настройки JWT_JWKS_FILE.
+    """
+    path = getattr(settings, "JWT_JWKS_FILE", None)
+    if not path:
+        raise ImproperlyConfigured(
+            "JWT_JWKS_FILE must be set to use asymmetric JWT algorithms."
+        )
+    keyset = _keysets.get(path)
+    if keyset is None:
+        keyset = _keysets.setdefault(path, KeySet(path))
+    return keyset
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_system import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage PostgreSQL range partitions of the JWT blacklist table: convert "
+        "the table, create partitions ahead of time or drop expired ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["convert", "create", "drop-expired"])
+        parser.add_argument(
+            "--interval",
+            choices=sorted(partitioning.INTERVALS),
+            help="Partition size; defaults to JWT_BLACKLIST_PARTITION_INTERVAL.",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=48,
+            help="Number of future partitions to create.",
+        )
+        parser.add_argument(
+            "--detach-only",
+            action="store_true",
+            help="Detach expired partitions instead of dropping them.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            interval = partitioning.get_interval(options["interval"])
+            action = options["action"]
+            if action == "convert":
+                self.convert(interval, options["ahead"])
+            elif action == "create":
+                self.create(interval, options["ahead"])
+            else:
+                self.drop_expired(interval, options["detach_only"])
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+
+    def convert(self, interval, ahead):
+        if partitioning.is_partitioned():
+            raise CommandError("The blacklist table is already partitioned.")
+        self.check_ahead(interval, ahead)
+        moved = partitioning.convert_to_partitioned(interval, ahead=ahead)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Converted the blacklist table, moved {moved} active rows."
+            )
+        )
+
+    def create(self, interval, ahead):
+        self.check_partitioned()
+        self.check_ahead(interval, ahead)
+        created = partitioning.create_partitions(interval, ahead=ahead)
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions."))
+
+    def drop_expired(self, interval, detach_only):
+        self.check_partitioned()
+        removed = partitioning.drop_expired_partitions(
+            interval, detach_only=detach_only
+        )
+        verb = "Detached" if detach_only else "Dropped"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(removed)} expired partitions.")
+        )
+
+    def check_partitioned(self):
+        if not partitioning.is_partitioned():
+            raise CommandError(
+                "The blacklist table is not partitioned; run the 'convert' action."
+            )
+
+    def check_ahead(self, interval, ahead):
+        step, _ = partitioning.INTERVALS[interval]
+        lifetime = timedelta(seconds=int(settings.JWT_LIFETIME_SECONDS))
+        if step * ahead < lifetime:
+            self.stderr.write(
+                self.style.WARNING(
+                    "Partitions created ahead do not cover JWT_LIFETIME_SECONDS; "
+                    "new rows will land in the default partition."
+                )
+            )
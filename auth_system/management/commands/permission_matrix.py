@@ -0,0 +1,90 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import exceptions
+
+from auth_system import permission_matrix
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the permission matrix or import a full matrix from JSON/CSV, "
+        "applying only the differences in a single transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["export", "import"])
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default="-",
+            help="File to read or write; '-' for stdin/stdout.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["json", "csv"],
+            help="Matrix format; inferred from the file extension by default.",
+        )
+        parser.add_argument(
+            "--partial",
+            action="store_true",
+            help="Do not delete permissions missing from the imported matrix.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the changes an import would make.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "json")
+        if options["action"] == "export":
+            self.export(path, fmt)
+        else:
+            self.import_(path, fmt, options["partial"], options["dry_run"])
+
+    def export(self, path, fmt):
+        rows = permission_matrix.export_matrix()
+        if fmt == "csv":
+            content = permission_matrix.to_csv(rows)
+        else:
+            content = json.dumps(rows, indent=2) + "\n"
+        if path == "-":
+            self.stdout.write(content, ending="")
+        else:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(content)
+            self.stderr.write(f"Exported {len(rows)} permissions to {path}.")
+
+    def import_(self, path, fmt, partial, dry_run):
+        if path == "-":
+            content = sys.stdin.read()
+        else:
+            with open(path, encoding="utf-8") as fh:
+                content = fh.read()
+
+        try:
+            if fmt == "csv":
+                rows = permission_matrix.from_csv(content)
+            else:
+                rows = json.loads(content)
+                if isinstance(rows, dict):
+                    rows = rows.get("permissions")
+            summary = permission_matrix.import_matrix(
+                rows, delete_missing=not partial, dry_run=dry_run
+            )
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Invalid JSON: {exc}")
+        except exceptions.ValidationError as exc:
+            raise CommandError(str(exc.detail))
+
+        prefix = "Would apply" if dry_run else "Applied"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}: {summary['created']} created, {summary['updated']} "
+                f"updated, {summary['deleted']} deleted, "
+                f"{summary['unchanged']} unchanged."
+            )
+        )
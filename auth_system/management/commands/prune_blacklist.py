@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_system import partitioning
+from auth_system.blacklist import prune_expired
+from auth_system.models import RefreshToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired blacklisted and refresh tokens in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "JWT_BLACKLIST_PRUNE_BATCH_SIZE", 1000),
+            help="Number of rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=getattr(settings, "JWT_BLACKLIST_PRUNE_SLEEP", 0.0),
+            help="Seconds to pause between batches.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be a positive integer.")
+        dropped = partitioning.drop_expired_if_enabled()
+        if dropped:
+            self.stdout.write(f"Dropped {len(dropped)} expired partitions.")
+
+        deleted, elapsed = prune_expired(
+            batch_size=options["batch_size"], sleep=options["sleep"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired blacklisted tokens in {elapsed:.3f}s."
+            )
+        )
+
+        deleted, elapsed = prune_expired(
+            batch_size=options["batch_size"],
+            sleep=options["sleep"],
+            model=RefreshToken,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired refresh tokens in {elapsed:.3f}s."
+            )
+        )
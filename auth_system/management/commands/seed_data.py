@@ -1,137 +1,265 @@
+from itertools import islice
 from typing import cast, Type
-from django.core.management.base import BaseCommand
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
+from auth_system import permission_matrix, rbac
 from auth_system.models import User as CustomUser
-from auth_system.models import Role, BusinessObject, Permission
+from auth_system.models import Role, BusinessObject
 
 User: Type[CustomUser] = cast(Type[CustomUser], get_user_model())
 
+ALL_FLAGS = {name: True for name in permission_matrix.FLAG_FIELDS}
+
+BASE_ROLES = ["Admin", "Manager", "User"]
+
+BASE_OBJECTS = {
+    "users": "Users",
+    "products": "Products",
+    "orders": "Orders",
+    "introspection": "Token introspection",
+}
+
+MANAGER_FLAGS = {
+    "can_create": True,
+    "can_read_own": True,
+    "can_read_all": True,
+    "can_update_own": True,
+}
+
+BASE_PERMISSIONS = [
+    *(("Admin", code, ALL_FLAGS) for code in BASE_OBJECTS),
+    ("Manager", "products", MANAGER_FLAGS),
+    ("Manager", "orders", MANAGER_FLAGS),
+    ("Manager", "users", {"can_read_all": True}),
+    (
+        "User",
+        "users",
+        {"can_read_own": True, "can_update_own": True, "can_delete_own": True},
+    ),
+    ("User", "products", {}),
+    ("User", "orders", {}),
+]
+
+TEST_PASSWORD = "Test123!"
+
+TEST_USERS = [
+    {
+        "first_name": "Admin",
+        "last_name": "User",
+        "email": "admin@example.com",
+        "role": "Admin",
+        "is_staff": True,
+        "is_superuser": True,
+    },
+    {
+        "first_name": "Manager",
+        "last_name": "User",
+        "email": "manager@example.com",
+        "role": "Manager",
+    },
+    {
+        "first_name": "Regular",
+        "last_name": "User",
+        "email": "user@example.com",
+        "role": "User",
+    },
+]
+
+SYNTHETIC_DOMAIN = "@synthetic.example.com"
+
+
+def synthetic_flags(role_index: int, object_index: int) -> dict:
+    """
+    Детерминированный набор флагов для синтетической пары роль/объект.
+    """
+    mask = (role_index * 31 + object_index * 17) % (1 << len(rbac.PERMISSION_FLAGS))
+    return {
+        f"can_{flag}": bool(mask & bit) for flag, bit in rbac.FLAG_BITS.items()
+    }
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 
 class Command(BaseCommand):
-    help = "Seed initial roles, business objects, permissions, and test users."
+    help = (
+        "Seed initial roles, business objects, permissions, and test users. "
+        "Idempotent; optionally generates large synthetic populations."
+    )
 
-    TEST_EMAILS = {"admin@example.com", "manager@example.com", "user@example.com"}
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=0, help="Number of synthetic users."
+        )
+        parser.add_argument(
+            "--roles", type=int, default=0, help="Number of synthetic roles."
+        )
+        parser.add_argument(
+            "--objects",
+            type=int,
+            default=0,
+            help="Number of synthetic business objects.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows per bulk INSERT.",
+        )
+        parser.add_argument(
+            "--password",
+            default=TEST_PASSWORD,
+            help="Password of synthetic users (hashed once).",
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write("Clearing old data …")
-
-        Permission.objects.all().delete()
-        Role.objects.all().delete()
-        BusinessObject.objects.all().delete()
-        User.objects.filter(email__in=self.TEST_EMAILS).delete()
-
-        roles = {
-            "Admin": Role.objects.create(name="Admin"),
-            "Manager": Role.objects.create(name="Manager"),
-            "User": Role.objects.create(name="User"),
-        }
-
-        bos = {
-            "users": BusinessObject.objects.create(code="users", name="Users"),
-            "products": BusinessObject.objects.create(code="products", name="Products"),
-            "orders": BusinessObject.objects.create(code="orders", name="Orders"),
-        }
-
-        def add_perm(role_key, bo_key, **flags):
-            Permission.objects.create(
-                role=roles[role_key], business_object=bos[bo_key], **flags
-            )
+        batch_size = options["batch_size"]
+        role_names = BASE_ROLES + [
+            f"Synthetic Role {index}" for index in range(1, options["roles"] + 1)
+        ]
+        objects = dict(BASE_OBJECTS)
+        objects.update(
+            (f"object_{index}", f"Synthetic Object {index}")
+            for index in range(1, options["objects"] + 1)
+        )
 
-        for bo_key in bos:
-            add_perm(
-                "Admin",
-                bo_key,
-                can_create=True,
-                can_read_own=True,
-                can_read_all=True,
-                can_update_own=True,
-                can_update_all=True,
-                can_delete_own=True,
-                can_delete_all=True,
+        with transaction.atomic(), rbac.deferred_bump():
+            roles = self.seed_roles(role_names)
+            self.seed_objects(objects)
+            summary = permission_matrix.import_matrix(
+                self.build_matrix(role_names, objects)
             )
+            self.seed_test_users(roles)
+            # Массовые операции не отправляют сигналы, поэтому поколение
+            # увеличивается явно — один раз за весь запуск и в той же
+            # транзакции, что и изменения RBAC.
+            rbac.bump_generation()
+        self.stdout.write(
+            "Permissions: {created} created, {updated} updated, "
+            "{deleted} deleted.".format(**summary)
+        )
 
-        for bo_key in ("products", "orders"):
-            add_perm(
-                "Manager",
-                bo_key,
-                can_create=True,
-                can_read_own=True,
-                can_read_all=True,
-                can_update_own=True,
-                can_update_all=False,
-                can_delete_own=False,
-                can_delete_all=False,
+        if options["users"]:
+            synthetic_roles = [
+                roles[name] for name in role_names[len(BASE_ROLES):]
+            ] or [roles["User"]]
+            created = self.seed_synthetic_users(
+                options["users"], synthetic_roles, options["password"], batch_size
             )
+            self.stdout.write(f"Synthetic users: {created} created.")
+
+        self.stdout.write(self.style.SUCCESS("Seed completed successfully."))
 
-        add_perm(
-            "Manager",
-            "users",
-            can_create=False,
-            can_read_own=False,
-            can_read_all=True,
-            can_update_own=False,
-            can_update_all=False,
-            can_delete_own=False,
-            can_delete_all=False,
+    def seed_roles(self, names: list[str]) -> dict[str, int]:
+        existing = dict(Role.objects.filter(name__in=names).values_list("name", "id"))
+        Role.objects.bulk_create(
+            [Role(name=name) for name in names if name not in existing]
         )
+        return dict(Role.objects.filter(name__in=names).values_list("name", "id"))
 
-        add_perm(
-            "User",
-            "users",
-            can_create=False,
-            can_read_own=True,
-            can_read_all=False,
-            can_update_own=True,
-            can_update_all=False,
-            can_delete_own=True,
-            can_delete_all=False,
+    def seed_objects(self, objects: dict[str, str]) -> None:
+        existing = set(
+            BusinessObject.objects.filter(code__in=objects).values_list(
+                "code", flat=True
+            )
         )
-        for bo_key in ("products", "orders"):
-            add_perm("User", bo_key)
-
-        users_to_seed = [
-            {
-                "first_name": "Admin",
-                "last_name": "User",
-                "email": "admin@example.com",
-                "password": "Test123!",
-                "role": roles["Admin"],
-                "is_staff": True,
-                "is_superuser": True,
-            },
-            {
-                "first_name": "Manager",
-                "last_name": "User",
-                "email": "manager@example.com",
-                "password": "Test123!",
-                "role": roles["Manager"],
-            },
-            {
-                "first_name": "Regular",
-                "last_name": "User",
-                "email": "user@example.com",
-                "password": "Test123!",
-                "role": roles["User"],
-            },
+        BusinessObject.objects.bulk_create(
+            [
+                BusinessObject(code=code, name=name)
+                for code, name in objects.items()
+                if code not in existing
+            ]
+        )
+
+    def build_matrix(self, role_names: list[str], objects: dict) -> list[dict]:
+        rows = [
+            {"role": role, "business_object": code, **flags}
+            for role, code, flags in BASE_PERMISSIONS
         ]
+        synthetic_roles = role_names[len(BASE_ROLES):]
+        for role_index, role in enumerate(synthetic_roles, start=1):
+            for object_index, code in enumerate(objects, start=1):
+                rows.append(
+                    {
+                        "role": role,
+                        "business_object": code,
+                        **synthetic_flags(role_index, object_index),
+                    }
+                )
+        return rows
 
-        for data in users_to_seed:
-            raw_pwd = data.pop("password")
-            email = data["email"]
+    def seed_test_users(self, roles: dict[str, int]) -> None:
+        password = make_password(TEST_PASSWORD)
+        wanted = {}
+        for data in TEST_USERS:
+            data = dict(data)
+            data["role_id"] = roles[data.pop("role")]
+            data.setdefault("is_staff", False)
+            data.setdefault("is_superuser", False)
+            wanted[data["email"]] = data
 
-            user, created = User.objects.update_or_create(
-                email=email,
-                defaults=data,
+        existing = {user.email: user for user in User.objects.filter(email__in=wanted)}
+        to_create = []
+        for email, data in wanted.items():
+            user = existing.get(email)
+            if user is None:
+                to_create.append(User(password=password, **data))
+                continue
+            for name, value in data.items():
+                setattr(user, name, value)
+            user.password = password
+            user.is_active = True
+        User.objects.bulk_create(to_create)
+        if existing:
+            User.objects.bulk_update(
+                existing.values(),
+                [
+                    "first_name",
+                    "last_name",
+                    "role_id",
+                    "is_staff",
+                    "is_superuser",
+                    "is_active",
+                    "password",
+                ],
             )
-            if created:
-                user.set_password(raw_pwd)
-                user.save()
-            else:
-                if not user.check_password(raw_pwd):
-                    user.set_password(raw_pwd)
-                if user.role != data["role"]:
-                    user.role = data["role"]
-                user.save()
 
-        self.stdout.write(self.style.SUCCESS("Seed completed successfully."))
+    def seed_synthetic_users(
+        self, count: int, role_ids: list[int], raw_password: str, batch_size: int
+    ) -> int:
+        """
+        Создает синтетических пользователей пакетами. Пароль хэшируется один
+        раз; уже существующие пользователи пропускаются.
+        """
+        password = make_password(raw_password)
+        joined = timezone.now()
+        existing = set(
+            User.objects.filter(email__endswith=SYNTHETIC_DOMAIN)
+            .values_list("email", flat=True)
+            .iterator(chunk_size=batch_size)
+        )
+        users = (
+            User(
+                email=email,
+                first_name="Synthetic",
+                last_name=str(index),
+                password=password,
+                role_id=role_ids[index % len(role_ids)],
+                date_joined=joined,
+            )
+            for index in range(1, count + 1)
+            if (email := f"user{index}{SYNTHETIC_DOMAIN}") not in existing
+        )
+        created = 0
+        for batch in batched(users, batch_size):
+            User.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+        return created
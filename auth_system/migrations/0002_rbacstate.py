@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+def create_state_row(apps, schema_editor):
+    RBACState = apps.get_model("auth_system", "RBACState")
+    RBACState.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_system", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RBACState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "generation",
+                    models.BigIntegerField(default=0, verbose_name="Generation"),
+                ),
+            ],
+            options={
+                "verbose_name": "RBAC State",
+                "verbose_name_plural": "RBAC State",
+            },
+        ),
+        migrations.RunPython(create_state_row, migrations.RunPython.noop),
+    ]
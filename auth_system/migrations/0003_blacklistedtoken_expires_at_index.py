@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_system", "0002_rbacstate"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="blacklistedtoken",
+            name="expires_at",
+            field=models.DateTimeField(db_index=True, verbose_name="Expires At"),
+        ),
+    ]
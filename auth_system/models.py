@@ -8,6 +8,8 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from . import hashing
+
 
 class CustomUserManager(BaseUserManager):
     """
@@ -116,6 +118,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    # Поля, от которых зависят права пользователя и доверие к утверждениям
+    # его токенов (см. signals.invalidate_claims_on_access_change).
+    ACCESS_FIELDS = ("role_id", "is_superuser", "is_staff", "is_active")
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
@@ -126,6 +132,30 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженные поля доступа, чтобы сигнал мог заметить их смену.
+        instance._loaded_access = instance.access_state()
+        return instance
+
+    def access_state(self) -> dict:
+        """
+        Возвращает загруженные (не отложенные) значения полей доступа.
+        """
+        return {
+            name: self.__dict__[name]
+            for name in self.ACCESS_FIELDS
+            if name in self.__dict__
+        }
+
+    def set_password(self, raw_password):
+        """
+        Хэширует пароль через пул хэширования (если он включен).
+        """
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
     def get_full_name(self):
         """
         Возвращает имя плюс фамилию, с пробелом между ними.
@@ -165,6 +195,10 @@ class Permission(models.Model):
 class BlacklistedToken(models.Model):
     """
     Хранит отозванные JWT для обработки выхода из системы.
+    После секционирования (см. partitioning.py) уникальность в БД
+    обеспечивается только для пары (jti, expires_at), поэтому записи
+    не выбираются через get по jti. Секционирование меняет схему вне
+    миграций: изменения этой модели на преобразованной базе требуют RunSQL.
     """
 
     jti = models.CharField(_("JWT ID"), max_length=255, unique=True)
@@ -174,7 +208,7 @@ class BlacklistedToken(models.Model):
         related_name="blacklisted_tokens",
         verbose_name=_("User"),
     )
-    expires_at = models.DateTimeField(_("Expires At"))
+    expires_at = models.DateTimeField(_("Expires At"), db_index=True)
 
     class Meta:
         verbose_name = _("Blacklisted Token")
@@ -182,3 +216,67 @@ class BlacklistedToken(models.Model):
 
     def __str__(self):
         return f"Blacklisted token for {self.user}"
+
+
+class RefreshToken(models.Model):
+    """
+    Токен обновления. Хранится только SHA-256 хэш токена; все токены,
+    полученные последовательной ротацией, объединены общим семейством.
+    """
+
+    token_hash = models.CharField(_("Token Hash"), max_length=64, unique=True)
+    family = models.UUIDField(_("Family"), db_index=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="refresh_tokens",
+        verbose_name=_("User"),
+    )
+    expires_at = models.DateTimeField(_("Expires At"), db_index=True)
+    used_at = models.DateTimeField(_("Used At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Refresh Token")
+        verbose_name_plural = _("Refresh Tokens")
+
+    def __str__(self):
+        return f"Refresh token for {self.user}"
+
+
+class RBACState(models.Model):
+    """
+    Единственная строка с глобальным номером поколения данных RBAC.
+    Номер увеличивается при каждом изменении ролей, бизнес-объектов и разрешений.
+    """
+
+    generation = models.BigIntegerField(_("Generation"), default=0)
+
+    class Meta:
+        verbose_name = _("RBAC State")
+        verbose_name_plural = _("RBAC State")
+
+    def __str__(self):
+        return f"RBAC generation {self.generation}"
+
+
+class OwnedModel(models.Model):
+    """
+    Абстрактная модель бизнес-объекта, принадлежащего пользователю.
+    Составной индекс (owner, id) обслуживает фильтр owner_id = ... вместе
+    с сортировкой по id, которую использует курсорная пагинация. Имя индекса
+    Django формирует для каждого наследника сам (с хэшем, не длиннее 30
+    символов), поэтому длина имени класса наследника не ограничена.
+    """
+
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Owner"),
+    )
+
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(fields=["owner", "id"]),
+        ]
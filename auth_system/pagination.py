@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по id: следующая страница выбирается
+    условием id > последнего значения вместо OFFSET, поэтому стоимость
+    запроса не растет с номером страницы.
+    """
+
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
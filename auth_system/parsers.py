@@ -0,0 +1,14 @@
+from rest_framework.parsers import BaseParser
+
+
+class CSVTextParser(BaseParser):
+    """
+    Принимает тело запроса text/csv и возвращает его как строку.
+    """
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        return stream.read().decode(encoding)
@@ -0,0 +1,294 @@
+"""
+Секционирование таблицы черного списка JWT по expires_at (только PostgreSQL).
+
+После преобразования таблица BlacklistedToken становится секционированной
+по диапазонам expires_at (по часам или по дням). Истекшие секции удаляются
+целиком через DROP/DETACH PARTITION вместо построчного DELETE. API ORM
+модели не меняется, однако первичный ключ и уникальность jti становятся
+составными (с expires_at), как того требует PostgreSQL: unique=True модели
+на уровне БД больше не действует, и строк с одним jti может быть несколько.
+Поэтому приложение не читает записи через get по jti: отзыв токена
+вставляется с ON CONFLICT DO NOTHING, отзыв всех токенов пользователя
+удаляет прежние строки и вставляет новую, а проверки и снятие отзыва
+работают по всем строкам с данным jti.
+
+Схема меняется SQL-командами вне миграций Django. Миграции, изменяющие
+BlacklistedToken (AlterField, AddIndex и т. п.), на преобразованной базе
+не применятся: их нужно писать через RunSQL с учетом секционирования.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from .models import BlacklistedToken, User
+
+INTERVALS = {
+    "hourly": (timedelta(hours=1), "%Y%m%d%H"),
+    "daily": (timedelta(days=1), "%Y%m%d"),
+}
+
+
+def get_interval(interval: str | None = None) -> str:
+    """
+    Возвращает интервал секционирования из аргумента или настройки
+    JWT_BLACKLIST_PARTITION_INTERVAL.
+    """
+    interval = interval or getattr(settings, "JWT_BLACKLIST_PARTITION_INTERVAL", None)
+    if interval not in INTERVALS:
+        raise ImproperlyConfigured(
+            "JWT_BLACKLIST_PARTITION_INTERVAL must be one of: "
+            + ", ".join(INTERVALS)
+        )
+    return interval
+
+
+def _table() -> str:
+    return BlacklistedToken._meta.db_table
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _default() -> str:
+    return f"{_table()}_default"
+
+
+def _check_vendor() -> None:
+    if connection.vendor != "postgresql":
+        raise ImproperlyConfigured(
+            "Blacklist partitioning is only supported on PostgreSQL."
+        )
+
+
+def floor_to_interval(moment: datetime, interval: str) -> datetime:
+    """
+    Округляет момент времени вниз до начала секции.
+    """
+    moment = moment.astimezone(timezone.utc)
+    if interval == "hourly":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    """
+    Возвращает имя секции, начинающейся в момент start.
+    """
+    _, fmt = INTERVALS[interval]
+    return f"{_table()}_p{start.strftime(fmt)}"
+
+
+def partition_bounds(name: str, interval: str) -> tuple[datetime, datetime] | None:
+    """
+    Восстанавливает границы секции по ее имени. Возвращает None для
+    секций, созданных не этим модулем (например, секции по умолчанию).
+    """
+    step, fmt = INTERVALS[interval]
+    prefix = f"{_table()}_p"
+    if not name.startswith(prefix):
+        return None
+    try:
+        start = datetime.strptime(name[len(prefix):], fmt)
+    except ValueError:
+        return None
+    start = start.replace(tzinfo=timezone.utc)
+    return start, start + step
+
+
+def is_partitioned() -> bool:
+    """
+    Проверяет, преобразована ли таблица черного списка в секционированную.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions() -> list[str]:
+    """
+    Возвращает имена всех секций таблицы черного списка.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid) "
+            "ORDER BY c.relname",
+            [_table()],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_partitions(
+    interval: str | None = None, ahead: int = 48, now: datetime | None = None
+) -> list[str]:
+    """
+    Заранее создает секции от текущей до now + ahead интервалов.
+    Если записи диапазона новой секции уже попали в секцию по умолчанию
+    (ahead не покрыл срок жизни токена), они переносятся в новую секцию.
+    Возвращает имена созданных секций.
+    """
+    _check_vendor()
+    interval = get_interval(interval)
+    step, _ = INTERVALS[interval]
+    start = floor_to_interval(now or datetime.now(timezone.utc), interval)
+    existing = set(list_partitions())
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(ahead + 1):
+            lower = start + step * offset
+            name = partition_name(lower, interval)
+            if name in existing:
+                continue
+            upper = lower + step
+            if _default() in existing and _default_has_rows(cursor, lower, upper):
+                _create_from_default(cursor, name, lower, upper)
+            else:
+                _create_partition(cursor, name, lower, upper)
+            created.append(name)
+    return created
+
+
+def _create_partition(cursor, name: str, lower: datetime, upper: datetime) -> None:
+    cursor.execute(
+        f"CREATE TABLE {_quote(name)} PARTITION OF {_quote(_table())} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        [lower, upper],
+    )
+
+
+def _default_has_rows(cursor, lower: datetime, upper: datetime) -> bool:
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {_quote(_default())} "
+        "WHERE expires_at >= %s AND expires_at < %s)",
+        [lower, upper],
+    )
+    return cursor.fetchone()[0]
+
+
+def _create_from_default(cursor, name: str, lower: datetime, upper: datetime) -> None:
+    """
+    Создает секцию, диапазон которой уже занят строками секции по умолчанию:
+    PostgreSQL не позволяет создать такую секцию напрямую. Секция по
+    умолчанию отсоединяется, строки диапазона переносятся в новую секцию,
+    после чего секция по умолчанию присоединяется обратно.
+    """
+    table, default = _quote(_table()), _quote(_default())
+    bounds = "expires_at >= %s AND expires_at < %s"
+    cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+    _create_partition(cursor, name, lower, upper)
+    cursor.execute(
+        f"INSERT INTO {table} (id, jti, expires_at, user_id) "
+        f"SELECT id, jti, expires_at, user_id FROM {default} WHERE {bounds}",
+        [lower, upper],
+    )
+    cursor.execute(f"DELETE FROM {default} WHERE {bounds}", [lower, upper])
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+
+
+def drop_expired_partitions(
+    interval: str | None = None,
+    now: datetime | None = None,
+    detach_only: bool = False,
+) -> list[str]:
+    """
+    Удаляет (или только отсоединяет) секции, все записи которых уже истекли.
+    Возвращает имена обработанных секций.
+    """
+    _check_vendor()
+    interval = get_interval(interval)
+    now = now or datetime.now(timezone.utc)
+    expired = []
+    for name in list_partitions():
+        bounds = partition_bounds(name, interval)
+        if bounds and bounds[1] <= now:
+            expired.append(name)
+
+    with connection.cursor() as cursor:
+        for name in expired:
+            if detach_only:
+                cursor.execute(
+                    f"ALTER TABLE {_quote(_table())} DETACH PARTITION {_quote(name)}"
+                )
+            else:
+                cursor.execute(f"DROP TABLE {_quote(name)}")
+    return expired
+
+
+def drop_expired_if_enabled() -> list[str]:
+    """
+    Удаляет истекшие секции, если секционирование включено настройкой
+    и таблица уже преобразована; иначе ничего не делает.
+    """
+    if not getattr(settings, "JWT_BLACKLIST_PARTITION_INTERVAL", None):
+        return []
+    if not is_partitioned():
+        return []
+    return drop_expired_partitions()
+
+
+def convert_to_partitioned(interval: str | None = None, ahead: int = 48) -> int:
+    """
+    Преобразует обычную таблицу черного списка в секционированную по expires_at.
+    Неистекшие записи переносятся, истекшие отбрасываются.
+    Возвращает количество перенесенных записей.
+    """
+    _check_vendor()
+    interval = get_interval(interval)
+    table = _table()
+    legacy = f"{table}_legacy"
+    sequence = f"{table}_part_id_seq"
+    default = _default()
+    user_table = User._meta.db_table
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Отложенные проверки внешних ключей не дают удалить старую таблицу.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}")
+        cursor.execute(f"CREATE SEQUENCE {_quote(sequence)}")
+        cursor.execute(
+            f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {_quote(legacy)}), 0)"
+            " + 1, false)",
+            [sequence],
+        )
+        cursor.execute(
+            f"CREATE TABLE {_quote(table)} ("
+            f"id bigint NOT NULL DEFAULT nextval('{sequence}'), "
+            "jti varchar(255) NOT NULL, "
+            "expires_at timestamp with time zone NOT NULL, "
+            "user_id bigint NOT NULL, "
+            "PRIMARY KEY (id, expires_at), "
+            "UNIQUE (jti, expires_at), "
+            f"FOREIGN KEY (user_id) REFERENCES {_quote(user_table)} (id) "
+            "DEFERRABLE INITIALLY DEFERRED"
+            ") PARTITION BY RANGE (expires_at)"
+        )
+        cursor.execute(f"ALTER SEQUENCE {_quote(sequence)} OWNED BY {_quote(table)}.id")
+        cursor.execute(f"CREATE INDEX ON {_quote(table)} (user_id)")
+        cursor.execute(f"CREATE INDEX ON {_quote(table)} (expires_at)")
+        cursor.execute(
+            f"CREATE TABLE {_quote(default)} PARTITION OF {_quote(table)} DEFAULT"
+        )
+        create_partitions(interval, ahead=ahead)
+        cursor.execute(
+            f"INSERT INTO {_quote(table)} (id, jti, expires_at, user_id) "
+            f"SELECT id, jti, expires_at, user_id FROM {_quote(legacy)} "
+            "WHERE expires_at > now()"
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {_quote(legacy)}")
+    return moved
@@ -0,0 +1,200 @@
+"""
+Массовый импорт и экспорт матрицы разрешений.
+
+Матрица — это список строк {"role": <имя роли>, "business_object": <код>,
+"can_create": ..., ...}. При импорте матрица сравнивается с текущим
+состоянием, а изменения применяются через bulk_create/bulk_update в одной
+транзакции; роли и бизнес-объекты разрешаются по заранее загруженным
+словарям, а поколение RBAC увеличивается один раз.
+
+Сравнение выполняется в той же транзакции, что и применение: импорты
+упорядочиваются блокировкой строки поколения RBAC, а сравниваемые
+разрешения блокируются SELECT ... FOR UPDATE, поэтому импорт не затирает
+изменения, сделанные после чтения матрицы.
+"""
+
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions
+
+from . import rbac
+from .models import BusinessObject, Permission, Role
+
+FLAG_FIELDS = [f"can_{flag}" for flag in rbac.PERMISSION_FLAGS]
+MATRIX_FIELDS = ["role", "business_object", *FLAG_FIELDS]
+
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+FALSE_VALUES = {"", "0", "false", "no", "n", "f"}
+
+
+@dataclass
+class MatrixDiff:
+    to_create: list = field(default_factory=list)
+    to_update: list = field(default_factory=list)
+    to_delete: list = field(default_factory=list)
+    unchanged: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "created": len(self.to_create),
+            "updated": len(self.to_update),
+            "deleted": len(self.to_delete),
+            "unchanged": self.unchanged,
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.to_create or self.to_update or self.to_delete)
+
+
+def export_matrix() -> list[dict]:
+    """
+    Возвращает текущую матрицу разрешений одним запросом.
+    """
+    rows = Permission.objects.order_by(
+        "role__name", "business_object__code"
+    ).values_list("role__name", "business_object__code", *FLAG_FIELDS)
+    return [dict(zip(MATRIX_FIELDS, row)) for row in rows]
+
+
+def to_csv(rows: list[dict]) -> str:
+    """
+    Сериализует матрицу в CSV с заголовком.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=MATRIX_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(
+            {
+                name: (str(value).lower() if name in FLAG_FIELDS else value)
+                for name, value in row.items()
+            }
+        )
+    return buffer.getvalue()
+
+
+def from_csv(text: str) -> list[dict]:
+    """
+    Разбирает матрицу из CSV с заголовком.
+    """
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _to_bool(value, index: int, name: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise exceptions.ValidationError({"permissions": f"Row {index}: invalid {name}."})
+
+
+def diff_matrix(
+    rows: list, delete_missing: bool = True, lock: bool = False
+) -> MatrixDiff:
+    """
+    Сравнивает матрицу с текущим состоянием. Если delete_missing истинно,
+    разрешения, отсутствующие в матрице, попадают в список на удаление.
+    При lock текущие разрешения блокируются до конца транзакции.
+    """
+    if not isinstance(rows, list):
+        raise exceptions.ValidationError({"permissions": "Expected a list of rows."})
+
+    roles = dict(Role.objects.values_list("name", "id"))
+    objects = dict(BusinessObject.objects.values_list("code", "id"))
+    current_perms = Permission.objects.only(
+        "id", "role_id", "business_object_id", *FLAG_FIELDS
+    )
+    if lock:
+        # Без сортировки по умолчанию: она добавила бы JOIN, и FOR UPDATE
+        # заблокировал бы заодно строки ролей и бизнес-объектов.
+        current_perms = current_perms.order_by().select_for_update()
+    existing = {
+        (perm.role_id, perm.business_object_id): perm for perm in current_perms
+    }
+
+    diff = MatrixDiff()
+    seen = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise exceptions.ValidationError(
+                {"permissions": f"Row {index}: expected an object."}
+            )
+        role_id = roles.get(row.get("role"))
+        object_id = objects.get(row.get("business_object"))
+        if role_id is None or object_id is None:
+            raise exceptions.ValidationError(
+                {"permissions": f"Row {index}: unknown role or business object."}
+            )
+        key = (role_id, object_id)
+        if key in seen:
+            raise exceptions.ValidationError(
+                {"permissions": f"Row {index}: duplicate role/business object pair."}
+            )
+        seen.add(key)
+
+        flags = {name: _to_bool(row.get(name), index, name) for name in FLAG_FIELDS}
+        current = existing.get(key)
+        if current is None:
+            diff.to_create.append(
+                Permission(role_id=role_id, business_object_id=object_id, **flags)
+            )
+        elif any(getattr(current, name) != value for name, value in flags.items()):
+            for name, value in flags.items():
+                setattr(current, name, value)
+            diff.to_update.append(current)
+        else:
+            diff.unchanged += 1
+
+    if delete_missing:
+        diff.to_delete = [perm.id for key, perm in existing.items() if key not in seen]
+    return diff
+
+
+def apply_diff(diff: MatrixDiff) -> None:
+    """
+    Применяет изменения в одной транзакции и увеличивает поколение RBAC
+    не более одного раза. Увеличение выполняется внутри той же транзакции,
+    поэтому изменения и новое поколение фиксируются вместе.
+    """
+    if not diff:
+        return
+    # Внутри import_matrix транзакция уже открыта; точка сохранения не нужна.
+    with transaction.atomic(savepoint=False), rbac.deferred_bump():
+        if diff.to_delete:
+            Permission.objects.filter(id__in=diff.to_delete).delete()
+        if diff.to_create:
+            Permission.objects.bulk_create(diff.to_create)
+        if diff.to_update:
+            Permission.objects.bulk_update(diff.to_update, FLAG_FIELDS)
+        # bulk_create/bulk_update не отправляют сигналы post_save.
+        rbac.bump_generation()
+
+
+def import_matrix(
+    rows: list, delete_missing: bool = True, dry_run: bool = False
+) -> dict:
+    """
+    Импортирует матрицу и возвращает количество созданных, измененных,
+    удаленных и неизмененных разрешений.
+    """
+    if dry_run:
+        return diff_matrix(rows, delete_missing=delete_missing).summary()
+    try:
+        with transaction.atomic():
+            rbac.lock_state()
+            diff = diff_matrix(rows, delete_missing=delete_missing, lock=True)
+            apply_diff(diff)
+    except IntegrityError:
+        # Разрешение для той же пары создано отдельным запросом после сравнения.
+        raise exceptions.ValidationError(
+            {"permissions": "The permission matrix changed during import; retry."}
+        )
+    return diff.summary()
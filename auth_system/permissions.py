@@ -1,8 +1,12 @@
-from django.core.exceptions import ObjectDoesNotExist
+import hmac
+
+from django.conf import settings
 from rest_framework import exceptions
 from rest_framework.permissions import BasePermission
 
-from .models import BusinessObject, Permission
+from . import rbac
+from .context import get_context
+from .instrumentation import stage
 
 
 class IsAuthenticatedOr401(BasePermission):
@@ -21,6 +25,23 @@ class IsAuthenticatedOr401(BasePermission):
         )
 
 
+class IsMetricsScraper(BasePermission):
+    """
+    Пропускает к метрикам запросы с адресов METRICS_ALLOWED_IPS или
+    с заголовком "Authorization: Bearer <METRICS_TOKEN>", если токен задан.
+    """
+
+    def has_permission(self, request, view):
+        allowed = getattr(settings, "METRICS_ALLOWED_IPS", [])
+        if request.META.get("REMOTE_ADDR") in allowed:
+            return True
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if not token:
+            return False
+        provided = request.headers.get("Authorization", "")
+        return hmac.compare_digest(provided.encode(), f"Bearer {token}".encode())
+
+
 class HasPermission(BasePermission):
     """
     Динамический класс разрешений на основе ролей, который проверяет права
@@ -33,6 +54,7 @@ class HasPermission(BasePermission):
 
     Для APIView, не являющихся ViewSet'ами, вы также должны указать действие:
         required_action = "read_all"
+    Кортеж действий требует наличия всех перечисленных прав.
     """
 
     ACTION_MAP = {
@@ -50,17 +72,59 @@ class HasPermission(BasePermission):
         "delete_own": "delete_all",
     }
 
-    def _get_perm_record(self, user, view):
+    def _get_perm_mask(self, request, view) -> int | None:
+        """
+        Получает маску разрешений пользователя на бизнес-объект представления.
+        Маска запоминается в контексте запроса, поэтому повторные проверки
+        (например, по каждому объекту списка) не выполняют запросов.
+        """
+        business_code = getattr(view, "business_object_code", None)
+        if business_code is None:
+            return None
+        return get_context(request).get_mask(business_code)
+
+    async def _aget_perm_mask(self, request, view) -> int | None:
         """
-        Получает запись о разрешении для пользователя
-        на основе конфигурации представления.
+        Асинхронный вариант _get_perm_mask.
         """
-        try:
-            business_code = getattr(view, "business_object_code")
-            bo = BusinessObject.objects.get(code=business_code)
-            return Permission.objects.get(role=user.role, business_object=bo)
-        except (ObjectDoesNotExist, AttributeError):
+        business_code = getattr(view, "business_object_code", None)
+        if business_code is None:
             return None
+        return await get_context(request).aget_mask(business_code)
+
+    def _check_action(self, view, perm_mask: int | None) -> bool:
+        """
+        Проверяет маску разрешений на действие, выполняемое представлением.
+        """
+        required = getattr(view, "required_action", None)
+        if isinstance(required, tuple):
+            return all(self.allows(perm_mask, action) for action in required)
+        if required:
+            action = required
+        elif view.action == "list" and getattr(view, "ownership_aware", False):
+            # Список фильтруется по владельцу в OwnershipFilterBackend.
+            action = "read_own"
+        else:
+            action = self.ACTION_MAP.get(view.action)
+
+        return self.allows(perm_mask, action)
+
+    def allows(self, perm_mask: int | None, action: str | None) -> bool:
+        """
+        Глобальная проверка действия по маске: *_own разрешается и при
+        наличии соответствующего права *_all.
+        """
+        if perm_mask is None or not action:
+            return False
+
+        if action in ["create", "read_all"]:
+            return rbac.has_flag(perm_mask, action)
+
+        has_own_perm = rbac.has_flag(perm_mask, action)
+        all_action = self.ALL_ACTION_MAP.get(action)
+        has_all_perm = rbac.has_flag(perm_mask, all_action) if all_action else False
+
+        return has_own_perm or has_all_perm
 
     def has_permission(self, request, view) -> bool:  # type: ignore[override]
         """
@@ -75,28 +139,24 @@ class HasPermission(BasePermission):
         if not user or not user.is_authenticated:
             return False
 
-        perm_record = self._get_perm_record(user, view)
-        if not perm_record:
-            return False
-
-        if hasattr(view, "required_action"):
-            action = view.required_action
-        else:
-            action = self.ACTION_MAP.get(view.action)
+        with stage("permission"):
+            return self._check_action(view, self._get_perm_mask(request, view))
 
-        if not action:
-            return False
+    async def ahas_permission(self, request, view) -> bool:
+        """
+        Асинхронный вариант has_permission для асинхронных представлений.
+        """
+        user = request.user
 
-        if action in ["create", "read_all"]:
-            return getattr(perm_record, f"can_{action}", False)
+        if getattr(user, "is_superuser", False):
+            return True
 
-        has_own_perm = getattr(perm_record, f"can_{action}", False)
-        all_action = self.ALL_ACTION_MAP.get(action)
-        has_all_perm = (
-            getattr(perm_record, f"can_{all_action}", False) if all_action else False
-        )
+        if not user or not user.is_authenticated:
+            return False
 
-        return has_own_perm or has_all_perm
+        with stage("permission"):
+            perm_mask = await self._aget_perm_mask(request, view)
+            return self._check_action(view, perm_mask)
 
     def has_object_permission(  # type: ignore[override]
         self, request, view, obj
@@ -110,21 +170,34 @@ class HasPermission(BasePermission):
         if getattr(user, "is_superuser", False):
             return True
 
-        perm_record = self._get_perm_record(user, view)
-        if not perm_record:
-            return False
-
-        action = self.ACTION_MAP.get(view.action)
-        if not action:
+        with stage("permission"):
+            perm_mask = self._get_perm_mask(request, view)
+            action = self.ACTION_MAP.get(view.action)
+            owner_id = getattr(obj, getattr(view, "owner_field", "owner_id"), None)
+            return self.allows_object(perm_mask, action, owner_id, user.id)
+
+    def allows_object(
+        self,
+        perm_mask: int | None,
+        action: str | None,
+        owner_id: int | None,
+        user_id: int | None,
+    ) -> bool:
+        """
+        Проверка действия над конкретным объектом: право *_all разрешает
+        доступ к любому объекту, право *_own — только к объекту,
+        владельцем которого является пользователь. Действия, не зависящие
+        от владельца (create, *_all), проверяются только по флагу.
+        """
+        if perm_mask is None or not action:
             return False
 
         all_action = self.ALL_ACTION_MAP.get(action)
-        if all_action and getattr(perm_record, f"can_{all_action}", False):
+        if all_action and rbac.has_flag(perm_mask, all_action):
             return True
 
-        if getattr(perm_record, f"can_{action}", False):
-            if hasattr(obj, "owner_id"):
-                return obj.owner_id == user.id
+        if not rbac.has_flag(perm_mask, action):
             return False
-
-        return False
+        if all_action:
+            return owner_id is not None and owner_id == user_id
+        return True
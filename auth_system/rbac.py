@@ -0,0 +1,246 @@
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+
+from .models import BusinessObject, Permission, RBACState, Role
+
+RBAC_STATE_PK = 1
+
+# Порядок флагов определяет номер бита в маске разрешений.
+PERMISSION_FLAGS = (
+    "create",
+    "read_own",
+    "read_all",
+    "update_own",
+    "update_all",
+    "delete_own",
+    "delete_all",
+)
+
+FLAG_BITS = {flag: 1 << index for index, flag in enumerate(PERMISSION_FLAGS)}
+
+
+def pack_flags(**flags: bool) -> int:
+    """
+    Упаковывает флаги вида can_<action> в битовую маску.
+    """
+    mask = 0
+    for flag, bit in FLAG_BITS.items():
+        if flags.get(f"can_{flag}"):
+            mask |= bit
+    return mask
+
+
+def has_flag(mask: int, action: str) -> bool:
+    """
+    Проверяет, установлен ли в маске бит для указанного действия.
+    """
+    bit = FLAG_BITS.get(action)
+    return bool(bit and mask & bit)
+
+
+class PermissionMatrix:
+    """
+    Скомпилированная матрица разрешений: (role_id, код бизнес-объекта) -> маска.
+    """
+
+    __slots__ = ("_masks", "_codes", "_role_names", "generation")
+
+    def __init__(self, masks: dict[tuple[int, str], int], generation: int = 0):
+        self._masks = masks
+        self._codes: tuple[str, ...] | None = None
+        self._role_names: dict[int, str] | None = None
+        self.generation = generation
+
+    @classmethod
+    def build(cls, generation: int = 0) -> "PermissionMatrix":
+        """
+        Строит матрицу по таблице разрешений одним запросом.
+        """
+        flag_fields = [f"can_{flag}" for flag in PERMISSION_FLAGS]
+        rows = Permission.objects.order_by().values_list(
+            "role_id", "business_object__code", *flag_fields
+        )
+        masks = {}
+        for role_id, code, *values in rows:
+            masks[(role_id, code)] = pack_flags(**dict(zip(flag_fields, values)))
+        return cls(masks, generation)
+
+    def get_mask(self, role_id: int | None, code: str) -> int | None:
+        """
+        Возвращает маску для пары роль/объект или None, если записи нет.
+        """
+        return self._masks.get((role_id, code))
+
+    def codes(self) -> tuple[str, ...]:
+        """
+        Возвращает коды всех бизнес-объектов. Загружается при первом
+        обращении; изменение бизнес-объектов меняет поколение и матрицу.
+        """
+        if self._codes is None:
+            self._codes = tuple(
+                BusinessObject.objects.order_by("code").values_list("code", flat=True)
+            )
+        return self._codes
+
+    def role_name(self, role_id: int | None) -> str | None:
+        """
+        Возвращает название роли. Названия загружаются при первом обращении;
+        переименование роли меняет поколение и матрицу.
+        """
+        if role_id is None:
+            return None
+        if self._role_names is None:
+            self._role_names = dict(Role.objects.values_list("id", "name"))
+        return self._role_names.get(role_id)
+
+    def role_flags(self, role_id: int | None, superuser: bool = False) -> dict:
+        """
+        Возвращает флаги роли по всем бизнес-объектам:
+        {код: {действие: bool}}.
+        """
+        flags = {}
+        for code in self.codes():
+            mask = self._masks.get((role_id, code), 0)
+            flags[code] = {
+                flag: superuser or bool(mask & bit) for flag, bit in FLAG_BITS.items()
+            }
+        return flags
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+
+def current_generation() -> int:
+    """
+    Возвращает текущее поколение данных RBAC одним запросом по первичному ключу.
+    """
+    generation = (
+        RBACState.objects.filter(pk=RBAC_STATE_PK)
+        .values_list("generation", flat=True)
+        .first()
+    )
+    return generation or 0
+
+
+async def acurrent_generation() -> int:
+    """
+    Асинхронный вариант current_generation.
+    """
+    generation = await (
+        RBACState.objects.filter(pk=RBAC_STATE_PK)
+        .values_list("generation", flat=True)
+        .afirst()
+    )
+    return generation or 0
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_bump():
+    """
+    Откладывает увеличение поколения до выхода из блока: сколько бы
+    изменений RBAC ни было сделано внутри, поколение увеличится один раз.
+    При исключении поколение не меняется. Блок следует открывать внутри
+    транзакции (with transaction.atomic(), deferred_bump(): ...), чтобы
+    поколение увеличивалось до фиксации изменений, а не после нее.
+    """
+    depth = getattr(_deferred, "depth", 0)
+    if depth == 0:
+        _deferred.pending = False
+    _deferred.depth = depth + 1
+    try:
+        yield
+    except BaseException:
+        _deferred.depth = depth
+        if depth == 0:
+            _deferred.pending = False
+        raise
+    _deferred.depth = depth
+    if depth == 0 and _deferred.pending:
+        _deferred.pending = False
+        bump_generation()
+
+
+def bump_generation() -> None:
+    """
+    Увеличивает поколение данных RBAC, чтобы все процессы перестроили
+    свои локальные матрицы разрешений.
+    """
+    if getattr(_deferred, "depth", 0):
+        _deferred.pending = True
+        return
+    updated = RBACState.objects.filter(pk=RBAC_STATE_PK).update(
+        generation=F("generation") + 1
+    )
+    if not updated:
+        RBACState.objects.get_or_create(pk=RBAC_STATE_PK, defaults={"generation": 1})
+    invalidate_matrix()
+
+
+def lock_state() -> None:
+    """
+    Блокирует строку поколения RBAC до конца текущей транзакции, чтобы
+    массовые изменения RBAC (импорт матрицы) выполнялись по одному.
+    """
+    locked = RBACState.objects.select_for_update().filter(pk=RBAC_STATE_PK)
+    if not locked.values_list("pk", flat=True):
+        # Вставленная строка заблокирована до конца транзакции.
+        RBACState.objects.get_or_create(pk=RBAC_STATE_PK)
+
+
+_matrix: PermissionMatrix | None = None
+_lock = threading.Lock()
+
+
+def get_matrix(generation: int | None = None) -> PermissionMatrix:
+    """
+    Возвращает матрицу разрешений процесса. Матрица перестраивается,
+    только если поколение данных RBAC изменилось с момента ее построения.
+    """
+    global _matrix
+    if generation is None:
+        generation = current_generation()
+
+    matrix = _matrix
+    if matrix is None or matrix.generation != generation:
+        with _lock:
+            if _matrix is None or _matrix.generation != generation:
+                _matrix = PermissionMatrix.build(generation)
+            matrix = _matrix
+    return matrix
+
+
+async def aget_matrix(generation: int | None = None) -> PermissionMatrix:
+    """
+    Асинхронный вариант get_matrix. Редкое перестроение матрицы выполняется
+    в потоке, проверка поколения использует асинхронный ORM.
+    """
+    if generation is None:
+        generation = await acurrent_generation()
+    matrix = _matrix
+    if matrix is None or matrix.generation != generation:
+        matrix = await sync_to_async(get_matrix)(generation)
+    return matrix
+
+
+def cached_generation() -> int | None:
+    """
+    Поколение, из которого построена матрица процесса, без запроса к БД.
+    Может отставать от поколения в БД; None, если матрица не построена.
+    """
+    matrix = _matrix
+    return matrix.generation if matrix is not None else None
+
+
+def invalidate_matrix() -> None:
+    """
+    Сбрасывает матрицу процесса; она будет построена заново при следующем запросе.
+    """
+    global _matrix
+    with _lock:
+        _matrix = None
@@ -0,0 +1,78 @@
+"""
+Быстрый JSON-рендерер.
+
+FastJSONRenderer сериализует ответы через orjson, если пакет установлен
+(pip install orjson), и через стандартный JSONRenderer DRF в остальных
+случаях. Результат побайтно совпадает с JSONRenderer: компактные
+разделители, символы вне ASCII без экранирования, экранированные U+2028
+и U+2029. Значения, которые orjson не сериализует сам (даты, Decimal,
+ленивые строки), передаются кодировщику DRF; запросы с отступом
+(application/json; indent=4) и прочие несовместимые случаи обрабатывает
+JSONRenderer.
+
+Числа с плавающей точкой orjson форматирует иначе (1e16 вместо 1e+16,
+1e-7 вместо 1e-07), а NaN и бесконечность выводит как null, тогда как
+JSONRenderer отклоняет их. Поэтому данные с float и Decimal (кодировщик
+DRF превращает Decimal во float) целиком рендерит JSONRenderer.
+"""
+
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+LINE_SEPARATORS = ("\u2028".encode(), "\u2029".encode())
+
+
+def contains_float(data) -> bool:
+    """
+    Проверяет, есть ли в данных float или Decimal на любой глубине.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (float, Decimal)):
+            return True
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    def _fast_render_allowed(self, accepted_media_type, renderer_context) -> bool:
+        return (
+            orjson is not None
+            and self.compact
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not self._fast_render_allowed(
+            accepted_media_type, renderer_context
+        ) or contains_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                # Даты форматирует кодировщик DRF, как и в JSONRenderer.
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # Например, целые числа вне 64 бит.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if LINE_SEPARATORS[0] in ret or LINE_SEPARATORS[1] in ret:
+            ret = ret.replace(LINE_SEPARATORS[0], b"\\u2028")
+            ret = ret.replace(LINE_SEPARATORS[1], b"\\u2029")
+        return ret
@@ -1,9 +1,7 @@
-from typing import cast
-
 from django.contrib.auth import authenticate
 from rest_framework import serializers
 
-from .models import User, CustomUserManager
+from .models import User
 from .models import Role, BusinessObject, Permission
 
 
@@ -24,8 +22,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data: dict) -> User:
         validated_data.pop("password2")
-        manager = cast(CustomUserManager, User.objects)
-        return manager.create_user(**validated_data)
+        return User.objects.create_user(**validated_data)
 
 
 class LoginSerializer(serializers.Serializer):
@@ -57,19 +54,32 @@ class LoginSerializer(serializers.Serializer):
         return attrs
 
 
-class RoleSerializer(serializers.ModelSerializer):
+class SparseFieldsSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer, принимающий аргумент fields — подмножество Meta.fields,
+    которое попадет в вывод.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RoleSerializer(SparseFieldsSerializer):
     class Meta:
         model = Role
         fields = ["id", "name"]
 
 
-class BusinessObjectSerializer(serializers.ModelSerializer):
+class BusinessObjectSerializer(SparseFieldsSerializer):
     class Meta:
         model = BusinessObject
         fields = ["id", "code", "name"]
 
 
-class PermissionSerializer(serializers.ModelSerializer):
+class PermissionSerializer(SparseFieldsSerializer):
     role = serializers.SlugRelatedField(slug_field="name", queryset=Role.objects.all())
     business_object = serializers.SlugRelatedField(
         slug_field="code", queryset=BusinessObject.objects.all()
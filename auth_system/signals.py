@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rbac, utils
+from .models import BusinessObject, Permission, Role, User
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=BusinessObject)
+@receiver(post_delete, sender=BusinessObject)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def bump_rbac_generation(sender, **kwargs):
+    """
+    Увеличивает поколение данных RBAC при изменении ролей, бизнес-объектов
+    и разрешений, чтобы все рабочие процессы перестроили свои матрицы.
+    """
+    rbac.bump_generation()
+
+
+@receiver(post_save, sender=User)
+def invalidate_claims_on_access_change(sender, instance, created, **kwargs):
+    """
+    Следит за полями доступа существующего пользователя. Смена роли,
+    is_superuser или is_staff увеличивает поколение RBAC, чтобы токены
+    с прежними утверждениями перестали считаться актуальными. Деактивация
+    отзывает все токены пользователя, повторная активация снимает этот отзыв,
+    иначе новые токены пользователя не проходили бы проверку утверждений.
+    """
+    loaded = getattr(instance, "_loaded_access", {})
+    current = instance.access_state()
+    changed = {
+        name for name, value in current.items()
+        if name in loaded and loaded[name] != value
+    }
+    if not created:
+        if changed & {"role_id", "is_superuser", "is_staff"}:
+            rbac.bump_generation()
+        if "is_active" in changed:
+            if instance.is_active:
+                utils.clear_user_revocation(instance)
+            else:
+                utils.revoke_user_tokens(instance)
+    instance._loaded_access = {**loaded, **current}
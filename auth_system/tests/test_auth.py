@@ -1,8 +1,25 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from types import SimpleNamespace
+
 import pytest
 from django.contrib.auth import get_user_model
-from rest_framework import status
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from rest_framework import exceptions, status
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
 import allure
 
+from auth_system import blacklist, hashing, partitioning, throttling, utils
+from auth_system.blacklist import RevokedTokenSet, revoked_tokens
+from auth_system.conftest import create_authenticated_client
+from auth_system.models import BlacklistedToken, RefreshToken, Role
+from auth_system.throttling import login_limiter
+
 User = get_user_model()
 
 
@@ -58,3 +75,578 @@ class TestAuthentication:
         profile_url = "/api/auth/profile/"
         profile_response = api_client.get(profile_url)
         assert profile_response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @allure.story("User Logout")
+    @allure.title("Тест учета токена, отозванного другим рабочим процессом")
+    def test_token_revoked_by_other_worker(self, settings, api_client, user_user):
+        settings.JWT_BLACKLIST_SYNC_SECONDS = 0
+        revoked_tokens.clear()
+
+        token = utils.generate_jwt(user_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        profile_url = "/api/auth/profile/"
+        assert api_client.get(profile_url).status_code == status.HTTP_200_OK
+
+        payload = utils.decode_jwt(token)
+        BlacklistedToken.objects.create(
+            user=user_user,
+            jti=payload["jti"],
+            expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+        )
+
+        response = api_client.get(profile_url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @allure.story("User Logout")
+    @allure.title("Тест повторного отзыва токенов пользователя в другом процессе")
+    def test_repeated_user_revocation_seen_by_other_worker(self, user_user):
+        worker = RevokedTokenSet()
+        jti = utils.user_revocation_jti(user_user.pk)
+        utils.revoke_user_tokens(user_user)
+        worker.sync(force=True)
+        worker.sync(force=True)
+
+        # Токен, выпущенный между первым и вторым отзывом.
+        first = BlacklistedToken.objects.get(jti=jti).expires_at
+        exp = (first + timedelta(microseconds=1)).timestamp()
+        assert not worker.is_revoked(jti, exp)
+
+        utils.revoke_user_tokens(user_user)
+        worker.sync(force=True)
+        assert worker.is_revoked(jti, exp)
+
+    @allure.story("User Logout")
+    @allure.title("Тест токена, выпущенного в ту же секунду сразу после отзыва")
+    def test_token_issued_right_after_revocation(self, api_client, user_user):
+        before = utils.generate_jwt(user_user)
+        utils.revoke_user_tokens(user_user)
+        after = utils.generate_jwt(user_user)
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {before}")
+        response = api_client.get("/api/auth/profile/")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {after}")
+        assert api_client.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+
+    @allure.story("Authentication Errors")
+    @allure.title("Тест ответа 401 с WWW-Authenticate на AuthenticationFailed")
+    def test_authentication_failed_returns_401(self):
+        class FailingView(APIView):
+            permission_classes = [AllowAny]
+
+            def get(self, request):
+                raise exceptions.AuthenticationFailed("Invalid credentials.")
+
+        response = FailingView.as_view()(APIRequestFactory().get("/"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response["WWW-Authenticate"] == 'Bearer realm="api"'
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestClaimsOnlyAuthentication:
+
+    @pytest.fixture(autouse=True)
+    def claims_only(self, settings):
+        settings.JWT_CLAIMS_ONLY_AUTH = True
+        settings.JWT_BLACKLIST_SYNC_SECONDS = 60
+        revoked_tokens.clear()
+
+    @allure.story("Claims-only Mode")
+    @allure.title("Тест доступа без загрузки пользователя из БД")
+    def test_principal_built_from_claims(
+        self, manager_client, django_assert_num_queries
+    ):
+        manager_client.get("/api/auth/products/")
+        # Единственный запрос — поколение RBAC, общее для проверки токена
+        # и прав в контексте запроса.
+        with django_assert_num_queries(1):
+            response = manager_client.get("/api/auth/products/")
+        assert response.status_code == status.HTTP_200_OK
+
+    @allure.story("Claims-only Mode")
+    @allure.title("Тест отзыва всех токенов после удаления аккаунта")
+    def test_delete_account_revokes_other_tokens(self, user_user):
+        first = create_authenticated_client(user_user)
+        second = create_authenticated_client(user_user)
+        assert second.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+
+        response = first.post("/api/auth/delete-account/")
+        assert response.status_code == status.HTTP_200_OK
+
+        response = second.get("/api/auth/profile/")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @allure.story("Claims-only Mode")
+    @allure.title("Тест отказа от утверждений токена после смены роли")
+    def test_role_change_invalidates_claims(self, manager_user, manager_client):
+        assert manager_client.get("/api/auth/orders/").status_code == (
+            status.HTTP_200_OK
+        )
+
+        manager_user.role = Role.objects.get(name="User")
+        manager_user.save()
+
+        response = manager_client.get("/api/auth/orders/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @allure.story("Claims-only Mode")
+    @allure.title("Тест отказа от утверждения is_superuser после понижения")
+    def test_superuser_demotion_invalidates_claims(self, user_user):
+        user_user.is_superuser = True
+        user_user.save()
+        client = create_authenticated_client(user_user)
+        assert client.get("/api/auth/roles/").status_code == status.HTTP_200_OK
+
+        user_user.is_superuser = False
+        user_user.save()
+
+        response = client.get("/api/auth/roles/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @allure.story("Claims-only Mode")
+    @allure.title("Тест отзыва токенов при деактивации и его снятия при активации")
+    def test_reactivation_clears_user_revocation(
+        self, manager_user, django_assert_num_queries
+    ):
+        client = create_authenticated_client(manager_user)
+        manager_user.is_active = False
+        manager_user.save()
+        assert client.get("/api/auth/profile/").status_code == (
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+        manager_user.is_active = True
+        manager_user.save()
+        assert not BlacklistedToken.objects.filter(
+            jti=utils.user_revocation_jti(manager_user.pk)
+        ).exists()
+
+        client = create_authenticated_client(manager_user)
+        client.get("/api/auth/products/")
+        # Новый токен снова проходит по утверждениям, без загрузки пользователя.
+        with django_assert_num_queries(1):
+            response = client.get("/api/auth/products/")
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestPasswordHashing:
+
+    @allure.story("Password Hashing")
+    @allure.title("Тест хэширования пароля при входе с незарегистрированным адресом")
+    def test_unknown_email_still_hashes(self, api_client, monkeypatch):
+        calls = []
+        make_password = hashing.make_password
+        monkeypatch.setattr(
+            hashing,
+            "make_password",
+            lambda password: calls.append(password) or make_password(password),
+        )
+        response = api_client.post(
+            "/api/auth/login/", {"email": "nobody@example.com", "password": "Test123!"}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert calls == ["Test123!"]
+
+    @allure.story("Password Hashing")
+    @allure.title("Тест хэширования пароля при регистрации через create_user")
+    def test_register_hashes_through_create_user(self, api_client, monkeypatch):
+        calls = []
+        make_password = hashing.make_password
+        monkeypatch.setattr(
+            hashing,
+            "make_password",
+            lambda password: calls.append(password) or make_password(password),
+        )
+        data = {
+            "email": "Hashed@EXAMPLE.com",
+            "first_name": "Hashed",
+            "last_name": "User",
+            "password": "Password123!",
+            "password2": "Password123!",
+        }
+        response = api_client.post("/api/auth/register/", data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert calls == ["Password123!"]
+        user = User.objects.get(email="Hashed@example.com")
+        assert user.check_password("Password123!")
+
+    @allure.story("Password Hashing")
+    @allure.title("Тест пересчета хэша при изменении стоимости PBKDF2")
+    def test_login_rehashes_with_new_iterations(self, settings, api_client, user_user):
+        settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+        user_user.set_password("Test123!")
+        user_user.save(update_fields=["password"])
+
+        settings.PASSWORD_PBKDF2_ITERATIONS = 2000
+        response = api_client.post(
+            "/api/auth/login/", {"email": user_user.email, "password": "Test123!"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        user_user.refresh_from_db()
+        assert user_user.password.startswith("pbkdf2_sha256$2000$")
+
+    @allure.story("Password Hashing")
+    @allure.title("Тест перехода на scrypt при входе")
+    def test_login_rehashes_with_selected_hasher(self, settings, api_client, user_user):
+        settings.PASSWORD_SCRYPT_WORK_FACTOR = 2**10
+        settings.PASSWORD_HASHERS = [
+            "auth_system.hashers.TunedScryptPasswordHasher",
+            "auth_system.hashers.TunedPBKDF2PasswordHasher",
+        ]
+        response = api_client.post(
+            "/api/auth/login/", {"email": user_user.email, "password": "Test123!"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        user_user.refresh_from_db()
+        assert user_user.password.startswith("scrypt$")
+        assert user_user.check_password("Test123!")
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestHashingPool:
+
+    @allure.story("Password Hashing")
+    @allure.title("Тест входа и регистрации через пул хэширования")
+    def test_login_and_register_through_pool(self, settings, api_client, user_user):
+        settings.PASSWORD_HASHING_WORKERS = 1
+        login = api_client.post(
+            "/api/auth/login/", {"email": user_user.email, "password": "Test123!"}
+        )
+        assert login.status_code == status.HTTP_200_OK
+
+        data = {
+            "email": "pooled@example.com",
+            "first_name": "Pooled",
+            "last_name": "User",
+            "password": "Password123!",
+            "password2": "Password123!",
+        }
+        response = api_client.post("/api/auth/register/", data)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert User.objects.get(email="pooled@example.com").check_password(
+            "Password123!"
+        )
+
+    @allure.story("Password Hashing")
+    @allure.title("Тест ответа 503 при переполнении пула хэширования")
+    def test_saturated_pool_returns_503(self, settings, api_client, user_user):
+        settings.PASSWORD_HASHING_WORKERS = 1
+        settings.PASSWORD_HASHING_QUEUE_LIMIT = 0
+        service = hashing.get_service()
+        assert service._slots.acquire(blocking=False)
+        try:
+            response = api_client.post(
+                "/api/auth/login/", {"email": user_user.email, "password": "Test123!"}
+            )
+        finally:
+            service._slots.release()
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "1"
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestLoginThrottling:
+
+    url = "/api/auth/login/"
+
+    @allure.story("Login Throttling")
+    @allure.title("Тест экспоненциальной задержки после неудачных попыток входа")
+    def test_backoff_after_failed_attempts(self, settings, api_client, user_user):
+        settings.LOGIN_BACKOFF_FREE_ATTEMPTS = 2
+        bad = {"email": user_user.email, "password": "wrong"}
+        for _ in range(3):
+            assert api_client.post(self.url, bad).status_code == 400
+
+        good = {"email": user_user.email.upper(), "password": "Test123!"}
+        response = api_client.post(self.url, good)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "1"
+        stats = login_limiter.stats()
+        assert stats["failures"] == 3
+        assert stats["throttled_backoff"] == 1
+
+    @allure.story("Login Throttling")
+    @allure.title("Тест ограничения попыток входа с одного IP-адреса")
+    def test_ip_window_rejects_before_authentication(
+        self, settings, api_client, django_assert_num_queries
+    ):
+        settings.LOGIN_RATE_PER_IP = "2/min"
+        for index in range(2):
+            data = {"email": f"nobody{index}@example.com", "password": "x"}
+            assert api_client.post(self.url, data).status_code == 400
+
+        with django_assert_num_queries(0):
+            response = api_client.post(
+                self.url, {"email": "other@example.com", "password": "x"}
+            )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @allure.story("Login Throttling")
+    @allure.title("Тест игнорирования подмененного X-Forwarded-For без NUM_PROXIES")
+    def test_spoofed_forwarded_for_ignored(self, settings, api_client):
+        settings.LOGIN_RATE_PER_IP = "2/min"
+        for index in range(2):
+            data = {"email": f"nobody{index}@example.com", "password": "x"}
+            response = api_client.post(
+                self.url, data, HTTP_X_FORWARDED_FOR=f"203.0.113.{index}"
+            )
+            assert response.status_code == 400
+
+        response = api_client.post(
+            self.url,
+            {"email": "other@example.com", "password": "x"},
+            HTTP_X_FORWARDED_FOR="203.0.113.99",
+        )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @allure.story("Login Throttling")
+    @allure.title("Тест ограничения по email в общем хранилище на основе кэша")
+    def test_cache_store_limits_per_email(
+        self, settings, monkeypatch, api_client, user_user
+    ):
+        # Середина окна: на границе окон двухсчетчиковая оценка может
+        # пропустить лишнюю попытку.
+        clock = SimpleNamespace(time=lambda: 1_800_000_030.0)
+        monkeypatch.setattr(throttling, "time", clock)
+        settings.LOGIN_THROTTLE_STORE = "cache"
+        settings.LOGIN_RATE_PER_EMAIL = "2/min"
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "login-throttle-test",
+            }
+        }
+        data = {"email": user_user.email, "password": "Test123!"}
+        for _ in range(2):
+            assert api_client.post(self.url, data).status_code == 200
+
+        response = api_client.post(self.url, data)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        keys = list(caches["default"]._cache)
+        assert keys and not any(user_user.email in key for key in keys)
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestRefreshTokens:
+
+    url = "/api/auth/refresh/"
+
+    def login(self, api_client, user):
+        response = api_client.post(
+            "/api/auth/login/", {"email": user.email, "password": "Test123!"}
+        )
+        return response.data["refresh"]
+
+    @allure.story("Refresh Tokens")
+    @allure.title("Тест обмена токена обновления без проверки пароля")
+    def test_refresh_rotates_without_password_hashing(
+        self, api_client, user_user, django_assert_max_num_queries
+    ):
+        refresh = self.login(api_client, user_user)
+
+        # Поиск, условное обновление, новый токен, поколение RBAC и
+        # точка сохранения транзакции; хэширование пароля не выполняется.
+        with django_assert_max_num_queries(6):
+            response = api_client.post(self.url, {"refresh": refresh})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["refresh"] != refresh
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        assert api_client.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+
+    @allure.story("Refresh Tokens")
+    @allure.title("Тест отзыва токенов пользователя при повторном использовании токена")
+    def test_reuse_revokes_family(self, settings, api_client, user_user):
+        stolen = self.login(api_client, user_user)
+        rotated = api_client.post(self.url, {"refresh": stolen}).data
+
+        reuse = api_client.post(self.url, {"refresh": stolen})
+        assert reuse.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = api_client.post(self.url, {"refresh": rotated["refresh"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert not RefreshToken.objects.filter(user=user_user).exists()
+
+        # Токен доступа, выданный семейством, тоже отозван, в том числе
+        # в режиме авторизации по утверждениям токена.
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {rotated['token']}")
+        for claims_only in (False, True):
+            settings.JWT_CLAIMS_ONLY_AUTH = claims_only
+            profile = api_client.get("/api/auth/profile/")
+            assert profile.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @allure.story("Refresh Tokens")
+    @allure.title("Тест отзыва токена обновления при выходе из системы")
+    def test_logout_revokes_refresh_token(self, api_client, user_user):
+        response = api_client.post(
+            "/api/auth/login/", {"email": user_user.email, "password": "Test123!"}
+        )
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        api_client.post("/api/auth/logout/", {"refresh": response.data["refresh"]})
+
+        api_client.credentials()
+        refreshed = api_client.post(self.url, {"refresh": response.data["refresh"]})
+        assert refreshed.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @allure.story("Refresh Tokens")
+    @allure.title("Тест: выход не отзывает токен обновления другого пользователя")
+    def test_logout_ignores_foreign_refresh_token(
+        self, api_client, user_user, manager_user
+    ):
+        foreign = self.login(api_client, manager_user)
+        client = create_authenticated_client(user_user)
+        client.post("/api/auth/logout/", {"refresh": foreign})
+
+        refreshed = api_client.post(self.url, {"refresh": foreign})
+        assert refreshed.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestBlacklistPruning:
+
+    @allure.story("Blacklist Pruning")
+    @allure.title("Тест пакетного удаления истекших отозванных токенов")
+    def test_prune_blacklist_deletes_expired_only(self, user_user):
+        now = datetime.now(timezone.utc)
+        for index in range(5):
+            BlacklistedToken.objects.create(
+                user=user_user,
+                jti=f"expired-{index}",
+                expires_at=now - timedelta(minutes=1),
+            )
+        BlacklistedToken.objects.create(
+            user=user_user, jti="active", expires_at=now + timedelta(minutes=5)
+        )
+
+        out = StringIO()
+        call_command("prune_blacklist", "--batch-size", "2", stdout=out)
+
+        assert "Deleted 5 expired blacklisted tokens" in out.getvalue()
+        assert list(BlacklistedToken.objects.values_list("jti", flat=True)) == [
+            "active"
+        ]
+
+    @allure.story("Blacklist Pruning")
+    @allure.title("Тест отказа при неположительном размере пакета")
+    def test_prune_rejects_non_positive_batch_size(self, settings):
+        with pytest.raises(CommandError):
+            call_command("prune_blacklist", "--batch-size", "0", stdout=StringIO())
+        with pytest.raises(ValueError):
+            blacklist.prune_expired(batch_size=-1)
+
+        settings.JWT_BLACKLIST_PRUNE_INTERVAL = 60
+        settings.JWT_BLACKLIST_PRUNE_BATCH_SIZE = 0
+        with pytest.raises(ImproperlyConfigured):
+            blacklist.start_pruner()
+
+    @allure.story("Blacklist Pruning")
+    @allure.title("Тест запуска одного потока очистки на процесс")
+    def test_start_pruner_once_per_process(self, settings, monkeypatch):
+        monkeypatch.setattr(blacklist, "_pruner", None)
+        settings.JWT_BLACKLIST_PRUNE_INTERVAL = 0
+        assert blacklist.start_pruner() is None
+
+        settings.JWT_BLACKLIST_PRUNE_INTERVAL = 3600
+        pruner = blacklist.start_pruner()
+        try:
+            assert blacklist.start_pruner() is pruner
+        finally:
+            pruner.stop()
+            pruner.join()
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="Requires PostgreSQL partitioning"
+    )
+    @allure.story("Blacklist Partitioning")
+    @allure.title("Тест секционирования черного списка и удаления истекших секций")
+    def test_partitioned_blacklist(self, user_user):
+        now = datetime.now(timezone.utc)
+        BlacklistedToken.objects.create(
+            user=user_user, jti="before", expires_at=now + timedelta(minutes=5)
+        )
+
+        call_command(
+            "blacklist_partitions", "convert", "--interval", "hourly", "--ahead", "3",
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        assert partitioning.is_partitioned()
+        assert BlacklistedToken.objects.filter(jti="before").exists()
+
+        BlacklistedToken.objects.create(
+            user=user_user, jti="after", expires_at=now + timedelta(minutes=10)
+        )
+        assert BlacklistedToken.objects.filter(jti="after").exists()
+
+        dropped = partitioning.drop_expired_partitions(
+            "hourly", now=now + timedelta(hours=2)
+        )
+        assert dropped
+        assert not BlacklistedToken.objects.filter(jti="after").exists()
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="Requires PostgreSQL partitioning"
+    )
+    @allure.story("Blacklist Partitioning")
+    @allure.title("Тест отзыва при дубликатах jti в секционированной таблице")
+    def test_partitioned_duplicate_jti(self, user_user):
+        call_command(
+            "blacklist_partitions", "convert", "--interval", "hourly", "--ahead", "3",
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        now = datetime.now(timezone.utc)
+        token = utils.generate_jwt(user_user)
+        jti = utils.decode_jwt(token)["jti"]
+        user_jti = utils.user_revocation_jti(user_user.pk)
+        for minutes in (5, 6):
+            expires_at = now + timedelta(minutes=minutes)
+            for value in (jti, user_jti):
+                BlacklistedToken.objects.create(
+                    user=user_user, jti=value, expires_at=expires_at
+                )
+
+        request = SimpleNamespace(
+            headers={"Authorization": f"Bearer {token}"}, user=user_user
+        )
+        assert utils.blacklist_token(request)
+        assert utils.blacklist_token(request)
+        assert BlacklistedToken.objects.filter(jti=jti).count() == 3
+        utils.revoke_user_tokens(user_user)
+        assert BlacklistedToken.objects.filter(jti=user_jti).count() == 1
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="Requires PostgreSQL partitioning"
+    )
+    @allure.story("Blacklist Partitioning")
+    @allure.title("Тест создания секции при строках ее диапазона в секции по умолчанию")
+    def test_create_partition_moves_rows_from_default(self, user_user):
+        now = datetime.now(timezone.utc)
+        call_command(
+            "blacklist_partitions", "convert", "--interval", "hourly", "--ahead", "0",
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        BlacklistedToken.objects.create(
+            user=user_user, jti="late", expires_at=now + timedelta(hours=2)
+        )
+        default = f"{BlacklistedToken._meta.db_table}_default"
+
+        created = partitioning.create_partitions("hourly", ahead=3, now=now)
+
+        assert len(created) == 3
+        assert BlacklistedToken.objects.filter(jti="late").exists()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {default}")
+            assert cursor.fetchone()[0] == 0
+        assert default in partitioning.list_partitions()
@@ -1,7 +1,47 @@
+import asyncio
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import UUID
+
 import pytest
-from rest_framework import status
+from asgiref.sync import async_to_sync
+from django.db import connection, models
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext, isolate_apps
+from rest_framework import exceptions, serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import ReadOnlyModelViewSet
 import allure
 
+from auth_system import permission_matrix, rbac, renderers, utils
+from auth_system.async_views import (
+    AsyncOrderListView,
+    AsyncProductListView,
+    AsyncProfileView,
+)
+from auth_system.authentication import JWTAuthentication
+from auth_system.filters import OwnedQuerysetMixin, OwnershipFilterBackend
+from auth_system.models import (
+    BusinessObject,
+    OwnedModel,
+    Permission,
+    RBACState,
+    Role,
+    User,
+)
+from auth_system.permissions import HasPermission
+from auth_system.renderers import FastJSONRenderer
+from auth_system.serializers import (
+    BusinessObjectSerializer,
+    PermissionSerializer,
+    RoleSerializer,
+    UserProfileSerializer,
+)
+
 PERMISSION_TEST_CASES = [
     ("admin", "/api/auth/products/", status.HTTP_200_OK),
     ("admin", "/api/auth/orders/", status.HTTP_200_OK),
@@ -38,3 +78,711 @@ class TestPermissions:
         response = client.get(endpoint)
 
         assert response.status_code == expected_status
+
+    @allure.story("Permission Matrix")
+    @allure.title("Тест применения изменения разрешения без перезапуска")
+    def test_permission_change_is_applied(self, admin_client, user_client):
+        """
+        Проверяет, что изменение разрешения через API сразу учитывается
+        скомпилированной матрицей разрешений.
+        """
+        assert user_client.get("/api/auth/products/").status_code == (
+            status.HTTP_403_FORBIDDEN
+        )
+
+        permissions = admin_client.get("/api/auth/permissions/").data["results"]
+        perm_id = next(
+            p["id"]
+            for p in permissions
+            if p["role"] == "User" and p["business_object"] == "products"
+        )
+        response = admin_client.patch(
+            f"/api/auth/permissions/{perm_id}/", {"can_read_all": True}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        assert user_client.get("/api/auth/products/").status_code == (
+            status.HTTP_200_OK
+        )
+
+    @allure.story("Permission Matrix")
+    @allure.title("Тест перестроения матрицы при смене поколения RBAC")
+    def test_matrix_rebuilt_on_generation_change(self, user_user):
+        """
+        Имитирует изменение, сделанное другим рабочим процессом: данные и
+        поколение меняются без сигналов, а локальная матрица перестраивается.
+        """
+        matrix = rbac.get_matrix()
+        assert rbac.get_matrix() is matrix
+
+        Permission.objects.filter(
+            role=user_user.role, business_object__code="orders"
+        ).update(can_read_all=True)
+        assert rbac.get_matrix() is matrix
+
+        RBACState.objects.update(generation=F("generation") + 1)
+        rebuilt = rbac.get_matrix()
+        assert rebuilt is not matrix
+        assert rebuilt.generation == matrix.generation + 1
+        assert rbac.has_flag(
+            rebuilt.get_mask(user_user.role_id, "orders"), "read_all"
+        )
+
+    @allure.story("Permission Matrix")
+    @allure.title("Тест увеличения поколения RBAC сигналами моделей")
+    def test_generation_bumped_on_save(self, admin_client):
+        generation = rbac.current_generation()
+        response = admin_client.post("/api/auth/roles/", {"name": "Auditor"})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert rbac.current_generation() == generation + 1
+
+
+ASYNC_VIEW_CASES = [
+    ("admin", AsyncProductListView, status.HTTP_200_OK),
+    ("manager", AsyncOrderListView, status.HTTP_200_OK),
+    ("user", AsyncProductListView, status.HTTP_403_FORBIDDEN),
+    ("user", AsyncProfileView, status.HTTP_200_OK),
+    (None, AsyncProfileView, status.HTTP_401_UNAUTHORIZED),
+]
+
+
+@pytest.mark.django_db
+@allure.feature("Authorization (RBAC)")
+class TestAsyncViews:
+
+    @pytest.mark.parametrize("user_role, view_class, expected_status", ASYNC_VIEW_CASES)
+    @allure.story("Async Views")
+    def test_async_views_keep_rbac_semantics(
+        self, request, user_role, view_class, expected_status
+    ):
+        """
+        Проверяет, что асинхронные представления дают те же ответы, что и
+        синхронные, при аутентификации и проверке разрешений через async ORM.
+        """
+        headers = {}
+        if user_role:
+            user = request.getfixturevalue(f"{user_role}_user")
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {utils.generate_jwt(user)}"
+
+        allure.dynamic.title(f"Тест доступа '{user_role}' к {view_class.__name__}")
+
+        view = view_class.as_view()
+        assert asyncio.iscoroutinefunction(view)
+        http_request = APIRequestFactory().get("/", **headers)
+        response = async_to_sync(view)(http_request)
+
+        assert response.status_code == expected_status
+
+
+@pytest.mark.django_db
+@allure.feature("Authorization (RBAC)")
+class TestAuthorizeBatch:
+
+    url = "/api/auth/authorize/batch/"
+
+    @allure.story("Batch Authorization")
+    @allure.title("Тест пакетной проверки прав менеджера")
+    def test_batch_decisions_match_has_permission(self, manager_client, manager_user):
+        checks = [
+            ["products", "create"],
+            ["products", "read_all"],
+            ["orders", "update_own", manager_user.id],
+            ["orders", "update_own", manager_user.id + 1000],
+            {"business_object": "users", "action": "read_own"},
+            {"business_object": "users", "action": "delete_all"},
+            ["unknown", "read_all"],
+        ]
+        response = manager_client.post(self.url, {"checks": checks}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [True, True, True, False, True, False, False]
+
+    @allure.story("Batch Authorization")
+    @allure.title("Тест действий, не зависящих от владельца объекта")
+    def test_batch_owner_independent_actions(self, manager_client, manager_user):
+        Permission.objects.filter(
+            role__name="Manager", business_object__code="orders"
+        ).update(can_update_all=True)
+        rbac.bump_generation()
+        other = manager_user.id + 1000
+        checks = [
+            ["orders", "update_all", other],
+            ["orders", "update_own", other],
+            ["orders", "read_all", other],
+            ["orders", "create", other],
+            ["orders", "delete_all", other],
+            ["orders", "delete_own", manager_user.id],
+        ]
+        response = manager_client.post(self.url, {"checks": checks}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [True, True, True, True, False, False]
+
+    @allure.story("Batch Authorization")
+    @allure.title("Тест ограничения размера пакета и проверки формата")
+    def test_batch_validation(self, settings, user_client):
+        settings.AUTHORIZE_BATCH_MAX_CHECKS = 2
+        checks = [["orders", "read_all"]] * 3
+        response = user_client.post(self.url, {"checks": checks}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = user_client.post(
+            self.url, {"checks": [["orders", "fly"]]}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @allure.story("Batch Authorization")
+    @allure.title("Тест запрета пакетной проверки без аутентификации")
+    def test_batch_requires_authentication(self, api_client):
+        response = api_client.post(self.url, {"checks": []}, format="json")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+@allure.feature("Authorization (RBAC)")
+class TestOwnershipFiltering:
+
+    def make_view(self, code, action="list"):
+        return SimpleNamespace(
+            action=action,
+            business_object_code=code,
+            owner_field="id",
+            ownership_aware=True,
+        )
+
+    def filter_for(self, user, view):
+        request = SimpleNamespace(user=user)
+        return OwnershipFilterBackend().filter_queryset(
+            request, User.objects.all(), view
+        )
+
+    @allure.story("Ownership Filtering")
+    @allure.title("Тест фильтрации списка по праву read_own и read_all")
+    def test_filter_follows_own_and_all_flags(self, manager_user, user_user):
+        users_view = self.make_view("users")
+
+        own = self.filter_for(user_user, users_view)
+        assert list(own.values_list("id", flat=True)) == [user_user.id]
+
+        everyone = self.filter_for(manager_user, users_view)
+        assert everyone.count() == User.objects.count()
+
+        nothing = self.filter_for(user_user, self.make_view("products"))
+        assert not nothing.exists()
+
+    @allure.story("Ownership Filtering")
+    @allure.title("Тест доступа к списку владельца с правом read_own")
+    def test_list_allowed_with_read_own_on_ownership_aware_view(self, user_user):
+        request = SimpleNamespace(user=user_user)
+        view = self.make_view("users")
+        assert HasPermission().has_permission(request, view)
+
+        view.ownership_aware = False
+        assert not HasPermission().has_permission(request, view)
+
+
+# Конкретный наследник OwnedModel для тестов. Модель не регистрируется
+# в приложении, ее таблица создается фикстурой.
+with isolate_apps("auth_system"):
+
+    class OwnedNoteWithLongClassName(OwnedModel):
+        text = models.CharField(max_length=50, blank=True)
+
+        class Meta(OwnedModel.Meta):
+            app_label = "auth_system"
+
+
+class OwnedNoteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OwnedNoteWithLongClassName
+        fields = ["id", "owner", "text"]
+
+
+class OwnedNoteViewSet(OwnedQuerysetMixin, ReadOnlyModelViewSet):
+    queryset = OwnedNoteWithLongClassName.objects.order_by("id")
+    serializer_class = OwnedNoteSerializer
+    permission_classes = [HasPermission]
+    business_object_code = "users"
+
+
+@pytest.mark.django_db
+@allure.feature("Authorization (RBAC)")
+class TestOwnedModel:
+
+    @pytest.fixture
+    def notes(self, manager_user, user_user):
+        with connection.schema_editor() as editor:
+            editor.create_model(OwnedNoteWithLongClassName)
+        for owner in (manager_user, user_user, user_user):
+            OwnedNoteWithLongClassName.objects.create(owner=owner)
+
+    def list_as(self, user):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {utils.generate_jwt(user)}"
+        )
+        return OwnedNoteViewSet.as_view({"get": "list"})(request)
+
+    @allure.story("Owned Models")
+    @allure.title("Тест имени индекса владельца для длинного имени наследника")
+    def test_owner_index_name_fits_limit(self):
+        (index,) = OwnedNoteWithLongClassName._meta.indexes
+        assert index.fields == ["owner", "id"]
+        assert len(index.name) <= 30
+        errors = OwnedNoteWithLongClassName.check()
+        assert not [error for error in errors if error.id == "models.E034"]
+
+    @allure.story("Owned Models")
+    @allure.title("Тест списка наследника OwnedModel с фильтрацией по владельцу")
+    def test_list_filtered_by_owner(self, notes, manager_user, user_user):
+        response = self.list_as(user_user)
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["owner"] for row in response.data["results"]] == [
+            user_user.id,
+            user_user.id,
+        ]
+
+        response = self.list_as(manager_user)
+        assert len(response.data["results"]) == 3
+
+
+@pytest.mark.django_db
+@allure.feature("RBAC Management")
+class TestPermissionMatrixImport:
+
+    url = "/api/auth/permissions/matrix/"
+
+    @allure.story("Bulk Import")
+    @allure.title("Тест импорта полной матрицы с одним увеличением поколения")
+    def test_import_applies_diff_and_bumps_once(self, admin_client):
+        rows = admin_client.get(self.url).json()
+        for row in rows:
+            if (row["role"], row["business_object"]) == ("User", "products"):
+                row["can_read_all"] = True
+        rows = [
+            row
+            for row in rows
+            if (row["role"], row["business_object"]) != ("User", "orders")
+        ]
+        before = rbac.current_generation()
+
+        response = admin_client.post(
+            self.url + "import/", {"permissions": rows}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["updated"] == 1
+        assert response.data["deleted"] == 1
+        assert response.data["created"] == 0
+        assert rbac.current_generation() == before + 1
+        assert not Permission.objects.filter(
+            role__name="User", business_object__code="orders"
+        ).exists()
+        user_products = Permission.objects.get(
+            role__name="User", business_object__code="products"
+        )
+        assert user_products.can_read_all
+
+    @allure.story("Bulk Import")
+    @allure.title("Тест выгрузки и загрузки матрицы командой в формате CSV")
+    def test_command_csv_round_trip(self, tmp_path):
+        from django.core.management import call_command
+
+        path = tmp_path / "matrix.csv"
+        call_command("permission_matrix", "export", str(path))
+        before = rbac.current_generation()
+
+        call_command("permission_matrix", "import", str(path))
+        assert rbac.current_generation() == before
+
+        content = path.read_text()
+        path.write_text(content.replace("Manager,users,false", "Manager,users,true"))
+        call_command("permission_matrix", "import", str(path))
+        assert Permission.objects.get(
+            role__name="Manager", business_object__code="users"
+        ).can_create
+        assert rbac.current_generation() == before + 1
+
+    @allure.story("Bulk Import")
+    @allure.title("Тест отклонения матрицы с неизвестной ролью")
+    def test_import_rejects_unknown_role(self, admin_client):
+        rows = [{"role": "Ghost", "business_object": "orders", "can_create": True}]
+        response = admin_client.post(
+            self.url + "import/", {"permissions": rows}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @allure.story("Bulk Import")
+    @allure.title("Тест прав на создание, изменение и удаление для импорта")
+    def test_import_requires_create_update_and_delete(self, manager_client):
+        permission = Permission.objects.create(
+            role=Role.objects.get(name="Manager"),
+            business_object=BusinessObject.objects.get_or_create(
+                code="permissions", defaults={"name": "Permissions"}
+            )[0],
+            can_read_all=True,
+            can_update_all=True,
+        )
+        rows = [{"role": "User", "business_object": "orders", "can_create": True}]
+
+        def post():
+            return manager_client.post(
+                self.url + "import/?partial=true", {"permissions": rows}, format="json"
+            )
+
+        assert post().status_code == status.HTTP_403_FORBIDDEN
+        permission.can_create = permission.can_delete_all = True
+        permission.save()
+        assert post().status_code == status.HTTP_200_OK
+
+    @allure.story("Bulk Import")
+    @allure.title("Тест сравнения матрицы под блокировкой в транзакции импорта")
+    def test_import_diffs_under_lock(self, monkeypatch):
+        rows = [{"role": "User", "business_object": "orders", "can_create": True}]
+        with CaptureQueriesContext(connection) as context:
+            permission_matrix.import_matrix(rows, delete_missing=False)
+        sql = [query["sql"] for query in context.captured_queries]
+        locks = [q for q in sql if "FOR UPDATE" in q]
+        assert "auth_system_rbacstate" in locks[0]
+        assert "auth_system_permission" in locks[1]
+        assert sql.index(locks[0]) < sql.index(locks[1])
+
+        # Пара, созданная отдельным запросом после сравнения, дает 400, а не 500.
+        diff_matrix = permission_matrix.diff_matrix
+
+        def diff_then_concurrent_create(*args, **kwargs):
+            diff = diff_matrix(*args, **kwargs)
+            Permission.objects.create(role=role, business_object=business_object)
+            return diff
+
+        role = Role.objects.create(name="Concurrent")
+        business_object = BusinessObject.objects.get(code="orders")
+        monkeypatch.setattr(
+            permission_matrix, "diff_matrix", diff_then_concurrent_create
+        )
+        rows = [{"role": "Concurrent", "business_object": "orders"}]
+        with pytest.raises(exceptions.ValidationError):
+            permission_matrix.import_matrix(rows, delete_missing=False)
+
+    @allure.story("Bulk Import")
+    @allure.title("Тест отката импорта при ошибке увеличения поколения")
+    def test_import_rolled_back_when_bump_fails(self, monkeypatch):
+        before = rbac.current_generation()
+
+        invalidate_matrix = rbac.invalidate_matrix
+
+        def fail():
+            # Сбой после UPDATE поколения, но до выхода из транзакции.
+            monkeypatch.setattr(rbac, "invalidate_matrix", invalidate_matrix)
+            raise RuntimeError("bump failed")
+
+        monkeypatch.setattr(rbac, "invalidate_matrix", fail)
+        rows = [{"role": "User", "business_object": "orders", "can_create": True}]
+        with pytest.raises(RuntimeError):
+            permission_matrix.import_matrix(rows, delete_missing=False)
+
+        assert not Permission.objects.get(
+            role__name="User", business_object__code="orders"
+        ).can_create
+        assert rbac.current_generation() == before
+
+
+@pytest.mark.django_db
+@allure.feature("RBAC Management")
+class TestSeedData:
+
+    @allure.story("Seed Data")
+    @allure.title("Тест идемпотентной загрузки синтетических данных")
+    def test_seed_is_idempotent_with_synthetic_population(self):
+        from django.core.management import call_command
+
+        call_command("seed_data", users=20, roles=2, objects=3, batch_size=7)
+        users = User.objects.count()
+        permissions = Permission.objects.count()
+        synthetic = User.objects.filter(email__endswith="@synthetic.example.com")
+        assert synthetic.count() == 20
+        assert Permission.objects.filter(role__name="Synthetic Role 2").count() == 7
+
+        call_command("seed_data", users=20, roles=2, objects=3)
+        assert User.objects.count() == users
+        assert Permission.objects.count() == permissions
+
+        synthetic = User.objects.get(email="user1@synthetic.example.com")
+        assert synthetic.check_password("Test123!")
+        assert User.objects.get(email="admin@example.com").check_password("Test123!")
+
+
+@pytest.mark.django_db
+@allure.feature("Authorization (RBAC)")
+class TestRequestContext:
+
+    @allure.story("Request Context")
+    @allure.title("Тест отсутствия запросов при повторных проверках в одном запросе")
+    def test_object_checks_reuse_request_context(
+        self, manager_user, django_assert_num_queries
+    ):
+        token = utils.generate_jwt(manager_user)
+        request = Request(
+            APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        )
+        user, _ = JWTAuthentication().authenticate(request)
+        request.user = user
+        view = SimpleNamespace(action="update", business_object_code="orders")
+        permission = HasPermission()
+        assert permission.has_permission(request, view)
+
+        owners = [manager_user.id + offset for offset in range(100)]
+        objects = [SimpleNamespace(owner_id=owner) for owner in owners]
+        with django_assert_num_queries(0):
+            allowed = [
+                permission.has_object_permission(request, view, obj) for obj in objects
+            ]
+        assert allowed.count(True) == 1
+
+
+@pytest.mark.django_db
+@allure.feature("RBAC Management")
+class TestRBACListings:
+
+    @allure.story("Pagination")
+    @allure.title("Тест курсорной пагинации ролей без OFFSET")
+    def test_roles_cursor_pagination(self, admin_client, query_budget):
+        Role.objects.bulk_create(Role(name=f"Paged {i}") for i in range(25))
+        total = Role.objects.count()
+        # Матрица строится один раз на процесс и в бюджет запроса не входит.
+        rbac.get_matrix()
+
+        ids, url, pages = [], "/api/auth/roles/?page_size=10", 0
+        while url:
+            with query_budget(2, f"GET {url}") as context:
+                response = admin_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert all("OFFSET" not in q["sql"] for q in context.captured_queries)
+            ids.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+            pages += 1
+
+        assert ids == sorted(ids)
+        assert len(ids) == len(set(ids)) == total
+        assert pages == -(-total // 10)
+
+    @allure.story("Sparse Fields")
+    @allure.title("Тест выборки только запрошенных полей разрешений")
+    def test_permissions_sparse_fields(self, admin_client, query_budget):
+        rbac.get_matrix()
+        with query_budget(2, "GET /permissions/?fields=id,role") as context:
+            response = admin_client.get("/api/auth/permissions/?fields=id,role")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"]
+        assert all(set(row) == {"id", "role"} for row in response.data["results"])
+        sql = context.captured_queries[-1]["sql"]
+        assert "can_read_all" not in sql
+        assert "auth_system_businessobject" not in sql
+
+    @allure.story("Sparse Fields")
+    @allure.title("Тест отказа при неизвестном поле в ?fields=")
+    def test_unknown_sparse_field(self, admin_client):
+        response = admin_client.get("/api/auth/roles/?fields=id,password")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in str(response.data["fields"])
+
+    @allure.story("Fast Read Path")
+    @allure.title("Тест совпадения быстрого пути чтения с выводом сериализатора")
+    @pytest.mark.parametrize(
+        "path, model, serializer_class",
+        [
+            ("roles", Role, RoleSerializer),
+            ("business-objects", BusinessObject, BusinessObjectSerializer),
+            ("permissions", Permission, PermissionSerializer),
+        ],
+    )
+    def test_values_path_matches_serializer(
+        self, admin_client, path, model, serializer_class
+    ):
+        instances = model.objects.order_by("id")[:50]
+        expected = serializer_class(instances, many=True).data
+
+        response = admin_client.get(f"/api/auth/{path}/")
+        assert response.json()["results"] == expected
+
+        detail = admin_client.get(f"/api/auth/{path}/{instances[0].id}/")
+        assert detail.json() == serializer_class(instances[0]).data
+        assert admin_client.get(f"/api/auth/{path}/0/").status_code == 404
+
+    @allure.story("Fast Read Path")
+    @allure.title("Тест совпадения быстрого пути профиля с выводом сериализатора")
+    @pytest.mark.parametrize("claims_only", [False, True])
+    def test_profile_matches_serializer(
+        self, settings, user_client, user_user, claims_only
+    ):
+        settings.JWT_CLAIMS_ONLY_AUTH = claims_only
+
+        response = user_client.get("/api/auth/profile/")
+
+        assert response.json() == UserProfileSerializer(user_user).data
+
+
+@allure.feature("Rendering")
+class TestFastJSONRenderer:
+
+    data = {
+        "text": "Привет \u2028 \u2029 \"quoted\"",
+        "when": datetime(2026, 10, 16, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "amount": Decimal("12.50"),
+        "uuid": UUID("12345678-1234-5678-1234-567812345678"),
+        "nested": [{"id": 1, "flags": [True, False, None]}, 2.5],
+        1: "int key",
+    }
+
+    @allure.story("Compatibility")
+    @allure.title("Тест побайтного совпадения с JSONRenderer")
+    def test_matches_json_renderer(self):
+        pytest.importorskip("orjson")
+
+        assert FastJSONRenderer().render(self.data) == JSONRenderer().render(
+            self.data
+        )
+
+    @allure.story("Compatibility")
+    @allure.title("Тест резервного рендеринга без orjson и с отступом")
+    def test_fallback(self, monkeypatch):
+        expected = JSONRenderer().render(self.data, "application/json; indent=2")
+        assert (
+            FastJSONRenderer().render(self.data, "application/json; indent=2")
+            == expected
+        )
+
+        monkeypatch.setattr(renderers, "orjson", None)
+        assert FastJSONRenderer().render(self.data) == JSONRenderer().render(
+            self.data
+        )
+
+    @allure.story("Compatibility")
+    @allure.title("Тест форматирования float и отказа от NaN как в JSONRenderer")
+    def test_floats_rendered_by_json_renderer(self):
+        pytest.importorskip("orjson")
+        data = {"results": [{"big": 1e16, "small": 1e-7, "exact": Decimal("1E+16")}]}
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert b'"big":1e+16' in FastJSONRenderer().render(data)
+        with pytest.raises(ValueError):
+            FastJSONRenderer().render({"value": float("nan")})
+
+    @allure.story("Compatibility")
+    @allure.title("Тест рендеринга данных без float через orjson")
+    def test_orjson_used_without_floats(self, monkeypatch):
+        orjson = pytest.importorskip("orjson")
+        calls = []
+        dumps = orjson.dumps
+        monkeypatch.setattr(
+            orjson, "dumps", lambda *args, **kw: calls.append(1) or dumps(*args, **kw)
+        )
+        data = {"results": [{"id": 1, "name": "Роль", "owner": None}]}
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert len(calls) == 1
+
+
+@pytest.mark.django_db
+@allure.feature("Conditional Requests")
+class TestConditionalRequests:
+
+    @allure.story("RBAC")
+    @allure.title("Тест ответа 304 на список и объект RBAC без выборки данных")
+    @pytest.mark.parametrize("path", ["roles/", "roles/{role}/", "permissions/"])
+    def test_rbac_not_modified(self, admin_client, query_budget, path):
+        role = Role.objects.order_by("id").first()
+        url = "/api/auth/" + path.format(role=role.id)
+        response = admin_client.get(url)
+        etag = response["ETag"]
+        assert response["Cache-Control"] == "private, no-cache"
+
+        with query_budget(2, f"GET {url} If-None-Match") as context:
+            response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert not response.content
+        assert all("auth_system_role" not in q["sql"] for q in context.captured_queries)
+
+    @allure.story("RBAC")
+    @allure.title("Тест смены ETag RBAC после изменения и для другого URL")
+    def test_rbac_etag_changes(self, admin_client):
+        etag = admin_client.get("/api/auth/roles/")["ETag"]
+        assert admin_client.get("/api/auth/roles/?page_size=5")["ETag"] != etag
+
+        response = admin_client.post("/api/auth/roles/", {"name": "Fresh"})
+        assert response.status_code == status.HTTP_201_CREATED
+        response = admin_client.get("/api/auth/roles/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+        assert "Fresh" in [row["name"] for row in response.data["results"]]
+
+    @allure.story("RBAC")
+    @allure.title("Тест: If-None-Match: * не дает 304 и не скрывает 404")
+    def test_rbac_star_is_not_a_match(self, admin_client):
+        role = Role.objects.order_by("id").first()
+        response = admin_client.get(
+            f"/api/auth/roles/{role.id}/", HTTP_IF_NONE_MATCH="*"
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = admin_client.get("/api/auth/roles/999999/", HTTP_IF_NONE_MATCH="*")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @allure.story("RBAC")
+    @allure.title("Тест ETag ответа 200 суперпользователю без запроса поколения")
+    def test_superuser_etag_without_generation_query(self, admin_client, query_budget):
+        rbac.get_matrix()
+        with query_budget(2, "GET /roles/") as context:
+            response = admin_client.get("/api/auth/roles/")
+        assert all("rbacstate" not in q["sql"] for q in context.captured_queries)
+
+        response = admin_client.get(
+            "/api/auth/roles/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @allure.story("RBAC")
+    @allure.title("Тест проверки прав до ответа 304")
+    def test_rbac_not_modified_requires_permission(self, admin_client, user_client):
+        etag = admin_client.get("/api/auth/roles/")["ETag"]
+
+        response = user_client.get("/api/auth/roles/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @allure.story("Profile")
+    @allure.title("Тест ответа 304 на профиль и смены ETag после обновления")
+    @pytest.mark.parametrize("claims_only", [False, True])
+    def test_profile_etag(self, settings, user_client, claims_only):
+        settings.JWT_CLAIMS_ONLY_AUTH = claims_only
+        etag = user_client.get("/api/auth/profile/")["ETag"]
+
+        response = user_client.get(
+            "/api/auth/profile/", HTTP_IF_NONE_MATCH=f"W/{etag}"
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        user_client.patch("/api/auth/profile/", {"first_name": "Changed"})
+        response = user_client.get("/api/auth/profile/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["first_name"] == "Changed"
+        assert response["ETag"] != etag
+
+    @allure.story("Profile")
+    @allure.title("Тест ответа 304 асинхронного представления профиля")
+    @pytest.mark.parametrize("claims_only", [False, True])
+    def test_async_profile_etag(self, settings, user_user, user_client, claims_only):
+        settings.JWT_CLAIMS_ONLY_AUTH = claims_only
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {utils.generate_jwt(user_user)}"}
+        view = async_to_sync(AsyncProfileView.as_view())
+
+        response = view(APIRequestFactory().get("/", **headers))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["email"] == user_user.email
+        etag = response["ETag"]
+        assert etag == user_client.get("/api/auth/profile/")["ETag"]
+
+        request = APIRequestFactory().get("/", HTTP_IF_NONE_MATCH=etag, **headers)
+        response = view(request)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,251 @@
+import allure
+import pytest
+from django.urls import URLPattern, URLResolver
+
+from auth_system import rbac, urls, utils
+from auth_system.blacklist import revoked_tokens
+from auth_system.models import BusinessObject, Permission, Role
+from auth_system.views import PermissionViewSet
+
+API = "/api/auth/"
+MATRIX_ROW = {"role": "Budget Role", "business_object": "budget", "can_create": True}
+
+# (маршрут, метод, путь, клиент, тело запроса, бюджет SQL-запросов).
+# Путь задается относительно API; путь и тело могут ссылаться на объекты
+# фикстуры objects. Бюджеты включают SAVEPOINT/RELEASE, которые выполняет
+# atomic() внутри теста.
+#
+# Бюджеты — измеренное число запросов в режиме по умолчанию (пользователь
+# загружается из БД), а не цель: любой лишний запрос роняет тест. Почти
+# каждый аутентифицированный запрос платит как минимум два запроса — загрузку
+# пользователя и чтение поколения RBAC, по которому проверяется актуальность
+# матрицы прав процесса. Ниже двух этих запросов не опуститься, пока
+# пользователь читается из БД; в режиме JWT_CLAIMS_ONLY_AUTH загрузки
+# пользователя нет и списки под RBAC укладываются в один запрос (см.
+# test_claims_only_within_budget).
+ENDPOINTS = [
+    (
+        "register",
+        "post",
+        "register/",
+        "api_client",
+        {
+            "first_name": "Budget",
+            "last_name": "User",
+            "email": "budget@example.com",
+            "password": "Budget123!",
+            "password2": "Budget123!",
+        },
+        2,  # проверка уникальности email + INSERT пользователя
+    ),
+    (
+        "login",
+        "post",
+        "login/",
+        "api_client",
+        {"email": "user@example.com", "password": "Test123!"},
+        # пользователь, его роль, поколение RBAC в claims, INSERT refresh-токена
+        4,
+    ),
+    # поиск токена, SAVEPOINT, пометка использованным, новый токен, RELEASE,
+    # поколение RBAC
+    ("refresh", "post", "refresh/", "api_client", {"refresh": "{refresh}"}, 6),
+    # пользователь, отзыв access-токена, семейство refresh-токена, удаление
+    # семейства
+    ("logout", "post", "logout/", "user_client", {"refresh": "{refresh}"}, 4),
+    ("jwks", "get", "jwks/", "api_client", None, 0),
+    ("metrics", "get", "metrics/", "api_client", None, 0),
+    # только пользователь: профиль не проверяет матрицу прав
+    ("profile", "get", "profile/", "user_client", None, 1),
+    ("profile", "patch", "profile/", "user_client", {"first_name": "B"}, 2),
+    ("profile", "put", "profile/", "user_client", {"first_name": "B"}, 2),
+    # пользователь, деактивация, отзыв всех токенов пользователя
+    # (SAVEPOINT, DELETE, INSERT, RELEASE), удаление refresh-токенов, отзыв
+    # текущего access-токена
+    ("delete-account", "post", "delete-account/", "user_client", None, 8),
+    (
+        "authorize-batch",
+        "post",
+        "authorize/batch/",
+        "manager_client",
+        {"checks": [["products", "read_all"], ["orders", "update_own", 1]]},
+        2,
+    ),
+    ("introspect", "post", "introspect/", "admin_client", {"token": "x"}, 2),
+    # пользователь + поколение RBAC; в режиме claims-only — 1
+    ("product-list", "get", "products/", "manager_client", None, 2),
+    ("order-list", "get", "orders/", "manager_client", None, 2),
+    # пользователь; суперпользователю поколение RBAC не нужно
+    ("api-root", "get", "", "admin_client", None, 1),
+    # чтения RBAC-ресурсов: пользователь + выборка (или поколение для ETag);
+    # изменения добавляют SAVEPOINT/RELEASE, запись и повышение поколения
+    ("role-list", "get", "roles/", "admin_client", None, 2),
+    ("role-list", "post", "roles/", "admin_client", {"name": "New"}, 4),
+    ("role-detail", "get", "roles/{role}/", "admin_client", None, 2),
+    (
+        "role-detail",
+        "put",
+        "roles/{role}/",
+        "admin_client",
+        {"name": "Renamed"},
+        5,
+    ),
+    ("role-detail", "delete", "roles/{role}/", "admin_client", None, 8),
+    ("businessobject-list", "get", "business-objects/", "admin_client", None, 2),
+    ("businessobject-detail", "get", "business-objects/{bo}/", "admin_client", None, 2),
+    (
+        "businessobject-detail",
+        "patch",
+        "business-objects/{bo}/",
+        "admin_client",
+        {"name": "Renamed"},
+        4,
+    ),
+    ("permission-list", "get", "permissions/", "admin_client", None, 2),
+    (
+        "permission-list",
+        "post",
+        "permissions/",
+        "admin_client",
+        {"role": "Budget Role", "business_object": "products"},
+        6,
+    ),
+    ("permission-detail", "get", "permissions/{perm}/", "admin_client", None, 2),
+    (
+        "permission-detail",
+        "patch",
+        "permissions/{perm}/",
+        "admin_client",
+        {"can_read_all": True},
+        4,
+    ),
+    ("permission-detail", "delete", "permissions/{perm}/", "admin_client", None, 4),
+    ("permission-export-matrix", "get", "permissions/matrix/", "admin_client", None, 2),
+    (
+        "permission-import-matrix",
+        "post",
+        "permissions/matrix/import/?partial=true",
+        "admin_client",
+        {"permissions": [{**MATRIX_ROW, "can_read_all": True}]},
+        # пользователь, блокировка RBACState, роли, объекты и права под
+        # FOR UPDATE, запись изменений и повышение поколения
+        9,
+    ),
+]
+
+
+def route_names(patterns) -> set:
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def fill(value, objects: dict):
+    if isinstance(value, str):
+        return value.format(**objects)
+    if isinstance(value, dict):
+        return {key: fill(item, objects) for key, item in value.items()}
+    return value
+
+
+@pytest.fixture
+def objects(user_user):
+    role = Role.objects.create(name="Budget Role")
+    business_object = BusinessObject.objects.create(code="budget", name="Budget")
+    permission = Permission.objects.create(role=role, business_object=business_object)
+    return {
+        "role": role.id,
+        "bo": business_object.id,
+        "perm": permission.id,
+        "refresh": utils.issue_refresh_token(user_user),
+    }
+
+
+@pytest.mark.django_db
+@allure.feature("Query Budgets")
+class TestQueryBudgets:
+
+    @allure.story("Coverage")
+    @allure.title("Тест наличия бюджета для каждого маршрута auth_system.urls")
+    def test_every_route_has_budget(self):
+        missing = route_names(urls.urlpatterns) - {entry[0] for entry in ENDPOINTS}
+        assert not missing
+
+    @allure.story("Endpoints")
+    @allure.title("Тест числа SQL-запросов эндпоинта в пределах бюджета")
+    @pytest.mark.parametrize(
+        "route, method, path, client_name, data, budget",
+        ENDPOINTS,
+        ids=[f"{entry[1]}-{entry[0]}" for entry in ENDPOINTS],
+    )
+    def test_endpoint_within_budget(
+        self, request, query_budget, objects, route, method, path, client_name,
+        data, budget,
+    ):
+        client = request.getfixturevalue(client_name)
+        path = API + fill(path, objects)
+        kwargs = {} if data is None else {"data": fill(data, objects), "format": "json"}
+        # Матрица прав и множество отозванных токенов строятся один раз
+        # на процесс и в бюджет запроса не входят.
+        rbac.get_matrix()
+        revoked_tokens.sync(force=True)
+
+        with query_budget(budget, f"{method.upper()} {path}"):
+            response = getattr(client, method)(path, **kwargs)
+
+        assert response.status_code < 400 or route == "metrics", response.content
+
+    @allure.story("Endpoints")
+    @allure.title("Тест одного SQL-запроса списков под RBAC в режиме claims-only")
+    @pytest.mark.parametrize("path", ["products/", "orders/"])
+    def test_claims_only_within_budget(
+        self, settings, manager_client, query_budget, path
+    ):
+        settings.JWT_CLAIMS_ONLY_AUTH = True
+        rbac.get_matrix()
+        revoked_tokens.sync(force=True)
+
+        # Единственный запрос — поколение RBAC, общее для проверки токена
+        # и прав.
+        with query_budget(1, f"GET {API}{path}"):
+            response = manager_client.get(API + path)
+
+        assert response.status_code == 200
+
+    @allure.story("Lists")
+    @allure.title("Тест независимости числа запросов списков от числа строк")
+    @pytest.mark.parametrize("path", ["roles/", "business-objects/", "permissions/"])
+    def test_list_queries_do_not_grow_with_rows(
+        self, admin_client, query_budget, path
+    ):
+        def count_queries() -> int:
+            rbac.get_matrix()
+            with query_budget(10, f"GET {API}{path}") as context:
+                assert admin_client.get(API + path).status_code == 200
+            return len(context.captured_queries)
+
+        before = count_queries()
+        roles = Role.objects.bulk_create(Role(name=f"Bulk {i}") for i in range(20))
+        objects = BusinessObject.objects.bulk_create(
+            BusinessObject(code=f"bulk_{i}", name=f"Bulk {i}") for i in range(5)
+        )
+        Permission.objects.bulk_create(
+            Permission(role=role, business_object=bo)
+            for role in roles
+            for bo in objects
+        )
+        rbac.bump_generation()
+
+        assert count_queries() == before
+
+    @allure.story("Lists")
+    @allure.title("Тест __str__ разрешений из queryset представления без N+1")
+    def test_permission_str_uses_joined_relations(self, query_budget):
+        # Permission.__str__ обращается к role.name и business_object.name.
+        with query_budget(1, "str(Permission) for PermissionViewSet.queryset"):
+            labels = [str(perm) for perm in PermissionViewSet.queryset.all()]
+        assert labels
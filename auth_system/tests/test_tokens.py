@@ -0,0 +1,367 @@
+import json
+import os
+
+import allure
+import jwt
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework import status
+
+from auth_system import instrumentation, keys, rbac, utils
+from auth_system.authentication import JWTAuthentication
+from auth_system.models import Role
+from auth_system.token_cache import decoded_tokens
+
+
+def make_jwk(algorithm_class, private_key, kid, alg):
+    data = json.loads(algorithm_class.to_jwk(private_key))
+    data.update({"kid": kid, "alg": alg, "use": "sig"})
+    return data
+
+
+@pytest.fixture
+def jwks_file(tmp_path, settings):
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    path = tmp_path / "jwks.json"
+    path.write_text(
+        json.dumps(
+            {
+                "keys": [
+                    make_jwk(RSAAlgorithm, rsa_key, "rsa-2026", "RS256"),
+                    make_jwk(OKPAlgorithm, ed_key, "ed-2026", "EdDSA"),
+                ]
+            }
+        )
+    )
+    settings.JWT_JWKS_FILE = str(path)
+    settings.JWT_ACCEPTED_ALGORITHMS = ["RS256", "EdDSA", "HS256"]
+    return path
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestAsymmetricTokens:
+
+    @pytest.mark.parametrize(
+        "algorithm, kid", [("RS256", "rsa-2026"), ("EdDSA", "ed-2026")]
+    )
+    @allure.story("Asymmetric Signing")
+    @allure.title("Тест подписи и проверки токена асимметричным ключом")
+    def test_sign_and_verify(
+        self, settings, jwks_file, api_client, user_user, algorithm, kid
+    ):
+        settings.JWT_ALGORITHM = algorithm
+        settings.JWT_SIGNING_KEY_ID = kid
+
+        token = utils.generate_jwt(user_user)
+        assert jwt.get_unverified_header(token)["kid"] == kid
+        assert utils.decode_jwt(token)["user_id"] == user_user.pk
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        assert api_client.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+
+    @allure.story("Asymmetric Signing")
+    @allure.title("Тест проверки токенов, выпущенных до ротации ключа")
+    def test_rotation_window(self, settings, jwks_file, user_user):
+        settings.JWT_ALGORITHM = "HS256"
+        old_token = utils.generate_jwt(user_user)
+
+        settings.JWT_ALGORITHM = "RS256"
+        settings.JWT_SIGNING_KEY_ID = "rsa-2026"
+        new_token = utils.generate_jwt(user_user)
+
+        assert utils.decode_jwt(old_token) is not None
+        assert utils.decode_jwt(new_token) is not None
+
+        settings.JWT_ACCEPTED_ALGORITHMS = ["RS256", "EdDSA"]
+        assert utils.decode_jwt(old_token) is None
+
+    @allure.story("Asymmetric Signing")
+    @allure.title("Тест публикации только публичных ключей")
+    def test_jwks_endpoint_hides_private_members(self, jwks_file, api_client):
+        response = api_client.get("/api/auth/jwks/")
+        assert response.status_code == status.HTTP_200_OK
+        kids = {key["kid"] for key in response.data["keys"]}
+        assert kids == {"rsa-2026", "ed-2026"}
+        for key in response.data["keys"]:
+            assert "d" not in key
+
+    @allure.story("Asymmetric Signing")
+    @allure.title("Тест сохранения прежних ключей при некорректном файле JWKS")
+    def test_invalid_reload_keeps_previous_keys(
+        self, settings, jwks_file, user_user, monkeypatch
+    ):
+        settings.JWT_ALGORITHM = "RS256"
+        settings.JWT_SIGNING_KEY_ID = "rsa-2026"
+        token = utils.generate_jwt(user_user)
+        keyset = keys.get_keyset()
+        monkeypatch.setattr(keys, "RELOAD_CHECK_SECONDS", 0)
+
+        content = jwks_file.read_text()
+        jwks_file.write_text(content[: len(content) // 2])
+        os.utime(jwks_file, (1, 1))
+        assert utils.decode_jwt(token)["user_id"] == user_user.pk
+
+        jwks_file.write_text(json.dumps({"keys": []}))
+        os.utime(jwks_file, (2, 2))
+        assert utils.decode_jwt(token) is None
+        assert keyset.public_jwks() == {"keys": []}
+
+    @allure.story("Asymmetric Signing")
+    @allure.title("Тест ошибки конфигурации при некорректном файле JWKS до загрузки")
+    def test_invalid_initial_jwks(self, settings, tmp_path):
+        path = tmp_path / "broken.json"
+        path.write_text("{")
+        settings.JWT_JWKS_FILE = str(path)
+
+        with pytest.raises(ImproperlyConfigured):
+            keys.get_keyset().public_jwks()
+
+
+@pytest.mark.django_db
+@allure.feature("Authentication")
+class TestDecodedTokenCache:
+
+    @allure.story("Decoded Token Cache")
+    @allure.title("Тест повторного использования проверенной полезной нагрузки")
+    def test_cache_hit_and_eviction_on_logout(self, api_client, user_user):
+        decoded_tokens.clear()
+        token = utils.generate_jwt(user_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        assert api_client.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+        assert api_client.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+        assert decoded_tokens.stats()["hits"] == 1
+        assert decoded_tokens.stats()["size"] == 1
+
+        assert api_client.post("/api/auth/logout/").status_code == status.HTTP_200_OK
+        assert decoded_tokens.get(token) is None
+        assert api_client.get("/api/auth/profile/").status_code == (
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    @allure.story("Decoded Token Cache")
+    @allure.title("Тест вытеснения старых записей при переполнении")
+    def test_cache_is_bounded(self, settings):
+        settings.JWT_DECODE_CACHE_SIZE = 2
+        decoded_tokens.clear()
+        for index in range(3):
+            decoded_tokens.put(
+                f"token-{index}",
+                {"jti": str(index), "exp": 2**40},
+                ("HS256", None, "secret"),
+            )
+
+        assert decoded_tokens.get("token-0") is None
+        assert decoded_tokens.get("token-2") is not None
+        assert decoded_tokens.stats()["evictions"] == 1
+
+    @allure.story("Decoded Token Cache")
+    @allure.title("Тест повторной проверки алгоритма и kid при попадании в кэш")
+    def test_cache_hit_rechecks_algorithm_and_kid(
+        self, settings, jwks_file, user_user, monkeypatch
+    ):
+        decoded_tokens.clear()
+        monkeypatch.setattr(keys, "RELOAD_CHECK_SECONDS", 0)
+        authentication = JWTAuthentication()
+        settings.JWT_ALGORITHM = "HS256"
+        hs_token = utils.generate_jwt(user_user)
+        settings.JWT_ALGORITHM = "RS256"
+        settings.JWT_SIGNING_KEY_ID = "rsa-2026"
+        rs_token = utils.generate_jwt(user_user)
+        assert authentication.decode(hs_token) and authentication.decode(rs_token)
+        assert decoded_tokens.stats()["size"] == 2
+
+        settings.JWT_ACCEPTED_ALGORITHMS = ["RS256", "EdDSA"]
+        assert authentication.decode(hs_token) is None
+        assert authentication.decode(rs_token) is not None
+
+        document = json.loads(jwks_file.read_text())
+        document["keys"] = [k for k in document["keys"] if k["kid"] != "rsa-2026"]
+        jwks_file.write_text(json.dumps(document))
+        os.utime(jwks_file, (1, 1))
+        assert authentication.decode(rs_token) is None
+        assert decoded_tokens.stats()["size"] == 0
+
+
+@pytest.mark.django_db
+@allure.feature("Token Introspection")
+class TestIntrospection:
+
+    url = "/api/auth/introspect/"
+
+    @allure.story("Active Token")
+    @allure.title("Тест интроспекции действующего токена менеджера")
+    def test_active_token_returns_claims_and_flags(self, admin_client, manager_user):
+        token = utils.generate_jwt(manager_user)
+        response = admin_client.post(self.url, {"token": token}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["active"] is True
+        assert response.data["user_id"] == manager_user.id
+        assert response.data["role"] == "Manager"
+        permissions = response.data["permissions"]
+        assert permissions["products"]["create"] is True
+        assert permissions["users"]["read_all"] is True
+        assert permissions["users"]["delete_all"] is False
+        assert permissions["introspection"]["read_all"] is False
+        assert response["ETag"]
+        assert response["Cache-Control"].startswith("private, max-age=")
+
+    @allure.story("Active Token")
+    @allure.title("Тест согласованности роли и прав после смены роли")
+    def test_role_reflects_current_user(self, admin_client, manager_user):
+        token = utils.generate_jwt(manager_user)
+        user_role = Role.objects.get(name="User")
+        manager_user.role = user_role
+        manager_user.save()
+
+        response = admin_client.post(self.url, {"token": token}, format="json")
+        assert response.data["role"] == "User"
+        assert response.data["role_id"] == user_role.id
+        assert response.data["permissions"]["products"]["create"] is False
+
+    @allure.story("Inactive Token")
+    @allure.title("Тест интроспекции отозванного и поддельного токенов")
+    def test_revoked_and_invalid_tokens_are_inactive(
+        self, admin_client, api_client, user_user
+    ):
+        token = utils.generate_jwt(user_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        api_client.post("/api/auth/logout/")
+
+        response = admin_client.post(self.url, {"token": token}, format="json")
+        assert response.data == {"active": False}
+
+        response = admin_client.post(self.url, {"token": "garbage"}, format="json")
+        assert response.data == {"active": False}
+
+    @allure.story("Caching")
+    @allure.title("Тест ответа 304 и смены ETag при изменении RBAC")
+    def test_etag_follows_rbac_generation(self, admin_client, manager_user):
+        token = utils.generate_jwt(manager_user)
+        first = admin_client.post(self.url, {"token": token}, format="json")
+        etag = first["ETag"]
+
+        cached = admin_client.post(
+            self.url, {"token": token}, format="json", HTTP_IF_NONE_MATCH=etag
+        )
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+        rbac.bump_generation()
+        changed = admin_client.post(
+            self.url, {"token": token}, format="json", HTTP_IF_NONE_MATCH=etag
+        )
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed["ETag"] != etag
+
+    @allure.story("Access Control")
+    @allure.title("Тест запрета интроспекции без права introspection")
+    def test_requires_introspection_permission(self, manager_client, user_user):
+        token = utils.generate_jwt(user_user)
+        response = manager_client.post(self.url, {"token": token}, format="json")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+@allure.feature("Instrumentation")
+class TestInstrumentation:
+
+    @pytest.fixture(autouse=True)
+    def reset_registry(self):
+        instrumentation.registry.reset()
+        yield
+        instrumentation.registry.reset()
+
+    @allure.story("Server-Timing")
+    @allure.title("Тест заголовка Server-Timing с числом запросов и этапами")
+    def test_server_timing_header(self, settings, manager_client):
+        settings.SERVER_TIMING_HEADER = True
+        response = manager_client.get("/api/auth/products/")
+
+        assert response.status_code == status.HTTP_200_OK
+        timing = response["Server-Timing"]
+        assert timing.startswith("db;dur=")
+        for name in ("jwt_decode", "blacklist", "authenticate", "permission", "total"):
+            assert f"{name};dur=" in timing
+
+    @allure.story("Server-Timing")
+    @allure.title("Тест отсутствия заголовка и метрик по умолчанию")
+    def test_disabled_by_default(self, api_client, manager_client):
+        response = manager_client.get("/api/auth/products/")
+
+        assert "Server-Timing" not in response
+        assert api_client.get("/api/auth/metrics/").status_code == 404
+
+    @allure.story("Prometheus")
+    @allure.title("Тест метрик Prometheus по эндпоинтам")
+    def test_metrics_endpoint(self, settings, api_client, manager_client):
+        settings.METRICS_ENABLED = True
+        settings.JWT_CLAIMS_ONLY_AUTH = True
+        decoded_tokens.clear()
+        # Первый запрос прогревает матрицу и множество отозванных токенов.
+        manager_client.get("/api/auth/products/")
+        instrumentation.registry.reset()
+        manager_client.get("/api/auth/products/")
+        manager_client.get("/api/auth/products/")
+
+        response = api_client.get("/api/auth/metrics/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/plain")
+        text = response.content.decode()
+        assert (
+            'auth_request_duration_seconds_count{endpoint="product-list",'
+            'method="GET",status="200"} 2'
+        ) in text
+        assert 'auth_db_queries_total{endpoint="product-list"} 2' in text
+        assert (
+            'auth_stage_duration_seconds_count{endpoint="product-list",'
+            'stage="jwt_decode"} 2'
+        ) in text
+        assert "auth_login_throttle_allowed 0" in text
+        assert "auth_token_cache_hits 2" in text
+
+    @allure.story("Prometheus")
+    @allure.title("Тест доступа к метрикам только для адресов сборщика или по токену")
+    def test_metrics_restricted_to_scraper(self, settings, api_client):
+        settings.METRICS_ENABLED = True
+        settings.METRICS_ALLOWED_IPS = ["10.0.0.5"]
+        settings.METRICS_TOKEN = ""
+        url = "/api/auth/metrics/"
+        assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+        response = api_client.get(url, REMOTE_ADDR="10.0.0.5")
+        assert response.status_code == status.HTTP_200_OK
+
+        settings.METRICS_TOKEN = "scrape-secret"
+        response = api_client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        response = api_client.get(url, HTTP_AUTHORIZATION="Bearer scrape-secret")
+        assert response.status_code == status.HTTP_200_OK
+
+    @allure.story("Server-Timing")
+    @allure.title("Тест асинхронной цепочки middleware без адаптации")
+    def test_async_middleware(self, settings):
+        settings.SERVER_TIMING_HEADER = True
+
+        async def view(request):
+            with instrumentation.stage("authenticate"):
+                await Role.objects.acount()
+            return HttpResponse()
+
+        middleware = instrumentation.InstrumentationMiddleware(view)
+        assert iscoroutinefunction(middleware)
+
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+
+        timing = response["Server-Timing"]
+        assert 'desc="1 queries"' in timing
+        assert "authenticate;dur=" in timing
@@ -0,0 +1,305 @@
+"""
+Ограничение частоты попыток входа.
+
+Попытки входа ограничиваются скользящим окном по IP-адресу клиента и по
+электронной почте, а после неудачных попыток для учетной записи действует
+экспоненциальная задержка. Проверка выполняется классом LoginThrottle до
+вызова authenticate(), поэтому отклоненная попытка не стоит ни запроса
+к БД, ни вычисления хэша пароля.
+
+Состояние хранится в подключаемом хранилище: LocalWindowStore — в памяти
+процесса (по умолчанию), CacheWindowStore — в кэше Django, общем для всех
+процессов (например, Redis; в разработке его заменяет LocMemCache).
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str | None) -> tuple[int, int] | None:
+    """
+    Разбирает ограничение вида "5/min" в пару (число попыток, окно в секундах).
+    Пустое значение отключает ограничение.
+    """
+    if not rate:
+        return None
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+def normalize_email(email) -> str | None:
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return email.strip().lower()
+
+
+class LocalWindowStore:
+    """
+    Хранилище в памяти процесса: точное скользящее окно по журналу попыток.
+    """
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._hits: dict[str, deque] = {}
+        self._failures: dict[str, tuple[int, float, float]] = {}
+        self._ops = 0
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> float | None:
+        """
+        Регистрирует попытку. Возвращает None, если она разрешена, иначе
+        число секунд до освобождения места в окне.
+        """
+        with self._lock:
+            self._ops += 1
+            if self._ops % self.SWEEP_EVERY == 0:
+                self._sweep(now, window)
+            hits = self._hits.setdefault(key, deque())
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0] + window - now
+            hits.append(now)
+            return None
+
+    def _sweep(self, now: float, window: int) -> None:
+        stale = [
+            key
+            for key, hits in self._hits.items()
+            if not hits or hits[-1] <= now - window
+        ]
+        for key in stale:
+            del self._hits[key]
+        expired = [key for key, state in self._failures.items() if state[2] <= now]
+        for key in expired:
+            del self._failures[key]
+
+    def get_failures(self, key: str, now: float) -> tuple[int, float]:
+        """
+        Возвращает число неудачных попыток подряд и время последней из них.
+        """
+        with self._lock:
+            count, last_at, expires = self._failures.get(key, (0, 0.0, 0.0))
+            return (count, last_at) if expires > now else (0, 0.0)
+
+    def add_failure(self, key: str, ttl: int, now: float) -> int:
+        with self._lock:
+            count, _, expires = self._failures.get(key, (0, 0.0, 0.0))
+            count = count + 1 if expires > now else 1
+            self._failures[key] = (count, now, now + ttl)
+            return count
+
+    def reset_failures(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hits.clear()
+            self._failures.clear()
+
+
+class CacheWindowStore:
+    """
+    Хранилище в кэше Django, общее для процессов. Скользящее окно
+    приближается двумя соседними счетчиками фиксированных окон:
+    счетчик предыдущего окна учитывается с весом непрошедшей его доли.
+    Ключи хэшируются, чтобы адреса почты не попадали в общий кэш.
+    """
+
+    prefix = "login-throttle"
+
+    def __init__(self, alias: str = "default"):
+        self.cache = caches[alias]
+
+    def _key(self, kind: str, key: str, suffix="") -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f"{self.prefix}:{kind}:{digest}{suffix}"
+
+    def _incr(self, key: str, ttl: int) -> int:
+        if self.cache.add(key, 1, ttl):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, ttl)
+            return 1
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> float | None:
+        current = int(now // window)
+        elapsed = now - current * window
+        previous = self.cache.get(self._key("hit", key, f":{current - 1}"), 0)
+        count = self.cache.get(self._key("hit", key, f":{current}"), 0)
+        weight = 1 - elapsed / window
+        if count + previous * weight >= limit:
+            # Верхняя оценка: к началу следующего окна вес текущего
+            # счетчика станет меньше единицы.
+            return window - elapsed
+        self._incr(self._key("hit", key, f":{current}"), 2 * window)
+        return None
+
+    def get_failures(self, key: str, now: float) -> tuple[int, float]:
+        return tuple(self.cache.get(self._key("fail", key), (0, 0.0)))
+
+    def add_failure(self, key: str, ttl: int, now: float) -> int:
+        # Чтение и запись не атомарны: при одновременных неудачах в разных
+        # процессах счетчик может отстать на единицу, что для задержки
+        # несущественно.
+        count, _ = self.get_failures(key, now)
+        self.cache.set(self._key("fail", key), (count + 1, now), ttl)
+        return count + 1
+
+    def reset_failures(self, key: str) -> None:
+        self.cache.delete(self._key("fail", key))
+
+    def clear(self) -> None:
+        # Записи истекают сами; общий кэш целиком не очищается.
+        pass
+
+
+class LoginRateLimiter:
+    """
+    Ограничитель попыток входа по IP и электронной почте с экспоненциальной
+    задержкой после неудачных попыток и счетчиками для мониторинга.
+    """
+
+    COUNTERS = (
+        "allowed",
+        "throttled_ip",
+        "throttled_email",
+        "throttled_backoff",
+        "failures",
+        "successes",
+    )
+
+    def __init__(self):
+        self._store = None
+        self._store_config = None
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        config = (
+            getattr(settings, "LOGIN_THROTTLE_STORE", "local"),
+            getattr(settings, "LOGIN_THROTTLE_CACHE", "default"),
+        )
+        if self._store is None or self._store_config != config:
+            backend, alias = config
+            self._store = (
+                CacheWindowStore(alias) if backend == "cache" else LocalWindowStore()
+            )
+            self._store_config = config
+        return self._store
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def backoff_delay(self, failures: int) -> float:
+        """
+        Задержка после failures неудачных попыток подряд: первые
+        LOGIN_BACKOFF_FREE_ATTEMPTS попыток бесплатны, далее задержка
+        удваивается от LOGIN_BACKOFF_BASE до LOGIN_BACKOFF_MAX секунд.
+        """
+        free = int(getattr(settings, "LOGIN_BACKOFF_FREE_ATTEMPTS", 3))
+        if failures <= free:
+            return 0.0
+        base = float(getattr(settings, "LOGIN_BACKOFF_BASE", 1.0))
+        maximum = float(getattr(settings, "LOGIN_BACKOFF_MAX", 900.0))
+        return min(base * 2 ** (failures - free - 1), maximum)
+
+    def check(self, ident: str, email: str | None) -> float | None:
+        """
+        Проверяет попытку входа. Возвращает None, если она разрешена, иначе
+        число секунд, через которое можно повторить попытку.
+        """
+        now = time.time()
+        store = self.store
+
+        if email:
+            failures, last_at = store.get_failures(email, now)
+            retry_at = last_at + self.backoff_delay(failures)
+            if retry_at > now:
+                self._count("throttled_backoff")
+                return retry_at - now
+
+        rate = parse_rate(getattr(settings, "LOGIN_RATE_PER_IP", "20/min"))
+        if rate:
+            wait = store.hit(f"ip:{ident}", *rate, now)
+            if wait is not None:
+                self._count("throttled_ip")
+                return wait
+
+        rate = parse_rate(getattr(settings, "LOGIN_RATE_PER_EMAIL", "5/min"))
+        if email and rate:
+            wait = store.hit(f"email:{email}", *rate, now)
+            if wait is not None:
+                self._count("throttled_email")
+                return wait
+
+        self._count("allowed")
+        return None
+
+    def record_failure(self, email: str | None) -> None:
+        self._count("failures")
+        if email:
+            ttl = int(getattr(settings, "LOGIN_BACKOFF_MAX", 900.0)) * 2
+            self.store.add_failure(email, ttl, time.time())
+
+    def record_success(self, email: str | None) -> None:
+        self._count("successes")
+        if email:
+            self.store.reset_failures(email)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        """
+        Сбрасывает счетчики и состояние локального хранилища.
+        """
+        with self._lock:
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self.store.clear()
+
+
+login_limiter = LoginRateLimiter()
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    DRF-ограничитель для LoginView: отклоняет попытку до аутентификации.
+    """
+
+    def get_ident(self, request) -> str:
+        """
+        IP-адрес клиента. X-Forwarded-For учитывается, только если задан
+        NUM_PROXIES в REST_FRAMEWORK: иначе клиент мог бы подставлять в
+        заголовок произвольные адреса и обходить ограничение по IP.
+        """
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR", "")
+        return super().get_ident(request)
+
+    def allow_request(self, request, view) -> bool:
+        data = request.data if hasattr(request.data, "get") else {}
+        self._wait = login_limiter.check(
+            self.get_ident(request), normalize_email(data.get("email"))
+        )
+        return self._wait is None
+
+    def wait(self) -> float | None:
+        return math.ceil(self._wait) if self._wait else None
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from django.conf import settings
+
+
+class DecodedTokenCache:
+    """
+    Ограниченный LRU-кэш уже проверенных полезных нагрузок JWT.
+
+    Ключом служит SHA-256 от исходного токена, поэтому сами токены в памяти
+    не хранятся. Запись живет не дольше утверждения exp токена и удаляется
+    при отзыве токена по его JTI. Вместе с полезной нагрузкой хранятся
+    алгоритм, kid и ключ, которым проверялась подпись: при каждом попадании
+    они сверяются с текущими настройками и набором ключей, так что удаление
+    kid из JWKS или сужение JWT_ACCEPTED_ALGORITHMS действует сразу.
+    Счетчики попаданий и промахов позволяют подобрать размер кэша
+    (JWT_DECODE_CACHE_SIZE).
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[bytes, tuple[dict, tuple]] = OrderedDict()
+        self._keys_by_jti: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @staticmethod
+    def _maxsize() -> int:
+        return int(getattr(settings, "JWT_DECODE_CACHE_SIZE", 10000))
+
+    def get(self, token: str, current_key: Callable | None = None) -> dict | None:
+        """
+        Возвращает полезную нагрузку из кэша или None при промахе.
+        current_key(algorithm, kid) возвращает действующий ключ проверки;
+        запись, проверенная другим ключом, считается промахом.
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        # Ключ сверяется вне блокировки: набор ключей может перечитывать файл.
+        valid = (
+            entry is not None
+            and entry[0].get("exp", 0) > time.time()
+            and (current_key is None or current_key(*entry[1][:2]) is entry[1][2])
+        )
+        with self._lock:
+            if not valid:
+                if entry is not None:
+                    self._remove(key, entry[0])
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, payload: dict, verified_with: tuple) -> None:
+        """
+        Сохраняет проверенную полезную нагрузку токена вместе с кортежем
+        (алгоритм, kid, ключ), которым была проверена подпись.
+        """
+        maxsize = self._maxsize()
+        if maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, verified_with)
+            self._entries.move_to_end(key)
+            if payload.get("jti"):
+                self._keys_by_jti[payload["jti"]] = key
+            while len(self._entries) > maxsize:
+                old_key, (old_payload, _) = self._entries.popitem(last=False)
+                self._keys_by_jti.pop(old_payload.get("jti"), None)
+                self.evictions += 1
+
+    def evict_jti(self, jti: str) -> None:
+        """
+        Удаляет из кэша токен с указанным JTI (например, после его отзыва).
+        """
+        with self._lock:
+            key = self._keys_by_jti.get(jti)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None:
+                self._remove(key, entry[0])
+
+    def _remove(self, key: bytes, payload: dict | None) -> None:
+        self._entries.pop(key, None)
+        if payload is not None:
+            self._keys_by_jti.pop(payload.get("jti"), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_jti.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики кэша для мониторинга.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self._maxsize(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+decoded_tokens = DecodedTokenCache()
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register("roles", views.RoleViewSet, basename="role")
@@ -10,13 +11,31 @@ router.register(
 )
 router.register("permissions", views.PermissionViewSet, basename="permission")
 
+if getattr(settings, "ASYNC_API_VIEWS", False):
+    profile_view = async_views.AsyncProfileView
+    product_list_view = async_views.AsyncProductListView
+    order_list_view = async_views.AsyncOrderListView
+else:
+    profile_view = views.ProfileView
+    product_list_view = views.ProductListView
+    order_list_view = views.OrderListView
+
 urlpatterns = [
     path("register/", views.RegisterView.as_view(), name="register"),
     path("login/", views.LoginView.as_view(), name="login"),
+    path("refresh/", views.RefreshView.as_view(), name="refresh"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
-    path("profile/", views.ProfileView.as_view(), name="profile"),
+    path("jwks/", views.JWKSView.as_view(), name="jwks"),
+    path("metrics/", views.MetricsView.as_view(), name="metrics"),
+    path("profile/", profile_view.as_view(), name="profile"),
     path("delete-account/", views.DeleteAccountView.as_view(), name="delete-account"),
-    path("products/", views.ProductListView.as_view(), name="product-list"),
-    path("orders/", views.OrderListView.as_view(), name="order-list"),
+    path(
+        "authorize/batch/",
+        views.AuthorizeBatchView.as_view(),
+        name="authorize-batch",
+    ),
+    path("introspect/", views.IntrospectView.as_view(), name="introspect"),
+    path("products/", product_list_view.as_view(), name="product-list"),
+    path("orders/", order_list_view.as_view(), name="order-list"),
     path("", include(router.urls)),
 ]
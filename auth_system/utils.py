@@ -1,42 +1,97 @@
+import hashlib
+import secrets
 import uuid
 from datetime import datetime, timedelta, timezone
 
 import jwt
 from django.conf import settings
+from django.db import transaction
 from django.http import HttpRequest
+from rest_framework import exceptions
 
-from .models import User, BlacklistedToken
+from . import keys, rbac
+from .blacklist import revoked_tokens
+from .models import User, BlacklistedToken, RefreshToken
+from .token_cache import decoded_tokens
 
 
 def generate_jwt(user: User) -> str:
     """
     Генерирует JWT для данного пользователя.
+    Время выпуска и истечения записываются с долями секунды: по exp служебная
+    запись отзыва отличает токены, выпущенные до нее, от выпущенных после,
+    в том числе в пределах одной секунды.
     """
+    now = datetime.now(timezone.utc)
+    lifetime = timedelta(seconds=int(settings.JWT_LIFETIME_SECONDS))
     payload = {
         'user_id': user.pk,
         'role': user.role.name if user.role else None,
-        'exp': datetime.now(timezone.utc) + timedelta(
-            seconds=int(settings.JWT_LIFETIME_SECONDS)
-        ),
-        'iat': datetime.now(timezone.utc),
+        'role_id': user.role_id,
+        'is_superuser': user.is_superuser,
+        'rbac_generation': rbac.current_generation(),
+        'exp': (now + lifetime).timestamp(),
+        'iat': now.timestamp(),
         'jti': str(uuid.uuid4()),
     }
 
-    token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm="HS256")
+    algorithm = settings.JWT_ALGORITHM
+    if algorithm.startswith("HS"):
+        return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=algorithm)
+
+    signing = keys.get_keyset().signing_key(settings.JWT_SIGNING_KEY_ID)
+    token = jwt.encode(
+        payload,
+        signing.signing_key,
+        algorithm=signing.algorithm,
+        headers={"kid": signing.kid},
+    )
     return token
 
 
-def decode_jwt(token: str) -> dict | None:
+def verification_key(algorithm: str | None, kid: str | None):
     """
-    Декодирует JWT. Возвращает полезную нагрузку, если токен действителен, иначе None.
+    Возвращает ключ проверки подписи для алгоритма и kid или None, если
+    алгоритм не входит в JWT_ACCEPTED_ALGORITHMS или ключа с таким kid
+    больше нет в наборе.
+    """
+    if algorithm not in settings.JWT_ACCEPTED_ALGORITHMS:
+        return None
+    if algorithm.startswith("HS"):
+        return settings.JWT_SECRET_KEY
+    parsed = keys.get_keyset().get(kid)
+    if parsed is None or parsed.algorithm != algorithm:
+        return None
+    return parsed.verify_key
+
+
+def decode_jwt_with_key(token: str) -> tuple[dict, tuple] | None:
+    """
+    Декодирует JWT и возвращает пару (полезная нагрузка, (алгоритм, kid, ключ))
+    или None, если токен недействителен.
     """
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
-        return payload
+        header = jwt.get_unverified_header(token)
+        algorithm, kid = header.get("alg"), header.get("kid")
+        key = verification_key(algorithm, kid)
+        if key is None:
+            return None
+        payload = jwt.decode(token, key, algorithms=[algorithm])
+        return payload, (algorithm, kid, key)
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
 
 
+def decode_jwt(token: str) -> dict | None:
+    """
+    Декодирует JWT. Возвращает полезную нагрузку, если токен действителен, иначе None.
+    Ключ проверки выбирается по алгоритму и kid из заголовка токена; принимаются
+    только алгоритмы из JWT_ACCEPTED_ALGORITHMS.
+    """
+    decoded = decode_jwt_with_key(token)
+    return decoded[0] if decoded else None
+
+
 def blacklist_token(request: HttpRequest) -> bool:
     """
     Отзывает JWT-токен из заголовка Authorization в запросе.
@@ -54,7 +109,122 @@ def blacklist_token(request: HttpRequest) -> bool:
     jti = payload["jti"]
     expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
 
-    BlacklistedToken.objects.get_or_create(
-        user=request.user, jti=jti, defaults={"expires_at": expires_at}
+    # Вставка без чтения по jti: после секционирования уникальна только пара
+    # (jti, expires_at), и get_or_create по jti мог бы найти несколько строк.
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(user_id=request.user.pk, jti=jti, expires_at=expires_at)],
+        ignore_conflicts=True,
     )
+    revoked_tokens.add(jti, expires_at)
+    decoded_tokens.evict_jti(jti)
     return True
+
+
+def user_revocation_jti(user_id: int) -> str:
+    """
+    Возвращает служебный JTI записи черного списка, отзывающей все токены
+    пользователя.
+    """
+    return f"user:{user_id}"
+
+
+def revoke_user_tokens(user: User) -> None:
+    """
+    Отзывает все выпущенные токены пользователя. Служебная запись действует
+    в течение срока жизни токена, после чего все ранее выпущенные токены истекают;
+    токены, выпущенные после нее, истекают позже записи и остаются действительными.
+
+    Повторный отзыв заменяет запись новой строкой, а не обновляет старую:
+    другие процессы подгружают черный список по возрастанию id и не увидели
+    бы продленный срок записи с уже прочитанным id.
+    """
+    jti = user_revocation_jti(user.pk)
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        seconds=int(settings.JWT_LIFETIME_SECONDS)
+    )
+    with transaction.atomic():
+        BlacklistedToken.objects.filter(jti=jti).delete()
+        BlacklistedToken.objects.create(
+            user_id=user.pk, jti=jti, expires_at=expires_at
+        )
+    revoked_tokens.add(jti, expires_at)
+    RefreshToken.objects.filter(user_id=user.pk).delete()
+
+
+def clear_user_revocation(user: User) -> None:
+    """
+    Снимает отзыв всех токенов пользователя (например, после повторной
+    активации). Другие процессы сверяют попадание в локальное множество
+    с таблицей черного списка, поэтому удаления записи достаточно.
+    """
+    jti = user_revocation_jti(user.pk)
+    BlacklistedToken.objects.filter(jti=jti).delete()
+    revoked_tokens.discard(jti)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(user: User, family: uuid.UUID | None = None) -> str:
+    """
+    Выпускает токен обновления. В БД сохраняется только его хэш.
+    """
+    token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        token_hash=hash_refresh_token(token),
+        family=family or uuid.uuid4(),
+        user=user,
+        expires_at=datetime.now(timezone.utc)
+        + timedelta(seconds=int(settings.JWT_REFRESH_LIFETIME_SECONDS)),
+    )
+    return token
+
+
+def rotate_refresh_token(token: str) -> tuple[User, str]:
+    """
+    Обменивает токен обновления на новый из того же семейства.
+    Токен ищется по хэшу одним запросом по уникальному индексу, без
+    проверки пароля. Повторное использование уже обмененного токена
+    означает его утечку. Выданные семейством токены доступа не
+    отслеживаются, поэтому отзываются все токены пользователя.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        record = RefreshToken.objects.select_related("user__role").get(
+            token_hash=hash_refresh_token(token)
+        )
+    except RefreshToken.DoesNotExist:
+        raise exceptions.AuthenticationFailed("Invalid refresh token.")
+
+    if record.expires_at <= now or not record.user.is_active:
+        raise exceptions.AuthenticationFailed("Refresh token expired.")
+
+    with transaction.atomic():
+        # Условное обновление не дает обменять один токен дважды
+        # при одновременных запросах.
+        claimed = RefreshToken.objects.filter(
+            pk=record.pk, used_at__isnull=True
+        ).update(used_at=now)
+        if claimed:
+            new_token = issue_refresh_token(record.user, family=record.family)
+
+    if not claimed:
+        revoke_user_tokens(record.user)
+        raise exceptions.AuthenticationFailed("Refresh token reuse detected.")
+    return record.user, new_token
+
+
+def revoke_refresh_token(token: str, user_id: int) -> None:
+    """
+    Отзывает семейство, к которому принадлежит токен обновления пользователя.
+    """
+    family = (
+        RefreshToken.objects.filter(
+            token_hash=hash_refresh_token(token), user_id=user_id
+        )
+        .values_list("family", flat=True)
+        .first()
+    )
+    if family:
+        RefreshToken.objects.filter(family=family).delete()
@@ -1,22 +1,37 @@
+import time
 from typing import cast, Any
 
 from rest_framework.request import Request
-from django.http import HttpRequest
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
 from rest_framework import exceptions, status
-from rest_framework.generics import RetrieveUpdateAPIView
+from rest_framework.decorators import action
+from rest_framework.generics import RetrieveUpdateAPIView, get_object_or_404
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
-from . import utils
+from . import instrumentation, keys, permission_matrix, rbac, utils
+from .authentication import JWTAuthentication, TokenUser, resolve_user
+from .conditional import (
+    GenerationETagMixin,
+    conditional_response,
+    etag_matches,
+    make_etag,
+)
+from .context import RequestContext, get_context
 from .models import (
     BusinessObject,
     Permission,
     Role,
     User,
 )
-from .permissions import HasPermission, IsAuthenticatedOr401
+from .pagination import KeysetPagination
+from .parsers import CSVTextParser
+from .permissions import HasPermission, IsAuthenticatedOr401, IsMetricsScraper
+from .throttling import LoginThrottle, login_limiter, normalize_email
 from .serializers import (
     BusinessObjectSerializer,
     LoginSerializer,
@@ -53,10 +68,16 @@ class LoginView(APIView):
     """
 
     permission_classes = [AllowAny]
+    throttle_classes = [LoginThrottle]
 
     def post(self, request: Request) -> Response:
         serializer = LoginSerializer(data=request.data, context={"request": request})
-        serializer.is_valid(raise_exception=True)
+        data = request.data if hasattr(request.data, "get") else {}
+        email = normalize_email(data.get("email"))
+        if not serializer.is_valid():
+            login_limiter.record_failure(email)
+            raise exceptions.ValidationError(serializer.errors)
+        login_limiter.record_success(email)
 
         validated_data = serializer.validated_data
         if not isinstance(validated_data, dict):
@@ -66,7 +87,30 @@ class LoginView(APIView):
             raise exceptions.AuthenticationFailed("Serializer did not return a user.")
 
         token = utils.generate_jwt(user)
-        return Response({"token": token}, status=status.HTTP_200_OK)
+        refresh = utils.issue_refresh_token(user)
+        return Response({"token": token, "refresh": refresh}, status=status.HTTP_200_OK)
+
+
+class RefreshView(APIView):
+    """
+    POST /auth/refresh/
+    Обменивает токен обновления на новую пару токенов без проверки пароля.
+    Использованный токен обновления становится недействительным.
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request: Request) -> Response:
+        data = request.data if hasattr(request.data, "get") else {}
+        refresh = data.get("refresh")
+        if not isinstance(refresh, str) or not refresh:
+            raise exceptions.ValidationError({"refresh": "This field is required."})
+
+        user, new_refresh = utils.rotate_refresh_token(refresh)
+        token = utils.generate_jwt(user)
+        return Response(
+            {"token": token, "refresh": new_refresh}, status=status.HTTP_200_OK
+        )
 
 
 class LogoutView(APIView):
@@ -77,13 +121,54 @@ class LogoutView(APIView):
 
     permission_classes = [IsAuthenticatedOr401]
 
-    def post(self, request: HttpRequest) -> Response:
+    def post(self, request: Request) -> Response:
         utils.blacklist_token(request)
+        data = request.data if hasattr(request.data, "get") else {}
+        if isinstance(data.get("refresh"), str):
+            utils.revoke_refresh_token(data["refresh"], request.user.pk)
         return Response(
             {"message": "Successfully logged out."}, status=status.HTTP_200_OK
         )
 
 
+class JWKSView(APIView):
+    """
+    GET /auth/jwks/
+    Возвращает публичные ключи для локальной проверки JWT сторонними сервисами.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes: list = []
+
+    def get(self, request: Request) -> Response:
+        if not getattr(settings, "JWT_JWKS_FILE", None):
+            data: dict = {"keys": []}
+        else:
+            data = keys.get_keyset().public_jwks()
+        response = Response(data, status=status.HTTP_200_OK)
+        response["Cache-Control"] = "public, max-age=300"
+        return response
+
+
+class MetricsView(APIView):
+    """
+    GET /auth/metrics/
+    Метрики процесса в текстовом формате Prometheus. Доступен только при
+    METRICS_ENABLED и только сборщику метрик (см. IsMetricsScraper).
+    """
+
+    permission_classes = [IsMetricsScraper]
+    authentication_classes: list = []
+
+    def get(self, request: Request) -> HttpResponse:
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise exceptions.NotFound()
+        return HttpResponse(
+            instrumentation.render_metrics(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
 # --- User Self-Service Views ---
 
 
@@ -98,19 +183,35 @@ class ProfileView(RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticatedOr401]
 
     def get_object(self) -> Any:
-        return cast(User, self.request.user)
+        return resolve_user(self.request.user)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Быстрый путь чтения: профиль собирается без сериализатора, а для
+        принципала из утверждений токена выбираются только поля профиля.
+        ETag вычисляется из полей профиля; при совпадении If-None-Match
+        возвращается 304 без тела.
+        """
+        fields = self.serializer_class.Meta.fields
+        user = request.user
+        if isinstance(user, TokenUser):
+            data = User.objects.values(*fields).get(pk=user.pk)
+        else:
+            data = {name: getattr(user, name) for name in fields}
+        return conditional_response(request, data)
 
 
 class DeleteAccountView(APIView):
     """
     POST /auth/delete-account/
     "Мягко" удаляет аккаунт текущего пользователя и отзывает его токен.
+    Остальные токены пользователя отзывает сигнал деактивации.
     """
 
     permission_classes = [IsAuthenticatedOr401]
 
     def post(self, request: HttpRequest) -> Response:
-        user = cast(User, request.user)
+        user = cast(User, resolve_user(request.user))
         user.is_active = False
         user.save(update_fields=["is_active"])
 
@@ -121,34 +222,323 @@ class DeleteAccountView(APIView):
         )
 
 
+# --- Authorization Decision API ---
+
+
+def _parse_check(item: Any, index: int) -> tuple[str, str, int | None]:
+    """
+    Разбирает одну проверку пакета: [код, действие, owner_id?] или
+    {"business_object": ..., "action": ..., "owner_id": ...}.
+    """
+    if isinstance(item, dict):
+        code = item.get("business_object")
+        action = item.get("action")
+        owner_id = item.get("owner_id")
+    elif isinstance(item, (list, tuple)) and len(item) in (2, 3):
+        code, action = item[0], item[1]
+        owner_id = item[2] if len(item) == 3 else None
+    else:
+        raise exceptions.ValidationError(
+            {"checks": f"Item {index}: expected [business_object, action, owner_id]."}
+        )
+
+    if not isinstance(code, str) or action not in rbac.FLAG_BITS:
+        raise exceptions.ValidationError(
+            {"checks": f"Item {index}: unknown business object or action."}
+        )
+    if owner_id is not None and (
+        not isinstance(owner_id, int) or isinstance(owner_id, bool)
+    ):
+        raise exceptions.ValidationError(
+            {"checks": f"Item {index}: owner_id must be an integer."}
+        )
+    return code, action, owner_id
+
+
+class AuthorizeBatchView(APIView):
+    """
+    POST /auth/authorize/batch/
+    Проверяет пакет действий текущего пользователя над бизнес-объектами
+    по той же логике, что и HasPermission: без owner_id — как
+    has_permission, с owner_id — дополнительно как has_object_permission.
+    Все проверки вычисляются по одной матрице разрешений.
+    """
+
+    permission_classes = [IsAuthenticatedOr401]
+
+    def post(self, request: Request) -> Response:
+        checks = request.data.get("checks") if isinstance(request.data, dict) else None
+        if not isinstance(checks, list):
+            raise exceptions.ValidationError({"checks": "Expected a list of checks."})
+
+        max_checks = int(getattr(settings, "AUTHORIZE_BATCH_MAX_CHECKS", 10000))
+        if len(checks) > max_checks:
+            raise exceptions.ValidationError(
+                {"checks": f"At most {max_checks} checks are allowed per request."}
+            )
+
+        parsed = [_parse_check(item, index) for index, item in enumerate(checks)]
+        user = request.user
+
+        if getattr(user, "is_superuser", False):
+            return Response({"results": [True] * len(parsed)})
+
+        permission = HasPermission()
+        context = get_context(request)
+        results = []
+        for code, check_action, owner_id in parsed:
+            perm_mask = context.get_mask(code)
+            allowed = permission.allows(perm_mask, check_action)
+            if allowed and owner_id is not None:
+                allowed = permission.allows_object(
+                    perm_mask, check_action, owner_id, user.id
+                )
+            results.append(allowed)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class IntrospectView(APIView):
+    """
+    POST /auth/introspect/
+    Интроспекция токена в стиле RFC 7662 для шлюзов и sidecar-прокси:
+    возвращает признак active, утверждения токена и флаги роли по всем
+    бизнес-объектам. ETag зависит от токена, поколения RBAC и результата
+    проверки, а max-age не превышает оставшегося срока жизни токена,
+    поэтому ответ можно безопасно кэшировать на стороне шлюза.
+    """
+
+    permission_classes = [IsAuthenticatedOr401, HasPermission]
+    business_object_code = "introspection"
+    required_action = "read_all"
+
+    def post(self, request: Request) -> Response:
+        token = request.data.get("token") if hasattr(request.data, "get") else None
+        if not isinstance(token, str) or not token:
+            raise exceptions.ValidationError({"token": "This field is required."})
+
+        context = RequestContext()
+        result = JWTAuthentication().authenticate_token(token, context)
+        generation = context.generation()
+
+        etag = make_etag(token, generation, result is not None)
+        max_age = int(getattr(settings, "JWT_INTROSPECTION_MAX_AGE", 60))
+        if result is not None:
+            remaining = int(result[1]["exp"] - time.time())
+            max_age = max(0, min(max_age, remaining))
+        headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if result is None:
+            return Response({"active": False}, headers=headers)
+
+        user, payload = result
+        matrix = context.matrix()
+        is_superuser = bool(getattr(user, "is_superuser", False))
+        data = {
+            "active": True,
+            "token_type": "Bearer",
+            "sub": str(payload["user_id"]),
+            "user_id": payload["user_id"],
+            # Роль берется у текущего пользователя, а не из утверждения токена,
+            # чтобы role, role_id и permissions описывали одну и ту же роль.
+            "role": matrix.role_name(user.role_id),
+            "role_id": user.role_id,
+            "is_superuser": is_superuser,
+            "jti": payload.get("jti"),
+            "iat": int(payload["iat"]) if "iat" in payload else None,
+            "exp": int(payload["exp"]),
+            "rbac_generation": generation,
+            "permissions": matrix.role_flags(user.role_id, superuser=is_superuser),
+        }
+        return Response(data, headers=headers)
+
+
 # --- Admin CRUD ViewSets for RBAC Management ---
 
 
-class RoleViewSet(ModelViewSet):
+class SparseFieldsMixin:
+    """
+    Параметр ?fields=id,name для GET-запросов: ответ содержит только
+    перечисленные поля сериализатора, а queryset выбирает только нужные
+    столбцы (.only()). Поле связи отображается в пути sparse_field_paths,
+    например {"role": ["role__name"]}; связи, не попавшие в выборку,
+    исключаются из select_related.
+    """
+
+    sparse_field_paths: dict[str, list[str]] = {}
+
+    def get_sparse_fields(self) -> list[str] | None:
+        if self.request.method != "GET":
+            return None
+        if not hasattr(self, "_sparse_fields"):
+            raw = self.request.query_params.get("fields")
+            requested = [name.strip() for name in (raw or "").split(",")]
+            requested = [name for name in requested if name]
+            allowed = self.get_serializer_class().Meta.fields
+            unknown = [name for name in requested if name not in allowed]
+            if unknown:
+                raise exceptions.ValidationError(
+                    {"fields": f"Unknown fields: {', '.join(unknown)}."}
+                )
+            self._sparse_fields = requested or None
+        return self._sparse_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        paths = ["id"]
+        for name in fields:
+            paths.extend(self.sparse_field_paths.get(name, [name]))
+        relations = {path.split("__")[0] for path in paths if "__" in path}
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*paths)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ValuesReadMixin:
+    """
+    Быстрый путь чтения для list и retrieve: строки выбираются через
+    .values() и отдаются без сериализатора. value_fields задает поля ответа
+    в порядке полей сериализатора и их пути в ORM, поэтому вывод совпадает
+    с выводом serializer_class; ?fields= (SparseFieldsMixin) учитывается.
+    Подходит только для моделей без владельца: has_object_permission
+    получает словарь вместо экземпляра модели.
+    """
+
+    value_fields: dict[str, str] = {}
+
+    def get_values_queryset(self):
+        fields = self.get_sparse_fields()
+        pairs = [
+            (name, lookup)
+            for name, lookup in self.value_fields.items()
+            if fields is None or name in fields
+        ]
+        lookups = {"id", *(lookup for _, lookup in pairs)}
+        return self.filter_queryset(self.get_queryset()).values(*lookups), pairs
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        queryset, pairs = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        data = [{name: row[lookup] for name, lookup in pairs} for row in rows]
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        queryset, pairs = self.get_values_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response({name: row[lookup] for name, lookup in pairs})
+
+
+class RoleViewSet(
+    GenerationETagMixin, ValuesReadMixin, SparseFieldsMixin, ModelViewSet
+):
     """Админский CRUD для Ролей. Требует разрешения на бизнес-объект 'roles'."""
 
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = [IsAuthenticatedOr401, HasPermission]
+    pagination_class = KeysetPagination
     business_object_code = "roles"
+    value_fields = {"id": "id", "name": "name"}
 
 
-class BusinessObjectViewSet(ModelViewSet):
+class BusinessObjectViewSet(
+    GenerationETagMixin, ValuesReadMixin, SparseFieldsMixin, ModelViewSet
+):
     """Админский CRUD для Бизнес-Объектов. Требует разрешения 'business_objects'."""
 
     queryset = BusinessObject.objects.all()
     serializer_class = BusinessObjectSerializer
     permission_classes = [IsAuthenticatedOr401, HasPermission]
+    pagination_class = KeysetPagination
     business_object_code = "business_objects"
+    value_fields = {"id": "id", "code": "code", "name": "name"}
 
 
-class PermissionViewSet(ModelViewSet):
+class PermissionViewSet(
+    GenerationETagMixin, ValuesReadMixin, SparseFieldsMixin, ModelViewSet
+):
     """Админский CRUD для Разрешений. Требует разрешения 'permissions'."""
 
     queryset = Permission.objects.all().select_related("role", "business_object")
     serializer_class = PermissionSerializer
     permission_classes = [IsAuthenticatedOr401, HasPermission]
+    pagination_class = KeysetPagination
     business_object_code = "permissions"
+    sparse_field_paths = {
+        "role": ["role__name"],
+        "business_object": ["business_object__code"],
+    }
+    value_fields = {
+        "id": "id",
+        "role": "role__name",
+        "business_object": "business_object__code",
+        **{name: name for name in permission_matrix.FLAG_FIELDS},
+    }
+    # Задается для отдельных действий матрицы через параметры @action.
+    required_action: str | None = None
+
+    @action(
+        detail=False, methods=["get"], url_path="matrix", required_action="read_all"
+    )
+    def export_matrix(self, request: Request) -> Response:
+        """
+        GET /permissions/matrix/ — выгрузка всей матрицы разрешений
+        (?output=csv — в формате CSV).
+        """
+        rows = permission_matrix.export_matrix()
+        if request.query_params.get("output") == "csv":
+            return HttpResponse(
+                permission_matrix.to_csv(rows), content_type="text/csv; charset=utf-8"
+            )
+        return Response(rows)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="matrix/import",
+        # Импорт создает, изменяет и (без ?partial=true) удаляет разрешения.
+        required_action=("create", "update_all", "delete_all"),
+        parser_classes=[JSONParser, CSVTextParser],
+    )
+    def import_matrix(self, request: Request) -> Response:
+        """
+        POST /permissions/matrix/import/ — загрузка полной матрицы (JSON или
+        text/csv). Параметры ?partial=true (не удалять отсутствующие строки)
+        и ?dry_run=true (только посчитать изменения).
+        """
+        data = request.data
+        if isinstance(data, str):
+            rows = permission_matrix.from_csv(data)
+        elif isinstance(data, dict):
+            rows = data.get("permissions")
+        else:
+            rows = data
+        params = request.query_params
+        summary = permission_matrix.import_matrix(
+            rows,
+            delete_missing=params.get("partial") != "true",
+            dry_run=params.get("dry_run") == "true",
+        )
+        return Response(summary, status=status.HTTP_200_OK)
 
 
 # --- Mock Business Application Views ---
@@ -0,0 +1,168 @@
+"""
+Общие средства набора бенчмарков: настройка Django, тестовая база
+с начальными данными, замер пропускной способности и сравнение
+с сохраненными базовыми значениями (baselines.json).
+
+Результат бенчмарка — словарь {имя метрики: {"value": ..., "unit": ...}}.
+Единица определяет направление сравнения: ops/s и req/s — больше лучше,
+ms — меньше лучше, queries — число SQL-запросов, рост которого считается
+регрессией при любом пороге.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+HIGHER_IS_BETTER = {"ops/s", "req/s"}
+EXACT_UNITS = {"queries"}
+
+
+def setup_django() -> None:
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def seeded_database(keepdb: bool = False, **seed_options):
+    """
+    Создает тестовую базу (test_<DB_NAME>), заполняет ее командой seed_data
+    с параметрами seed_options (users, roles, objects) и удаляет по
+    завершении, если не задан keepdb. Рабочая база не меняется.
+    """
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment(debug=False)
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        call_command("seed_data", stdout=io.StringIO(), **seed_options)
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def measure(func, seconds: float, rounds: int = 3) -> float:
+    """
+    Вызывает func в цикле rounds раундов общей длительностью не менее
+    seconds секунд (каждый раунд — не менее одного вызова). Возвращает число
+    вызовов в секунду в лучшем раунде: как и в timeit, худшие раунды
+    отражают помехи от других процессов, а не сам код.
+    """
+    best = 0.0
+    for _ in range(rounds):
+        count = 0
+        started = time.perf_counter()
+        while True:
+            func()
+            count += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds / rounds:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+
+def load_baselines(path: Path = BASELINES) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baselines(results: dict, path: Path = BASELINES) -> None:
+    """
+    Записывает результаты в файл базовых значений, сохраняя метрики других
+    бенчмарков.
+    """
+    baselines = load_baselines(path)
+    baselines.update(
+        {
+            name: {"value": round(result["value"], 2), "unit": result["unit"]}
+            for name, result in results.items()
+        }
+    )
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+def find_regressions(results: dict, baselines: dict, threshold: float) -> list[str]:
+    """
+    Сравнивает результаты с базовыми значениями. Пропускная способность
+    и задержка допускают отклонение на долю threshold, число запросов —
+    никакого роста.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        value, expected, unit = result["value"], baseline["value"], result["unit"]
+        if unit in EXACT_UNITS:
+            failed = value > expected
+        elif unit in HIGHER_IS_BETTER:
+            failed = value < expected * (1 - threshold)
+        else:
+            failed = value > expected * (1 + threshold)
+        if failed:
+            regressions.append(f"{name}: {value:.2f} {unit} (baseline {expected:.2f})")
+    return regressions
+
+
+def add_baseline_arguments(parser) -> None:
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save the results to benchmarks/baselines.json.",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if a metric regressed against the baseline.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.3,
+        help="Allowed relative slowdown for --check (default 0.3 = 30%%).",
+    )
+
+
+def report(results: dict, args) -> int:
+    """
+    Печатает результаты, при необходимости сохраняет их как базовые
+    и проверяет регрессии. Возвращает код завершения процесса.
+    """
+    baselines = load_baselines()
+    print(f"{'metric':<36} {'value':>12} {'baseline':>12}  unit")
+    for name, result in sorted(results.items()):
+        baseline = baselines.get(name, {}).get("value")
+        baseline_text = f"{baseline:>12.2f}" if baseline is not None else f"{'-':>12}"
+        print(f"{name:<36} {result['value']:>12.2f} {baseline_text}  {result['unit']}")
+
+    if args.save_baseline:
+        save_baselines(results)
+        print(f"Baseline saved to {BASELINES}.")
+    if args.check:
+        regressions = find_regressions(results, baselines, args.threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions.")
+    return 0
@@ -0,0 +1,153 @@
+"""
+Нагрузочный прогон внутри процесса: потоки с django.test.Client
+обращаются к /api/auth/login/, /products/, /orders/ и /profile/ на тестовой
+базе с начальными данными. Для каждого сценария выводятся пропускная
+способность, задержки p50/p95/p99 и медианное число SQL-запросов на
+ответ (из заголовка Server-Timing, см. auth_system/instrumentation.py).
+
+Ограничение попыток входа на время прогона отключается.
+
+    python benchmarks/load.py --concurrency 8 --seconds 5
+    python benchmarks/load.py --scenarios products orders --check
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+
+common.setup_django()
+
+from django.db import connections  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from auth_system import utils  # noqa: E402
+from auth_system.management.commands.seed_data import TEST_PASSWORD  # noqa: E402
+from auth_system.models import User  # noqa: E402
+
+API = "/api/auth"
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def build_scenarios(email: str) -> dict:
+    """
+    Возвращает {имя: функция(client) -> ответ}.
+    """
+    user = User.objects.select_related("role").get(email=email)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {utils.generate_jwt(user)}"}
+    credentials = {"email": email, "password": TEST_PASSWORD}
+    return {
+        "login": lambda client: client.post(
+            f"{API}/login/", credentials, content_type="application/json"
+        ),
+        "products": lambda client: client.get(f"{API}/products/", **headers),
+        "orders": lambda client: client.get(f"{API}/orders/", **headers),
+        "profile": lambda client: client.get(f"{API}/profile/", **headers),
+    }
+
+
+def run_scenario(request, concurrency: int, seconds: float) -> dict:
+    """
+    Выполняет запросы в concurrency потоках в течение seconds секунд.
+    """
+    latencies: list[float] = []
+    queries: list[int] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        nonlocal errors
+        client = Client()
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = request(client)
+                elapsed = time.perf_counter() - started
+                match = QUERIES.search(response.get("Server-Timing", ""))
+                with lock:
+                    latencies.append(elapsed)
+                    if match:
+                        queries.append(int(match.group(1)))
+                    if response.status_code >= 400:
+                        errors += 1
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": 1000 * statistics.median(latencies),
+        "p95": 1000 * percentiles[94] if percentiles else 1000 * latencies[0],
+        "p99": 1000 * percentiles[98] if percentiles else 1000 * latencies[0],
+        # Медиана, а не максимум: первые запросы прогревают матрицу прав
+        # и множество отозванных токенов.
+        "queries": int(statistics.median(queries)) if queries else 0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument(
+        "--scenarios",
+        nargs="*",
+        default=["login", "products", "orders", "profile"],
+    )
+    parser.add_argument("--email", default="manager@example.com")
+    parser.add_argument(
+        "--users", type=int, default=1000, help="Synthetic users to seed."
+    )
+    parser.add_argument("--keepdb", action="store_true")
+    common.add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    overrides = override_settings(
+        SERVER_TIMING_HEADER=True,
+        LOGIN_RATE_PER_IP="",
+        LOGIN_RATE_PER_EMAIL="",
+        LOGIN_BACKOFF_FREE_ATTEMPTS=10**9,
+    )
+    results = {}
+    with common.seeded_database(keepdb=args.keepdb, users=args.users), overrides:
+        scenarios = build_scenarios(args.email)
+        print(
+            f"{'scenario':<10} {'requests':>9} {'errors':>7} {'req/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for name in args.scenarios:
+            stats = run_scenario(scenarios[name], args.concurrency, args.seconds)
+            print(
+                f"{name:<10} {stats['requests']:>9} {stats['errors']:>7} "
+                f"{stats['rps']:>9.1f} {stats['p50']:>8.2f} {stats['p95']:>8.2f} "
+                f"{stats['p99']:>8.2f} {stats['queries']:>8}"
+            )
+            if stats["errors"]:
+                print(f"{name}: {stats['errors']} responses with status >= 400.")
+                return 1
+            results[f"load.{name}.rps"] = {"value": stats["rps"], "unit": "req/s"}
+            results[f"load.{name}.p95"] = {"value": stats["p95"], "unit": "ms"}
+            results[f"load.{name}.queries"] = {
+                "value": stats["queries"],
+                "unit": "queries",
+            }
+    print()
+    return common.report(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
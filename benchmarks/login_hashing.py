@@ -0,0 +1,69 @@
+"""
+Замер пропускной способности проверки паролей — верхней границы числа
+входов в секунду на одно ядро — для каждого хэшера с текущими настройками
+стоимости (PASSWORD_PBKDF2_ITERATIONS, PASSWORD_SCRYPT_*, PASSWORD_ARGON2_*).
+
+    python benchmarks/login_hashing.py --seconds 3
+"""
+
+import argparse
+import time
+
+import common
+
+common.setup_django()
+
+from auth_system import hashers  # noqa: E402
+
+HASHERS = {
+    "pbkdf2": hashers.TunedPBKDF2PasswordHasher,
+    "scrypt": hashers.TunedScryptPasswordHasher,
+    "argon2": hashers.TunedArgon2PasswordHasher,
+}
+
+
+def measure(hasher, seconds: float) -> tuple[int, float]:
+    """
+    Проверяет пароль в цикле не менее seconds секунд.
+    Возвращает число проверок и затраченное время.
+    """
+    encoded = hasher.encode("Test123!", hasher.salt())
+    count = 0
+    started = time.perf_counter()
+    while True:
+        if not hasher.verify("Test123!", encoded):
+            raise AssertionError("Password verification failed.")
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("hashers", nargs="*", default=list(HASHERS))
+    args = parser.parse_args()
+
+    print(f"{'hasher':<8} {'logins/s/core':>14} {'ms/login':>9}  parameters")
+    for name in args.hashers:
+        hasher = HASHERS[name]()
+        try:
+            count, elapsed = measure(hasher, args.seconds)
+        except ValueError as exc:
+            print(f"{name:<8} {'skipped':>14}  {exc}")
+            continue
+        summary = hasher.safe_summary(hasher.encode("x", hasher.salt()))
+        params = ", ".join(
+            f"{key}={value}"
+            for key, value in summary.items()
+            if key not in ("algorithm", "salt", "hash")
+        )
+        print(
+            f"{name:<8} {count / elapsed:>14.1f} {1000 * elapsed / count:>9.2f}  "
+            f"{params}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Микробенчмарки горячего пути аутентификации и RBAC: выпуск и проверка
+JWT, проверка черного списка, решения HasPermission и проверка пароля.
+Запускаются на тестовой базе с начальными данными (см. common.py).
+
+    python benchmarks/micro.py --seconds 1
+    python benchmarks/micro.py --check
+"""
+
+import argparse
+import sys
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
+import common
+
+common.setup_django()
+
+from django.utils import timezone  # noqa: E402
+
+from auth_system import hashing, utils  # noqa: E402
+from auth_system.authentication import JWTAuthentication  # noqa: E402
+from auth_system.blacklist import revoked_tokens  # noqa: E402
+from auth_system.context import RequestContext  # noqa: E402
+from auth_system.management.commands.seed_data import TEST_PASSWORD  # noqa: E402
+from auth_system.models import BlacklistedToken, User  # noqa: E402
+from auth_system.permissions import HasPermission  # noqa: E402
+
+
+def build_cases(slow: bool) -> dict:
+    """
+    Возвращает {имя: функция без аргументов} для замера.
+    """
+    user = User.objects.select_related("role").get(email="manager@example.com")
+    token = utils.generate_jwt(user)
+    authentication = JWTAuthentication()
+    authentication.decode(token)
+
+    revoked_jti = str(uuid.uuid4())
+    expires_at = timezone.now() + timedelta(hours=1)
+    BlacklistedToken.objects.create(
+        jti=revoked_jti, user=user, expires_at=expires_at
+    )
+    revoked_tokens.add(revoked_jti, expires_at)
+    missing_jti = str(uuid.uuid4())
+
+    permission = HasPermission()
+    view = SimpleNamespace(
+        business_object_code="products", required_action="read_all", action=None
+    )
+    warm_request = SimpleNamespace(user=user, auth_context=RequestContext(user))
+    permission.has_permission(warm_request, view)
+
+    def permission_per_request():
+        # Новый контекст, как у каждого запроса: одна сверка поколения RBAC.
+        request = SimpleNamespace(user=user, auth_context=RequestContext(user))
+        return permission.has_permission(request, view)
+
+    cases = {
+        "micro.generate_jwt": lambda: utils.generate_jwt(user),
+        "micro.decode_jwt": lambda: utils.decode_jwt(token),
+        "micro.decode_jwt_cached": lambda: authentication.decode(token),
+        "micro.blacklist_miss": lambda: revoked_tokens.is_revoked(missing_jti),
+        "micro.blacklist_hit": lambda: revoked_tokens.is_revoked(revoked_jti),
+        "micro.has_permission": lambda: permission.has_permission(warm_request, view),
+        "micro.has_permission_request": permission_per_request,
+    }
+    if slow:
+        cases["micro.check_password"] = lambda: hashing.check_password(
+            TEST_PASSWORD, user.password
+        )
+    return cases
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument(
+        "--skip-hashing",
+        action="store_true",
+        help="Skip the password check benchmark.",
+    )
+    parser.add_argument("--keepdb", action="store_true")
+    common.add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    with common.seeded_database(keepdb=args.keepdb):
+        cases = build_cases(slow=not args.skip_hashing)
+        results = {
+            name: {"value": common.measure(func, args.seconds), "unit": "ops/s"}
+            for name, func in cases.items()
+        }
+    return common.report(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Сравнение сериализации списка разрешений: ModelSerializer и JSONRenderer
+против выборки .values() и FastJSONRenderer (быстрый путь
+PermissionViewSet). Перед замером проверяется, что оба пути дают
+побайтно одинаковый JSON.
+
+    python benchmarks/serialization.py --rows 500 --seconds 2
+"""
+
+import argparse
+import sys
+
+import common
+
+common.setup_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from auth_system import renderers  # noqa: E402
+from auth_system.models import Permission  # noqa: E402
+from auth_system.renderers import FastJSONRenderer  # noqa: E402
+from auth_system.serializers import PermissionSerializer  # noqa: E402
+from auth_system.views import PermissionViewSet  # noqa: E402
+
+
+def serializer_path(rows: int) -> bytes:
+    queryset = Permission.objects.select_related("role", "business_object")
+    data = PermissionSerializer(queryset.order_by("id")[:rows], many=True).data
+    return JSONRenderer().render(data)
+
+
+def values_path(rows: int) -> bytes:
+    pairs = list(PermissionViewSet.value_fields.items())
+    lookups = [lookup for _, lookup in pairs]
+    queryset = Permission.objects.order_by("id").values(*lookups)[:rows]
+    data = [{name: row[lookup] for name, lookup in pairs} for row in queryset]
+    return FastJSONRenderer().render(data)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--keepdb", action="store_true")
+    common.add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    # 20 ролей x 50 объектов дают более 1000 разрешений.
+    with common.seeded_database(keepdb=args.keepdb, roles=20, objects=50):
+        if serializer_path(args.rows) != values_path(args.rows):
+            print("Serializer and values paths render different JSON.")
+            return 1
+        renderer = "orjson" if renderers.orjson else "json (orjson not installed)"
+        print(f"Rows per response: {args.rows}; fast renderer: {renderer}.")
+
+        results = {
+            f"serialization.permissions.{name}": {
+                "value": common.measure(lambda: func(args.rows), args.seconds),
+                "unit": "ops/s",
+            }
+            for name, func in (
+                ("serializer", serializer_path),
+                ("values", values_path),
+            )
+        }
+    speedup = (
+        results["serialization.permissions.values"]["value"]
+        / results["serialization.permissions.serializer"]["value"]
+    )
+    print(f"Speedup: {speedup:.1f}x\n")
+    return common.report(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'auth_system.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -139,14 +140,95 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'auth_system.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'auth_system.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'EXCEPTION_HANDLER': 'auth_system.exception_handler.exception_handler',
     'UNAUTHENTICATED_USER': None,
+    # Число доверенных прокси перед приложением; без него X-Forwarded-For
+    # не учитывается и клиентом считается REMOTE_ADDR.
+    'NUM_PROXIES': (
+        int(os.environ["NUM_PROXIES"]) if os.environ.get("NUM_PROXIES") else None
+    ),
 }
 
 JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", SECRET_KEY)
 JWT_LIFETIME_SECONDS = int(os.environ.get("JWT_LIFETIME_SECONDS", 900))
+JWT_REFRESH_LIFETIME_SECONDS = int(
+    os.environ.get("JWT_REFRESH_LIFETIME_SECONDS", 14 * 24 * 3600)
+)
+JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
+JWT_ACCEPTED_ALGORITHMS = os.environ.get(
+    "JWT_ACCEPTED_ALGORITHMS", JWT_ALGORITHM
+).split(",")
+JWT_JWKS_FILE = os.environ.get("JWT_JWKS_FILE")
+JWT_SIGNING_KEY_ID = os.environ.get("JWT_SIGNING_KEY_ID")
+JWT_DECODE_CACHE_SIZE = int(os.environ.get("JWT_DECODE_CACHE_SIZE", 10000))
+JWT_CLAIMS_ONLY_AUTH = os.environ.get("JWT_CLAIMS_ONLY_AUTH", "False") == "True"
+JWT_BLACKLIST_SYNC_SECONDS = float(os.environ.get("JWT_BLACKLIST_SYNC_SECONDS", 1.0))
+JWT_BLACKLIST_PRUNE_INTERVAL = float(
+    os.environ.get("JWT_BLACKLIST_PRUNE_INTERVAL", 0)
+)
+JWT_BLACKLIST_PRUNE_BATCH_SIZE = int(
+    os.environ.get("JWT_BLACKLIST_PRUNE_BATCH_SIZE", 1000)
+)
+JWT_BLACKLIST_PRUNE_SLEEP = float(os.environ.get("JWT_BLACKLIST_PRUNE_SLEEP", 0))
+JWT_BLACKLIST_PARTITION_INTERVAL = (
+    os.environ.get("JWT_BLACKLIST_PARTITION_INTERVAL") or None
+)
+
+AUTHORIZE_BATCH_MAX_CHECKS = int(os.environ.get("AUTHORIZE_BATCH_MAX_CHECKS", 10000))
+JWT_INTROSPECTION_MAX_AGE = int(os.environ.get("JWT_INTROSPECTION_MAX_AGE", 60))
+ASYNC_API_VIEWS = os.environ.get("ASYNC_API_VIEWS", "False") == "True"
 
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
     'auth_system.backends.EmailBackend',
 ]
+
+# Хэшер паролей: pbkdf2, scrypt или argon2 (требует argon2-cffi).
+# Остальные хэшеры остаются в списке, чтобы старые хэши проверялись
+# и пересчитывались выбранным хэшером при следующем входе.
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2")
+_PASSWORD_HASHERS = {
+    "pbkdf2": "auth_system.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "auth_system.hashers.TunedScryptPasswordHasher",
+    "argon2": "auth_system.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 600000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", 2**14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get("PASSWORD_SCRYPT_BLOCK_SIZE", 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get("PASSWORD_SCRYPT_PARALLELISM", 1))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 8))
+
+# Ограничение попыток входа: скользящее окно по IP и email, затем
+# экспоненциальная задержка после неудачных попыток для учетной записи.
+LOGIN_THROTTLE_STORE = os.environ.get("LOGIN_THROTTLE_STORE", "local")
+LOGIN_THROTTLE_CACHE = os.environ.get("LOGIN_THROTTLE_CACHE", "default")
+LOGIN_RATE_PER_IP = os.environ.get("LOGIN_RATE_PER_IP", "20/min")
+LOGIN_RATE_PER_EMAIL = os.environ.get("LOGIN_RATE_PER_EMAIL", "5/min")
+LOGIN_BACKOFF_FREE_ATTEMPTS = int(os.environ.get("LOGIN_BACKOFF_FREE_ATTEMPTS", 3))
+LOGIN_BACKOFF_BASE = float(os.environ.get("LOGIN_BACKOFF_BASE", 1))
+LOGIN_BACKOFF_MAX = float(os.environ.get("LOGIN_BACKOFF_MAX", 900))
+
+# Пул процессов для хэширования паролей при входе и регистрации (0 — выключен).
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 0))
+PASSWORD_HASHING_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASHING_QUEUE_LIMIT", 16))
+PASSWORD_HASHING_TIMEOUT = float(os.environ.get("PASSWORD_HASHING_TIMEOUT", 10))
+
+# Метрики запросов: эндпоинт /api/auth/metrics/ в формате Prometheus
+# и заголовок Server-Timing с длительностью этапов аутентификации.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "False") == "True"
+SERVER_TIMING_HEADER = os.environ.get("SERVER_TIMING_HEADER", "False") == "True"
+# Доступ к метрикам: адреса сборщика и/или токен для заголовка Authorization.
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+]
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")